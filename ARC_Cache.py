@@ -0,0 +1,228 @@
+from Cache import Cache
+from CacheNode import CacheNode
+from LRUNode import LRUNode
+
+class ARCList:
+    """Circular doubly linked list of cache nodes ordered by recent usage,
+        with sentinel as the list's sentinel, the most recently used node
+        after it and the least recently used node before it
+    """
+    def __init__(self, name):
+        self.name = name
+        self.size = 0
+        self.sentinel = CacheNode(None)
+        self.sentinel.prev = self.sentinel
+        self.sentinel.next = self.sentinel
+
+    def __repr__(self):
+        lines = [self.name + ":"]
+        curr_node = self.sentinel.next
+        while curr_node is not self.sentinel:
+            lines.append(str(curr_node))
+            curr_node = curr_node.next
+        return "\n".join(lines) + "\n"
+
+    def add_most_recent(self, node):
+        """Function to add an unlinked node as the most recently used one
+
+            Args:
+                node (CacheNode) - node to add
+
+            Returns:
+                None
+        """
+        node.add_node_after(self.sentinel)
+        self.size += 1
+
+    def remove(self, node):
+        """Function to remove one of the list's nodes
+
+            Args:
+                node (CacheNode) - node linked into this list
+
+            Returns:
+                CacheNode - the removed node
+        """
+        self.size -= 1
+        return node.remove_node()
+
+    def remove_least_recent(self):
+        """Function to remove the least recently used node; it is assumed that
+            the list is non-empty
+
+            Args: None
+
+            Returns:
+                CacheNode - the removed node
+        """
+        return self.remove(self.sentinel.prev)
+
+class ARCCache(Cache):
+    """Adaptive replacement cache: resident entries are split between t1,
+        entries used once since they entered the cache, and t2, entries used
+        at least twice; b1 and b2 remember the keys recently evicted from t1
+        and t2 without their values. A miss on a key remembered in b1 grows
+        the target size of t1 and a miss on a key remembered in b2 shrinks it,
+        so the cache shifts between favouring recency and frequency as the
+        workload changes; every operation takes O(1) time
+    """
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.t1 = ARCList("T1")
+        self.t2 = ARCList("T2")
+        self.b1 = ARCList("B1")
+        self.b2 = ARCList("B2")
+        self.target_t1_size = 0
+        self.key_list_map = dict()
+        self.ghost_node_map = dict()
+
+    def __repr__(self):
+        res = "ARC Cache:\n"
+        res += "Capacity: " + str(self.capacity) + "\n"
+        res += "Size: " + str(self.size) + "\n"
+        res += "Target T1 size: " + str(self.target_t1_size) + "\n"
+        return res + "".join(str(arc_list) for arc_list in (self.t1, self.t2, self.b1, self.b2))
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            moving its entry to the most recently used end of t2
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        entry_node = self.key_node_map.get(key)
+        if entry_node is None:
+            return None
+        self.key_list_map[key].remove(entry_node)
+        self.t2.add_most_recent(entry_node)
+        self.key_list_map[key] = self.t2
+        return entry_node.value
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache; a
+            key that is present or remembered in b1 or b2 enters t2, adapting
+            the target size of t1 in the latter case, and any other key enters
+            t1
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                None
+        """
+        entry_node = self.key_node_map.get(key)
+        if entry_node is not None:
+            entry_node.value = value
+            self.key_list_map[key].remove(entry_node)
+            self.t2.add_most_recent(entry_node)
+            self.key_list_map[key] = self.t2
+            return
+        ghost_list = self.key_list_map.get(key)
+        if ghost_list is self.b1:
+            self.target_t1_size = min(self.capacity, self.target_t1_size + max(self.b2.size // self.b1.size, 1))
+            if self.size == self.capacity:
+                self.__replace(False)
+            self.__forget(key)
+            self.__add_new_entry(key, value, self.t2)
+            return
+        if ghost_list is self.b2:
+            self.target_t1_size = max(0, self.target_t1_size - max(self.b1.size // self.b2.size, 1))
+            if self.size == self.capacity:
+                self.__replace(True)
+            self.__forget(key)
+            self.__add_new_entry(key, value, self.t2)
+            return
+        if self.t1.size + self.b1.size == self.capacity:
+            if self.t1.size < self.capacity:
+                self.__forget(self.b1.sentinel.prev.key)
+                if self.size == self.capacity:
+                    self.__replace(False)
+            else:
+                evicted_node = self.t1.remove_least_recent()
+                del self.key_node_map[evicted_node.key]
+                del self.key_list_map[evicted_node.key]
+                self.size -= 1
+        elif self.size + self.b1.size + self.b2.size >= self.capacity:
+            if self.size + self.b1.size + self.b2.size == 2 * self.capacity:
+                self.__forget(self.b2.sentinel.prev.key)
+            if self.size == self.capacity:
+                self.__replace(False)
+        self.__add_new_entry(key, value, self.t1)
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache without
+            remembering it in b1 or b2
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                LRUNode - the removed node if the key was present, otherwise None
+        """
+        entry_node = self.key_node_map.pop(key, None)
+        if entry_node is None:
+            return None
+        self.key_list_map.pop(key).remove(entry_node)
+        self.size -= 1
+        return entry_node
+
+    def __add_new_entry(self, key, value, arc_list):
+        """Function to add a new (key, value) pair as the most recently used
+            entry of t1 or t2; it is assumed that the cache is not at full
+            capacity
+
+            Args:
+                key (int)
+                value (int)
+                arc_list (ARCList) - t1 or t2
+
+            Returns:
+                None
+        """
+        entry_node = LRUNode(key, value)
+        arc_list.add_most_recent(entry_node)
+        self.key_node_map[key] = entry_node
+        self.key_list_map[key] = arc_list
+        self.size += 1
+
+    def __replace(self, key_in_b2):
+        """Function to evict the least recently used entry of t1 or t2,
+            remembering its key in b1 or b2; t1 is evicted from when it is
+            larger than its target size, or as large while the key being
+            placed is remembered in b2
+
+            Args:
+                key_in_b2 (boolean) - whether the key being placed is
+                    remembered in b2
+
+            Returns:
+                None
+        """
+        if self.t1.size > 0 and (self.t1.size > self.target_t1_size
+                or (key_in_b2 and self.t1.size == self.target_t1_size)):
+            resident_list, ghost_list = self.t1, self.b1
+        else:
+            resident_list, ghost_list = self.t2, self.b2
+        evicted_node = resident_list.remove_least_recent()
+        del self.key_node_map[evicted_node.key]
+        self.size -= 1
+        ghost_node = CacheNode(evicted_node.key)
+        ghost_list.add_most_recent(ghost_node)
+        self.ghost_node_map[evicted_node.key] = ghost_node
+        self.key_list_map[evicted_node.key] = ghost_list
+
+    def __forget(self, key):
+        """Function to drop a key remembered in b1 or b2
+
+            Args:
+                key (int) - key remembered in b1 or b2
+
+            Returns:
+                None
+        """
+        self.key_list_map.pop(key).remove(self.ghost_node_map.pop(key))
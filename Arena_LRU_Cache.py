@@ -0,0 +1,357 @@
+import time
+
+from LRU_Cache import LRUCache
+from LRUNode import LRUNode
+from Snapshot import read_snapshot, write_snapshot
+
+class ArenaLRUCache(LRUCache):
+    """LRU cache of bytes values stored in preallocated bytearray slabs rather
+        than as one object per value; each node holds the (size class, slab,
+        offset, length) of its value's chunk, and get_value returns a
+        read-only memoryview of the chunk, made on the first read of the value
+        and kept until the value leaves the cache
+
+        Chunks come in size classes, powers of two from min_chunk_size up to
+        slab_size, and each class carves its chunks from its own slabs; a
+        chunk freed by eviction, removal or overwriting goes to its class's
+        free list for reuse. Freeing a chunk releases its memoryview, so a
+        caller still holding the view gets a ValueError on use rather than
+        seeing a later value; if a consumer of the buffer protocol still holds
+        the view, which prevents the release, the chunk is never reused and is
+        counted in self.leaked_bytes instead. Slices of the view, and views
+        made from it, are views of the slab that are not released, so values
+        to be kept after their entry leaves the cache should be copied with
+        bytes(). A weigher is given the placed bytes-like value, and on_evict
+        a bytes copy of the evicted value.
+    """
+    def __init__(self, capacity, slab_size = 1 << 20, min_chunk_size = 64, weigher = None, default_ttl = None,
+            clock = time.monotonic, record_stats = False, on_evict = None, on_miss = None):
+        super().__init__(capacity, weigher, default_ttl, clock, record_stats,
+            None if on_evict is None else self.__call_evict_callback, on_miss)
+        if slab_size <= 0 or slab_size & (slab_size - 1):
+            raise ValueError("Slab size must be a power of two")
+        if min_chunk_size <= 0 or min_chunk_size & (min_chunk_size - 1) or min_chunk_size > slab_size:
+            raise ValueError("Minimum chunk size must be a power of two no larger than the slab size")
+        self.slab_size = slab_size
+        self.min_chunk_bits = min_chunk_size.bit_length() - 1
+        class_count = slab_size.bit_length() - self.min_chunk_bits
+        self.slabs = []
+        self.slab_views = []
+        self.class_free_chunks = [[] for _ in range(class_count)]
+        self.class_slabs = [None] * class_count
+        self.class_offsets = [slab_size] * class_count
+        self.key_views = dict()
+        self.evict_callback = on_evict
+        self.leaked_bytes = 0
+
+    @property
+    def arena_bytes(self):
+        """Total size of the allocated slabs"""
+        return len(self.slabs) * self.slab_size
+
+    def get_value(self, key):
+        """Function to retrieve the view of the value associated with a key if
+            it exists, updating to reflect its recent usage
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                memoryview - read-only view of the value if key is present,
+                otherwise None
+        """
+        entry_node = self.key_node_map.get(key)
+        if entry_node is None or self.expiry_heap: # misses and expiry checks take LRUCache's path
+            chunk = super().get_value(key)
+            return None if chunk is None else self.__view(key, chunk)
+        if entry_node.prev is not self.head:
+            entry_node.remove_node()
+            entry_node.add_node_after(self.head)
+        self.modification_count += 1
+        if self.counters is not None:
+            self.counters.hits += 1
+        view = self.key_views.get(key)
+        return view if view is not None else self.__view(key, entry_node.value)
+
+    def get_many(self, keys):
+        """Function to retrieve the views of the values associated with
+            several keys in one call
+
+            Args:
+                keys (iterable) - keys that are being queried
+
+            Returns:
+                list - view of the value of each key in order, None for keys
+                that are not present in the cache
+        """
+        keys = list(keys)
+        return [None if chunk is None else self.__view(key, chunk) for key, chunk in zip(keys, super().get_many(keys))]
+
+    def peek(self, key):
+        """Function to read the view of the value associated with a key without
+            marking it as used
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                memoryview - view of the value if key is present and not
+                expired, otherwise None
+        """
+        chunk = super().peek(key)
+        return None if chunk is None else self.__view(key, chunk)
+
+    def iter_by_recency(self, reverse = False):
+        """Function to stream the keys of the cache with the views of their
+            values, as LRUCache.iter_by_recency
+
+            Args:
+                reverse (boolean) - whether to start from the most rather than
+                    the least recently used entry
+
+            Returns:
+                generator - (key, memoryview) pairs
+        """
+        for key, chunk in super().iter_by_recency(reverse):
+            yield key, self.__view(key, chunk)
+
+    def put_key_value(self, key, value, ttl = None):
+        """Function to copy a bytes-like value into a chunk of the arena and
+            place it under a key, updating to reflect its recent placement;
+            overwriting a key frees the chunk of its previous value
+
+            Args:
+                key (int) - key that is being placed
+                value (bytes) - bytes-like value that is being placed
+                ttl (float) - optional time to live in seconds
+
+            Returns:
+                None
+        """
+        self.put_key_value_internally(key, value, ttl)
+
+    def put_key_value_internally(self, key, value, ttl = None):
+        """Same functionality as put_key_value but the resulting node is
+            returned; expired entries are reaped once, before any chunk is
+            freed or allocated, and the node is linked here rather than by
+            LRUCache, whose own expiry check could free the new chunk
+
+            Args:
+                key (int) - key that is being placed
+                value (bytes) - bytes-like value that is being placed
+                ttl (float) - optional time to live in seconds
+
+            Returns:
+                updated node, whose value is the chunk of the copied value
+        """
+        data = value if type(value) is bytes else memoryview(value).cast("B")
+        if len(data) > self.slab_size:
+            raise ValueError("Value is larger than the slab size")
+        weight = self.weigh(value) if self.weigher is not None else 1
+        if self.expiry_heap:
+            self.reap_expired()
+        self.modification_count += 1
+        entry_node = self.key_node_map.get(key)
+        if entry_node is not None:
+            self.__free_chunk(key, entry_node.value)
+            entry_node.remove_node()
+            if self.weigher is not None:
+                self.weight += weight - entry_node.weight
+            if self.counters is not None:
+                self.counters.updates += 1
+        else:
+            evicted_node = None
+            if self.weigher is None:
+                if self.is_at_capacity():
+                    evicted_node = self.evict_LRU_entry()
+            else:
+                while self.weight + weight > self.capacity:
+                    evicted_node = self.evict_LRU_entry()
+                self.weight += weight
+            entry_node = LRUNode(key, None) if evicted_node is None else evicted_node.reuse(key, None)
+            self.size += 1
+            self.key_node_map[key] = entry_node
+            if self.counters is not None:
+                self.counters.inserts += 1
+        entry_node.weight = weight
+        entry_node.value = self.__store(data)
+        entry_node.add_node_after(self.head)
+        while self.weight > self.capacity: # an overwritten value grew; the entry itself is evicted last
+            self.evict_LRU_entry()
+        if ttl is not None or self.default_ttl is not None or entry_node.expires_at is not None:
+            self.set_expiry(entry_node, ttl)
+        return entry_node
+
+    def put_many(self, items):
+        """Function to place several keys and associated bytes-like values
+            into the cache in one call
+
+            Args:
+                items (dict or iterable) - (key, value) pairs to place
+
+            Returns:
+                None
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        for key, value in items:
+            self.put_key_value_internally(key, value)
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache, freeing its
+            chunk
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                LRUNode - the removed node if the key was present, otherwise None
+        """
+        entry_node = super().remove_key(key)
+        if entry_node is not None:
+            self.__free_chunk(key, entry_node.value)
+        return entry_node
+
+    def evict_LRU_entry(self):
+        """Function to remove the least recently used entry from the cache,
+            freeing its chunk; it is assumed that the cache has at least one
+            entry in it
+
+            Args: None
+
+            Returns:
+                LRUNode - the evicted node
+        """
+        entry_node = super().evict_LRU_entry()
+        self.__free_chunk(entry_node.key, entry_node.value)
+        return entry_node
+
+    def save_snapshot(self, path):
+        """Function to write the entries of the cache to a snapshot file, from
+            the least to the most recently used, copying each value to bytes
+
+            Args:
+                path (str) - path of the snapshot file, replaced if it exists
+
+            Returns:
+                int - number of entries written
+        """
+        def records():
+            curr_node = self.tail.prev
+            while curr_node is not self.head:
+                yield curr_node.key, self.__read(curr_node.value), 1
+                curr_node = curr_node.prev
+        return write_snapshot(path, records())
+
+    def load_snapshot(self, path):
+        """Function to fill an empty cache from a snapshot file, copying each
+            value into the arena in the snapshot's recency order
+
+            Args:
+                path (str) - path of a snapshot file written by save_snapshot
+
+            Returns:
+                int - number of entries restored
+        """
+        if self.size != 0:
+            raise ValueError("Snapshot can only be loaded into an empty cache")
+        for key, value, _ in read_snapshot(path):
+            self.put_key_value_internally(key, value)
+        return self.size
+
+    def __store(self, data):
+        """Function to copy a value into a chunk taken from its class's free
+            list or else from its class's current slab, allocating a new slab
+            when the current one is full
+
+            Args:
+                data (bytes or memoryview) - bytes of the value
+
+            Returns:
+                tuple - (size class, slab index, offset in the slab, length)
+        """
+        size = len(data)
+        class_index = max(0, (size - 1).bit_length() - self.min_chunk_bits)
+        free_chunks = self.class_free_chunks[class_index]
+        if free_chunks:
+            _, slab_index, offset, _ = free_chunks.pop()
+        else:
+            slab_index, offset = self.__carve_chunk(class_index)
+        self.slabs[slab_index][offset:offset + size] = data
+        return class_index, slab_index, offset, size
+
+    def __carve_chunk(self, class_index):
+        """Function to carve a new chunk of a size class from the class's
+            current slab, allocating a new slab when the current one is full
+
+            Args:
+                class_index (int) - size class of the chunk
+
+            Returns:
+                tuple - (slab index, offset in the slab)
+        """
+        chunk_size = 1 << (class_index + self.min_chunk_bits)
+        offset = self.class_offsets[class_index]
+        if offset + chunk_size > self.slab_size:
+            slab = bytearray(self.slab_size)
+            self.slabs.append(slab)
+            self.slab_views.append(memoryview(slab).toreadonly())
+            self.class_slabs[class_index] = len(self.slabs) - 1
+            offset = 0
+        self.class_offsets[class_index] = offset + chunk_size
+        return self.class_slabs[class_index], offset
+
+    def __view(self, key, chunk):
+        """Function to get the view of a key's chunk, making it on the first
+            read of the value
+
+            Args:
+                key (int) - key whose value is read
+                chunk (tuple) - chunk of the value, as returned by __store
+
+            Returns:
+                memoryview - read-only view of the value
+        """
+        view = self.key_views.get(key)
+        if view is None:
+            _, slab_index, offset, size = chunk
+            view = self.key_views[key] = self.slab_views[slab_index][offset:offset + size]
+        return view
+
+    def __read(self, chunk):
+        """Function to copy the value of a chunk to bytes
+
+            Args:
+                chunk (tuple) - chunk of the value, as returned by __store
+
+            Returns:
+                bytes
+        """
+        _, slab_index, offset, size = chunk
+        return bytes(self.slab_views[slab_index][offset:offset + size])
+
+    def __call_evict_callback(self, key, chunk):
+        """Function called by LRUCache for each evicted entry, before its chunk
+            is freed, passing a copy of the value to on_evict"""
+        self.evict_callback(key, self.__read(chunk))
+
+    def __free_chunk(self, key, chunk):
+        """Function to release the view of a key's chunk, if one was handed out
+            by get_value, and return the chunk to its class's free list, or
+            leak it if the view cannot be released
+
+            Args:
+                key (int) - key whose chunk is freed
+                chunk (tuple) - chunk of the value, as returned by __store
+
+            Returns:
+                None
+        """
+        view = self.key_views.pop(key, None)
+        if view is not None:
+            try:
+                view.release()
+            except BufferError: # the caller exported the view, so the chunk may still be read
+                self.leaked_bytes += 1 << (chunk[0] + self.min_chunk_bits)
+                return
+        self.class_free_chunks[chunk[0]].append(chunk)
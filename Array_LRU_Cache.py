@@ -0,0 +1,177 @@
+from array import array
+
+from Cache import Cache
+
+class ArrayLRUCache(Cache):
+    """LRU cache whose recency links live in preallocated integer arrays
+        indexed by slot rather than in one node object per entry; slot 0 is
+        the sentinel of a circular list (its next slot is the most recently
+        used entry, its previous slot the least recently used one) and
+        unused slots are chained through the same next array as a free list
+    """
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.next_slot = array("q", range(1, capacity + 2))
+        self.next_slot[0] = 0
+        self.next_slot[capacity] = 0
+        self.prev_slot = array("q", bytes(8 * (capacity + 1)))
+        self.slot_keys = [None] * (capacity + 1)
+        self.slot_values = [None] * (capacity + 1)
+        self.free_slot = 1
+
+    def __repr__(self):
+        lines = ["Nodes:"]
+        curr_slot = self.next_slot[0]
+        while curr_slot != 0:
+            lines.append(f"(key: {self.slot_keys[curr_slot]}, value: {self.slot_values[curr_slot]})")
+            curr_slot = self.next_slot[curr_slot]
+        return "\n".join(lines) + "\n\n"
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            updating to reflect its recent usage
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None; if present, the (key, value) pair is marked as the most
+                recently queried
+        """
+        slot = self.key_node_map.get(key)
+        if slot is None:
+            return None
+        self.__mark_as_most_recent(slot)
+        return self.slot_values[slot]
+
+    def peek(self, key):
+        """Function to read the value associated with a key without marking it
+            as used
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                value associated with key if it is present, otherwise None
+        """
+        slot = self.key_node_map.get(key)
+        return None if slot is None else self.slot_values[slot]
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache,
+            updating to reflect its recent placement
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is not None:
+            self.slot_values[slot] = value
+            self.__mark_as_most_recent(slot)
+            return
+        if self.is_at_capacity():
+            self.evict_LRU_entry()
+        slot = self.free_slot
+        self.free_slot = self.next_slot[slot]
+        self.size += 1
+        self.slot_keys[slot] = key
+        self.slot_values[slot] = value
+        self.key_node_map[key] = slot
+        self.__link_as_most_recent(slot)
+
+    def evict_LRU_entry(self):
+        """Function to remove the least recently used entry from the cache,
+            returning its slot to the free list; it is assumed that the cache
+            has at least one entry in it
+
+            Args: None
+
+            Returns:
+                tuple - the (key, value) pair of the evicted entry
+        """
+        return self.__free(self.prev_slot[0])
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache, returning its
+            slot to the free list
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                tuple - the removed (key, value) pair if the key was present,
+                otherwise None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is None:
+            return None
+        return self.__free(slot)
+
+    def __free(self, slot):
+        """Function to unlink an occupied slot, drop its key and return the
+            slot to the free list
+
+            Args:
+                slot (int) - occupied slot to free
+
+            Returns:
+                tuple - the (key, value) pair the slot held
+        """
+        self.__unlink(slot)
+        key = self.slot_keys[slot]
+        value = self.slot_values[slot]
+        self.slot_keys[slot] = None
+        self.slot_values[slot] = None
+        self.next_slot[slot] = self.free_slot
+        self.free_slot = slot
+        self.size -= 1
+        del self.key_node_map[key]
+        return key, value
+
+    def __unlink(self, slot):
+        """Function to remove a slot from the recency list, leaving its own
+            links stale
+
+            Args:
+                slot (int) - occupied slot to unlink
+
+            Returns:
+                None
+        """
+        prev_slot = self.prev_slot[slot]
+        next_slot = self.next_slot[slot]
+        self.next_slot[prev_slot] = next_slot
+        self.prev_slot[next_slot] = prev_slot
+
+    def __link_as_most_recent(self, slot):
+        """Function to link an unlinked slot directly after the sentinel
+
+            Args:
+                slot (int) - slot to link
+
+            Returns:
+                None
+        """
+        first_slot = self.next_slot[0]
+        self.next_slot[slot] = first_slot
+        self.prev_slot[first_slot] = slot
+        self.prev_slot[slot] = 0
+        self.next_slot[0] = slot
+
+    def __mark_as_most_recent(self, slot):
+        """Given an occupied slot, mark it internally as the most recently
+            queried
+
+            Args:
+                slot (int) - slot to be marked
+
+            Returns:
+                None
+        """
+        self.__unlink(slot)
+        self.__link_as_most_recent(slot)
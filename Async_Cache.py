@@ -0,0 +1,71 @@
+import asyncio
+
+from LFU_Cache import LFUCache
+from LRU_Cache import LRUCache
+
+class AsyncLoadingMixin:
+    """Mixin adding get_or_load to a cache for use from a single asyncio event
+        loop; a value being loaded lives only in its in-flight task and is
+        placed in the cache once loaded, so eviction can never drop it
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = dict()
+
+    async def get_or_load(self, key, loader):
+        """Function to retrieve the value associated with a key, loading and
+            caching it on a miss; concurrent misses on the same key share a
+            single call to loader, whose exceptions are raised to every waiter
+            and are not cached
+
+            Args:
+                key (int) - key that is being queried
+                loader (callable) - coroutine function called as loader(key)
+                    to produce the value on a miss
+
+            Returns:
+                value associated with key
+        """
+        if self.is_key_in_cache(key):
+            return self.get_value(key)
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.__load(key, loader))
+            self.in_flight[key] = task
+        return await asyncio.shield(task)
+
+    def is_loading(self, key):
+        """Function to check if a value is currently being loaded for a key
+
+            Args:
+                key (int) - key that is being checked
+
+            Returns:
+                boolean
+        """
+        return key in self.in_flight
+
+    async def __load(self, key, loader):
+        """Function to run a loader and cache its result; a value placed with
+            put_key_value while the loader ran is considered fresher and kept
+
+            Args:
+                key (int) - key that is being loaded
+                loader (callable) - coroutine function producing the value
+
+            Returns:
+                loaded value
+        """
+        try:
+            value = await loader(key)
+        finally:
+            del self.in_flight[key]
+        if not self.is_key_in_cache(key):
+            self.put_key_value(key, value)
+        return value
+
+class AsyncLRUCache(AsyncLoadingMixin, LRUCache):
+    """LRUCache with an awaitable, request-coalescing get_or_load"""
+
+class AsyncLFUCache(AsyncLoadingMixin, LFUCache):
+    """LFUCache with an awaitable, request-coalescing get_or_load"""
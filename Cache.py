@@ -1,11 +1,55 @@
+import heapq
+import itertools
+import time
+from collections import namedtuple
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "inserts", "updates", "evictions",
+    "frequency_nodes_created", "frequency_nodes_removed"])
+
+class StatsCounters:
+    """Mutable counters behind Cache.stats, one attribute per CacheStats field"""
+    __slots__ = CacheStats._fields
+
+    def __init__(self):
+        for field in CacheStats._fields:
+            setattr(self, field, 0)
+
 class Cache:
-    """Basic cache class for use as super classes of LRU and LFU caches"""
-    def __init__(self, capacity = 10):
+    """Basic cache class for use as super classes of LRU and LFU caches; with
+        a weigher, capacity bounds the total weight of the values in the cache
+        rather than their number, and entries given a time to live are reaped
+        through a heap ordered by expiry time
+
+        With record_stats, operations are counted in self.counters, which is
+        None otherwise so that each operation only pays for one attribute
+        check; on_evict(key, value) is called after an entry is evicted to make
+        room and on_miss(key) after a look up misses. Callbacks must not modify
+        the cache.
+
+        Operations that change the cache's entries or their order increment
+        self.modification_count, which the iterators of LRUCache and LFUCache
+        check after each entry they yield, raising RuntimeError if the cache
+        changed.
+    """
+    def __init__(self, capacity = 10, weigher = None, default_ttl = None, clock = time.monotonic,
+            record_stats = False, on_evict = None, on_miss = None):
         if capacity <= 0 or int(capacity) != capacity:
             raise ValueError("Capacity must be positive")
+        if default_ttl is not None and default_ttl <= 0:
+            raise ValueError("Time to live must be positive")
         self.capacity = capacity
         self.size = 0
         self.key_node_map = dict()
+        self.weigher = weigher
+        self.weight = 0
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.expiry_heap = []
+        self.expiry_counter = itertools.count()
+        self.counters = StatsCounters() if record_stats else None
+        self.on_evict = on_evict
+        self.on_miss = on_miss
+        self.modification_count = 0
 
     def is_at_capacity(self):
         """Function to check if the cache has reached its full capacity
@@ -15,10 +59,82 @@ class Cache:
             Returns:
                 boolean
         """
+        if self.weigher is not None:
+            return self.weight >= self.capacity
         return self.size == self.capacity
 
+    def get_size(self):
+        """Function to report the number of entries and their total weight
+
+            Args: None
+
+            Returns:
+                tuple - (number of entries, total weight); without a weigher
+                every entry weighs 1
+        """
+        if self.weigher is not None:
+            return self.size, self.weight
+        return self.size, self.size
+
+    def enable_stats(self, enabled = True):
+        """Function to switch the recording of operation counts on or off;
+            switching it off discards the counts
+
+            Args:
+                enabled (boolean) - whether to record counts
+
+            Returns:
+                None
+        """
+        if not enabled:
+            self.counters = None
+        elif self.counters is None:
+            self.counters = StatsCounters()
+
+    def stats(self):
+        """Function to report the operation counts recorded so far
+
+            Args: None
+
+            Returns:
+                CacheStats - counts of hits, misses, inserts, updates,
+                evictions and LFU frequency node creations and removals; all
+                zero if counts are not being recorded
+        """
+        counters = self.counters if self.counters is not None else StatsCounters()
+        return CacheStats(*(getattr(counters, field) for field in CacheStats._fields))
+
+    def reset_stats(self):
+        """Function to set every recorded operation count back to zero
+
+            Args: None
+
+            Returns:
+                None
+        """
+        if self.counters is not None:
+            self.counters = StatsCounters()
+
+    def weigh(self, value):
+        """Function to compute the weight of a value with the cache's weigher,
+            checking that the value could fit in the cache
+
+            Args:
+                value - value that is about to be placed
+
+            Returns:
+                int - weight of value
+        """
+        weight = self.weigher(value)
+        if weight <= 0 or int(weight) != weight:
+            raise ValueError("Weight must be a positive integer")
+        if weight > self.capacity:
+            raise ValueError("Weight of value exceeds the capacity of the cache")
+        return weight
+
     def is_key_in_cache(self, key):
-        """Function to check if a key is present in the cache
+        """Function to check if a key is present in the cache, reaping expired
+            entries first
 
             Args:
                 key (int) - key that is being checked
@@ -26,4 +142,79 @@ class Cache:
             Returns:
                 boolean
         """
+        if self.expiry_heap:
+            self.reap_expired()
         return key in self.key_node_map
+
+    def set_expiry(self, entry_node, ttl):
+        """Function to set when an entry expires, scheduling it for reaping;
+            without ttl the cache's default time to live is used, and without
+            either the entry never expires
+
+            Args:
+                entry_node (LRUNode) - node of an entry present in the cache
+                ttl (float) - optional time to live in seconds
+
+            Returns:
+                None
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        if ttl is None:
+            entry_node.expires_at = None
+            return
+        if ttl <= 0:
+            raise ValueError("Time to live must be positive")
+        entry_node.expires_at = self.clock() + ttl
+        heapq.heappush(self.expiry_heap, (entry_node.expires_at, next(self.expiry_counter), entry_node.key))
+        if len(self.expiry_heap) > 2 * self.size + 64:
+            self.__rebuild_expiry_heap()
+
+    def reap_expired(self):
+        """Function to remove every expired entry from the cache; each entry is
+            popped from the expiry heap at most once per time it is scheduled,
+            so the whole cache is never scanned
+
+            Args: None
+
+            Returns:
+                int - number of entries removed
+        """
+        now = self.clock()
+        reaped = 0
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self.expiry_heap)
+            entry_node = self.key_node_map.get(key)
+            if entry_node is not None and entry_node.expires_at == expires_at:
+                self.remove_key(key)
+                reaped += 1
+        return reaped
+
+    def peek(self, key):
+        """Function to read the value associated with a key without marking it
+            as used, counting a hit or miss or reaping expired entries
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                value associated with key if it is present and not expired,
+                otherwise None
+        """
+        entry_node = self.key_node_map.get(key)
+        if entry_node is None or (entry_node.expires_at is not None and entry_node.expires_at <= self.clock()):
+            return None
+        return entry_node.value
+
+    def __rebuild_expiry_heap(self):
+        """Function to drop heap items left behind by entries that were
+            updated or removed before expiring
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.expiry_heap = [(entry_node.expires_at, next(self.expiry_counter), key)
+            for key, entry_node in self.key_node_map.items() if entry_node.expires_at is not None]
+        heapq.heapify(self.expiry_heap)
@@ -1,5 +1,8 @@
 class CacheNode:
-    """Basic node class for use in a doubly linked list"""
+    """Basic node class for use in a doubly linked list; also used on its own
+        for list sentinels, which carry no payload"""
+    __slots__ = ("key", "prev", "next")
+
     def __init__(self, key, prev = None, next = None):
         self.key = key
         self.prev = prev
@@ -0,0 +1,20 @@
+from LFU_Cache import LFUCache
+from LRU_Cache import LRUCache
+
+POLICIES = {
+    "lru": LRUCache,
+    "lfu": LFUCache,
+}
+
+def policy_cache_class(policy):
+    """Function to find the cache class implementing an eviction policy
+
+        Args:
+            policy (str) - "lru" or "lfu"
+
+        Returns:
+            class - LRUCache or LFUCache
+    """
+    if policy not in POLICIES:
+        raise ValueError("Policy must be one of: " + ", ".join(POLICIES))
+    return POLICIES[policy]
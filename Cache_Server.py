@@ -0,0 +1,665 @@
+"""Cache server sharing named LRUCache and LFUCache instances between processes
+
+The server runs on one asyncio event loop, so the hosted caches are only ever
+touched from one thread. Clients talk to it over TCP or a unix socket with a
+subset of the Redis serialization protocol: each command is an array of bulk
+strings, and every command buffered on a connection is answered in order with
+a single write, so clients can pipeline requests. Commands:
+
+    PING                          -> +PONG
+    GET cache key                 -> bulk value, or nil on a miss
+    MGET cache key [key ...]      -> array of bulk values or nils
+    SET cache key value [ttl]     -> +OK, ttl in seconds
+    MSET cache key value [...]    -> +OK
+    DEL cache key                 -> :1 if the key was present, otherwise :0
+
+Keys and values are byte strings. Run a server with, for example,
+``python Cache_Server.py --cache sessions:lfu:10000 --port 6400``.
+"""
+import argparse
+import asyncio
+import socket
+import threading
+
+from Cache_Policies import POLICIES, policy_cache_class
+
+READ_SIZE = 1 << 16
+MAX_ARGUMENTS = 1 << 20
+MAX_BULK_LENGTH = 1 << 26
+
+class CacheServerError(Exception):
+    """Error reply sent by the cache server"""
+
+def to_bytes(argument):
+    """Function to convert a command argument to the bytes sent on the wire
+
+        Args:
+            argument (bytes, str, int or float) - strings are UTF-8 encoded and
+                numbers written in decimal
+
+        Returns:
+            bytes
+    """
+    if isinstance(argument, (bytes, bytearray, memoryview)):
+        return bytes(argument)
+    if isinstance(argument, str):
+        return argument.encode()
+    if isinstance(argument, (int, float)):
+        return str(argument).encode()
+    raise TypeError("Command arguments must be bytes, str, int or float")
+
+def encode_command(arguments):
+    """Function to encode a command as an array of bulk strings
+
+        Args:
+            arguments (list) - command name followed by its arguments
+
+        Returns:
+            bytes
+    """
+    parts = [b"*%d\r\n" % len(arguments)]
+    for argument in arguments:
+        argument = to_bytes(argument)
+        parts.append(b"$%d\r\n" % len(argument))
+        parts.append(argument)
+        parts.append(b"\r\n")
+    return b"".join(parts)
+
+def parse_command(buffer, position):
+    """Function to parse one command from a buffer of received bytes
+
+        Args:
+            buffer (bytearray) - bytes received on a connection
+            position (int) - offset at which the command starts
+
+        Returns:
+            tuple - (list of argument bytes, offset after the command), or None
+            if the buffer does not hold the whole command yet
+    """
+    end = buffer.find(b"\r\n", position)
+    if end < 0:
+        return None
+    if buffer[position] != ord("*"):
+        raise ValueError("Protocol error: expected an array of bulk strings")
+    count = int(buffer[position + 1:end])
+    if not 0 < count <= MAX_ARGUMENTS:
+        raise ValueError("Protocol error: invalid number of arguments")
+    position = end + 2
+    arguments = []
+    for _ in range(count):
+        end = buffer.find(b"\r\n", position)
+        if end < 0:
+            return None
+        if buffer[position] != ord("$"):
+            raise ValueError("Protocol error: expected a bulk string")
+        length = int(buffer[position + 1:end])
+        if not 0 <= length <= MAX_BULK_LENGTH:
+            raise ValueError("Protocol error: invalid bulk length")
+        start = end + 2
+        if len(buffer) < start + length + 2:
+            return None
+        arguments.append(bytes(buffer[start:start + length]))
+        position = start + length + 2
+    return arguments, position
+
+def encode_bulk(value):
+    """Function to encode a value as a bulk string reply, None as nil"""
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+def read_reply(stream):
+    """Function to read one reply from a server connection
+
+        Args:
+            stream (io.BufferedReader) - reader over the connection's socket
+
+        Returns:
+            str for status replies, int for integer replies, bytes or None for
+            bulk replies, a list for array replies and a CacheServerError,
+            returned rather than raised, for error replies
+    """
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the cache server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        return CacheServerError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("Connection closed by the cache server")
+        return data[:-2]
+    if kind == b"*":
+        return [read_reply(stream) for _ in range(int(body))]
+    raise ConnectionError("Unexpected reply from the cache server")
+
+class CacheServer:
+    """Server hosting named caches, each an LRUCache, LFUCache or any cache
+        with the same interface, for clients speaking the protocol described
+        in this module; it is not thread-safe, and the caches it hosts must
+        only be used through it while it runs
+    """
+    def __init__(self, caches):
+        self.caches = dict(caches)
+        self.address = None
+        self.server = None
+        self.writers = set()
+        self.loop = None
+        self.thread = None
+        self.commands = {
+            b"PING": self.__ping,
+            b"GET": self.__get,
+            b"MGET": self.__get_many,
+            b"SET": self.__set,
+            b"MSET": self.__set_many,
+            b"DEL": self.__delete,
+        }
+
+    def __repr__(self):
+        return f"Cache Server at {self.address}: " + ", ".join(self.caches) + "\n"
+
+    async def start(self, address):
+        """Function to start accepting connections on the running event loop
+
+            Args:
+                address (tuple or str) - (host, port) to listen on over TCP,
+                    port 0 picking a free port, or the path of a unix socket
+
+            Returns:
+                tuple or str - the address listened on
+        """
+        if isinstance(address, str):
+            self.server = await asyncio.start_unix_server(self.__serve_connection, path = address)
+            self.address = address
+        else:
+            self.server = await asyncio.start_server(self.__serve_connection, *address)
+            self.address = self.server.sockets[0].getsockname()[:2]
+        return self.address
+
+    async def close(self):
+        """Function to stop accepting connections and close the open ones
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+
+    def start_thread(self, address):
+        """Function to run the server on a new event loop in a daemon thread
+
+            Args:
+                address (tuple or str) - address as for start
+
+            Returns:
+                tuple or str - the address listened on
+        """
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.start(address))
+        except BaseException:
+            self.loop.close()
+            raise
+        self.thread = threading.Thread(target = self.loop.run_forever, daemon = True)
+        self.thread.start()
+        return self.address
+
+    def stop_thread(self):
+        """Function to close a server started with start_thread and stop its
+            thread
+
+            Args: None
+
+            Returns:
+                None
+        """
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def execute(self, arguments):
+        """Function to run one command against the hosted caches
+
+            Args:
+                arguments (list) - command name followed by its arguments, all
+                    bytes
+
+            Returns:
+                bytes - the encoded reply
+        """
+        handler = self.commands.get(arguments[0].upper())
+        if handler is None:
+            return b"-ERR unknown command\r\n"
+        try:
+            return handler(arguments[1:])
+        except Exception as error:
+            return b"-ERR " + str(error).replace("\r\n", " ").encode() + b"\r\n"
+
+    async def __serve_connection(self, reader, writer):
+        """Function serving one client connection, answering every complete
+            command received so far with one write; a protocol error is
+            answered and closes the connection
+
+            Args:
+                reader (asyncio.StreamReader)
+                writer (asyncio.StreamWriter)
+
+            Returns:
+                None
+        """
+        self.writers.add(writer)
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                buffer += data
+                replies = []
+                position = 0
+                try:
+                    parsed = parse_command(buffer, position)
+                    while parsed is not None:
+                        arguments, position = parsed
+                        replies.append(self.execute(arguments))
+                        parsed = parse_command(buffer, position)
+                except ValueError as error:
+                    replies.append(b"-ERR " + str(error).encode() + b"\r\n")
+                    writer.write(b"".join(replies))
+                    await writer.drain()
+                    break
+                del buffer[:position]
+                if replies:
+                    writer.write(b"".join(replies))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    def __cache(self, name):
+        """Function to find a hosted cache by name
+
+            Args:
+                name (bytes) - name of the cache
+
+            Returns:
+                hosted cache
+        """
+        cache = self.caches.get(name.decode())
+        if cache is None:
+            raise ValueError(f"unknown cache '{name.decode()}'")
+        return cache
+
+    def __ping(self, arguments):
+        """Function to answer PING"""
+        return b"+PONG\r\n"
+
+    def __get(self, arguments):
+        """Function to answer GET cache key"""
+        if len(arguments) != 2:
+            raise ValueError("GET takes a cache and a key")
+        return encode_bulk(self.__cache(arguments[0]).get_value(arguments[1]))
+
+    def __get_many(self, arguments):
+        """Function to answer MGET cache key [key ...]"""
+        if len(arguments) < 2:
+            raise ValueError("MGET takes a cache and at least one key")
+        values = self.__cache(arguments[0]).get_many(arguments[1:])
+        return b"*%d\r\n" % len(values) + b"".join(encode_bulk(value) for value in values)
+
+    def __set(self, arguments):
+        """Function to answer SET cache key value [ttl]"""
+        if len(arguments) not in (3, 4):
+            raise ValueError("SET takes a cache, a key, a value and an optional time to live")
+        ttl = float(arguments[3]) if len(arguments) == 4 else None
+        self.__cache(arguments[0]).put_key_value(arguments[1], arguments[2], ttl)
+        return b"+OK\r\n"
+
+    def __set_many(self, arguments):
+        """Function to answer MSET cache key value [key value ...]"""
+        if len(arguments) < 3 or len(arguments) % 2 == 0:
+            raise ValueError("MSET takes a cache and key value pairs")
+        self.__cache(arguments[0]).put_many(zip(arguments[1::2], arguments[2::2]))
+        return b"+OK\r\n"
+
+    def __delete(self, arguments):
+        """Function to answer DEL cache key"""
+        if len(arguments) != 2:
+            raise ValueError("DEL takes a cache and a key")
+        return b":1\r\n" if self.__cache(arguments[0]).remove_key(arguments[1]) is not None else b":0\r\n"
+
+class CacheClient:
+    """Thread-safe client of a CacheServer keeping a pool of at most
+        pool_size connections; a call waits for an idle connection, or for a
+        failed one to free its place in the pool, when all of them are in use,
+        and a connection that fails is closed rather than returned to the pool.
+        Error replies are raised as CacheServerError.
+    """
+    def __init__(self, address, pool_size = 4, timeout = None):
+        if pool_size <= 0 or int(pool_size) != pool_size:
+            raise ValueError("Pool size must be positive")
+        self.address = address
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.idle_connections = [] # most recently returned last
+        self.connection_count = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __repr__(self):
+        return f"Cache Client of {self.address}: {self.connection_count} connections\n"
+
+    def execute(self, commands):
+        """Function to send several commands in one write over one connection
+            and read their replies
+
+            Args:
+                commands (list) - commands, each a list of a command name and
+                    its arguments
+
+            Returns:
+                list - reply to each command in order, as returned by
+                read_reply; error replies are raised once every reply is read
+        """
+        connection = self.__acquire()
+        try:
+            connection[0].sendall(b"".join(encode_command(command) for command in commands))
+            replies = [read_reply(connection[1]) for _ in commands]
+        except BaseException:
+            self.__discard(connection)
+            raise
+        self.__release(connection)
+        for reply in replies:
+            if isinstance(reply, CacheServerError):
+                raise reply
+        return replies
+
+    def pipeline(self):
+        """Function to start a batch of commands sent together
+
+            Args: None
+
+            Returns:
+                Pipeline
+        """
+        return Pipeline(self)
+
+    def ping(self):
+        """Function to check that the server answers
+
+            Args: None
+
+            Returns:
+                boolean - True
+        """
+        return self.execute([["PING"]])[0] == "PONG"
+
+    def get(self, cache, key):
+        """Function to retrieve the value of a key from a hosted cache
+
+            Args:
+                cache (str) - name of the cache
+                key (bytes, str or int) - key that is being queried
+
+            Returns:
+                bytes - value associated with key if it is present, otherwise
+                None
+        """
+        return self.execute([["GET", cache, key]])[0]
+
+    def get_many(self, cache, keys):
+        """Function to retrieve the values of several keys in one command
+
+            Args:
+                cache (str) - name of the cache
+                keys (iterable) - keys that are being queried
+
+            Returns:
+                list - value associated with each key in order, None for keys
+                that are not present in the cache
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        return self.execute([["MGET", cache, *keys]])[0]
+
+    def set(self, cache, key, value, ttl = None):
+        """Function to place a key and an associated value into a hosted cache
+
+            Args:
+                cache (str) - name of the cache
+                key (bytes, str or int) - key that is being placed
+                value (bytes, str or int) - value that is being placed
+                ttl (float) - optional time to live in seconds
+
+            Returns:
+                None
+        """
+        self.execute([["SET", cache, key, value] + ([ttl] if ttl is not None else [])])
+
+    def set_many(self, cache, items):
+        """Function to place several keys and associated values in one command
+
+            Args:
+                cache (str) - name of the cache
+                items (dict or iterable) - (key, value) pairs to place
+
+            Returns:
+                None
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        arguments = [argument for item in items for argument in item]
+        if arguments:
+            self.execute([["MSET", cache, *arguments]])
+
+    def delete(self, cache, key):
+        """Function to remove a key from a hosted cache
+
+            Args:
+                cache (str) - name of the cache
+                key (bytes, str or int) - key to remove
+
+            Returns:
+                boolean - whether the key was present
+        """
+        return self.execute([["DEL", cache, key]])[0] == 1
+
+    def close(self):
+        """Function to close the idle connections of the pool; connections in
+            use are closed when they are returned, and later calls raise
+            ValueError
+
+            Args: None
+
+            Returns:
+                None
+        """
+        with self.condition:
+            self.closed = True
+            idle_connections, self.idle_connections = self.idle_connections, []
+            self.condition.notify_all()
+        for connection in idle_connections:
+            self.__discard(connection)
+
+    def __acquire(self):
+        """Function to take an idle connection from the pool, opening a new one
+            if fewer than pool_size are open, or else waiting until a
+            connection is returned or closed
+
+            Args: None
+
+            Returns:
+                tuple - (socket, buffered reader over the socket)
+        """
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise ValueError("Client is closed")
+                if self.idle_connections:
+                    return self.idle_connections.pop()
+                if self.connection_count < self.pool_size:
+                    self.connection_count += 1
+                    break
+                self.condition.wait()
+        try:
+            if isinstance(self.address, str):
+                connection_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                connection_socket.settimeout(self.timeout)
+                connection_socket.connect(self.address)
+            else:
+                connection_socket = socket.create_connection(self.address, self.timeout)
+                connection_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except BaseException:
+            with self.condition:
+                self.connection_count -= 1
+                self.condition.notify()
+            raise
+        return connection_socket, connection_socket.makefile("rb")
+
+    def __release(self, connection):
+        """Function to return a connection to the pool, waking a waiting
+            call, or to close it if the client is closed
+
+            Args:
+                connection (tuple) - (socket, buffered reader)
+
+            Returns:
+                None
+        """
+        with self.condition:
+            if not self.closed:
+                self.idle_connections.append(connection)
+                self.condition.notify()
+                return
+        self.__discard(connection)
+
+    def __discard(self, connection):
+        """Function to close a connection instead of returning it to the pool,
+            waking a waiting call to open a new one in its place
+
+            Args:
+                connection (tuple) - (socket, buffered reader)
+
+            Returns:
+                None
+        """
+        connection[1].close()
+        connection[0].close()
+        with self.condition:
+            self.connection_count -= 1
+            self.condition.notify()
+
+class Pipeline:
+    """Batch of commands queued on a CacheClient and sent in one write by
+        execute; the queueing methods return the pipeline so calls can be
+        chained
+    """
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __len__(self):
+        return len(self.commands)
+
+    def get(self, cache, key):
+        """Function to queue a look up, as CacheClient.get"""
+        self.commands.append(["GET", cache, key])
+        return self
+
+    def get_many(self, cache, keys):
+        """Function to queue a multi-key look up, as CacheClient.get_many"""
+        self.commands.append(["MGET", cache, *keys])
+        return self
+
+    def set(self, cache, key, value, ttl = None):
+        """Function to queue a placement, as CacheClient.set"""
+        self.commands.append(["SET", cache, key, value] + ([ttl] if ttl is not None else []))
+        return self
+
+    def set_many(self, cache, items):
+        """Function to queue a multi-key placement, as CacheClient.set_many"""
+        if hasattr(items, "items"):
+            items = items.items()
+        self.commands.append(["MSET", cache, *(argument for item in items for argument in item)])
+        return self
+
+    def delete(self, cache, key):
+        """Function to queue a removal, as CacheClient.delete"""
+        self.commands.append(["DEL", cache, key])
+        return self
+
+    def execute(self):
+        """Function to send the queued commands and empty the pipeline
+
+            Args: None
+
+            Returns:
+                list - raw reply to each command in order: bytes or None for
+                GET, a list for MGET, "OK" for SET and MSET and 1 or 0 for DEL
+        """
+        commands, self.commands = self.commands, []
+        if not commands:
+            return []
+        return self.client.execute(commands)
+
+def parse_cache_option(option):
+    """Function to parse a --cache option of the form name:policy:capacity
+
+        Args:
+            option (str)
+
+        Returns:
+            tuple - (name, cache)
+    """
+    try:
+        name, policy, capacity = option.split(":")
+        return name, policy_cache_class(policy)(int(capacity))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected name:policy:capacity with policy one of: " + ", ".join(POLICIES))
+
+def main(argv = None):
+    """Function to run a cache server from the command line until interrupted
+
+        Args:
+            argv (list) - command line arguments, sys.argv[1:] by default
+
+        Returns:
+            None
+    """
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--cache", action = "append", type = parse_cache_option, required = True,
+        help = "cache to host as name:policy:capacity, may be repeated")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 6400)
+    parser.add_argument("--unix-socket", help = "listen on this unix socket path instead of TCP")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = CacheServer(dict(args.cache))
+        address = await server.start(args.unix_socket or (args.host, args.port))
+        print(f"Serving {', '.join(server.caches)} on {address}")
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import threading
+
+from Cache import Cache
+
+class ClockCache(Cache):
+    """Cache approximating LRU with the CLOCK (second chance) algorithm:
+        entries sit in a circular array of slots, a hit only sets the slot's
+        reference bit, and eviction sweeps a hand over the slots, clearing set
+        reference bits and evicting the first entry whose bit is already clear
+
+        Look ups take no lock and may run concurrently with each other and
+        with a writer; placing and removing entries are serialized by
+        self.write_lock. A writer reusing a slot stores the new key before the
+        new value, and a look up reads the value before checking that the slot
+        still holds its key, so it never returns the value of another key.
+    """
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.slot_keys = [None] * capacity
+        self.slot_values = [None] * capacity
+        self.reference_bits = bytearray(capacity)
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.hand = 0
+        self.write_lock = threading.Lock()
+
+    def __repr__(self):
+        lines = ["Clock Cache:", "Hand: " + str(self.hand)]
+        for key, slot in self.key_node_map.items():
+            lines.append(f"(key: {key}, value: {self.slot_values[slot]}, referenced: {self.reference_bits[slot]})")
+        return "\n".join(lines) + "\n\n"
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            setting its reference bit; takes no lock
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is None:
+            return None
+        value = self.slot_values[slot]
+        if self.slot_keys[slot] != key: # slot was reused after the look up
+            return None
+        self.reference_bits[slot] = 1
+        return value
+
+    def peek(self, key):
+        """Function to read the value associated with a key without setting
+            its reference bit; takes no lock
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                value associated with key if it is present, otherwise None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is None:
+            return None
+        value = self.slot_values[slot]
+        if self.slot_keys[slot] != key: # slot was reused after the look up
+            return None
+        return value
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache,
+            evicting the entry under the clock hand if the cache is at capacity
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                None
+        """
+        with self.write_lock:
+            slot = self.key_node_map.get(key)
+            if slot is not None:
+                self.slot_values[slot] = value
+                self.reference_bits[slot] = 1
+                return
+            if self.free_slots:
+                slot = self.free_slots.pop()
+                self.size += 1
+            else:
+                slot = self.__advance_hand()
+                del self.key_node_map[self.slot_keys[slot]]
+            self.slot_keys[slot] = key
+            self.slot_values[slot] = value
+            self.reference_bits[slot] = 0
+            self.key_node_map[key] = slot
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                tuple - the removed (key, value) pair if the key was present,
+                otherwise None
+        """
+        with self.write_lock:
+            slot = self.key_node_map.pop(key, None)
+            if slot is None:
+                return None
+            value = self.slot_values[slot]
+            self.slot_keys[slot] = None
+            self.slot_values[slot] = None
+            self.reference_bits[slot] = 0
+            self.free_slots.append(slot)
+            self.size -= 1
+            return key, value
+
+    def __advance_hand(self):
+        """Function to sweep the clock hand to the next slot whose reference
+            bit is clear, clearing the bits it passes, and move the hand past
+            it; it is assumed that every slot is occupied
+
+            Args: None
+
+            Returns:
+                int - slot of the entry to evict
+        """
+        reference_bits = self.reference_bits
+        hand = self.hand
+        while reference_bits[hand]:
+            reference_bits[hand] = 0
+            hand += 1
+            if hand == self.capacity:
+                hand = 0
+        self.hand = hand + 1 if hand + 1 < self.capacity else 0
+        return hand
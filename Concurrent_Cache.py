@@ -0,0 +1,239 @@
+import threading
+
+from Cache import CacheStats
+from LFU_Cache import LFUCache
+from LRU_Cache import LRUCache
+
+class ShardedCache:
+    """Thread-safe cache made of independent shards, each an ordinary cache
+        guarded by its own lock; keys are routed to a shard by hash, so LRU or
+        LFU ordering is maintained within each shard rather than globally
+    """
+    def __init__(self, cache_class, capacity = 10, shard_count = 8, **cache_options):
+        if capacity <= 0 or int(capacity) != capacity:
+            raise ValueError("Capacity must be positive")
+        if shard_count <= 0 or int(shard_count) != shard_count:
+            raise ValueError("Shard count must be positive")
+        if shard_count > capacity:
+            raise ValueError("Shard count must not exceed capacity")
+        self.capacity = capacity
+        self.shard_count = shard_count
+        shard_capacity, remainder = divmod(capacity, shard_count)
+        self.shards = [cache_class(shard_capacity + (1 if index < remainder else 0), **cache_options)
+            for index in range(shard_count)]
+        self.locks = [threading.Lock() for _ in range(shard_count)]
+
+    def __repr__(self):
+        parts = [type(self).__name__ + ":\n", "Capacity: " + str(self.capacity) + "\n",
+            "Size: " + str(self.size) + "\n"]
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                parts.append("Shard " + str(index) + ":\n" + str(shard) + "\n")
+        return "".join(parts)
+
+    @property
+    def size(self):
+        """Total number of entries over all shards"""
+        return sum(shard.size for shard in self.shards)
+
+    def get_size(self):
+        """Function to report the number of entries and their total weight
+            over all shards
+
+            Args: None
+
+            Returns:
+                tuple - (number of entries, total weight)
+        """
+        sizes = [shard.get_size() for shard in self.shards]
+        return sum(size for size, _ in sizes), sum(weight for _, weight in sizes)
+
+    def stats(self):
+        """Function to report the operation counts recorded by the shards,
+            which record them when created with record_stats
+
+            Args: None
+
+            Returns:
+                CacheStats - counts summed over all shards
+        """
+        totals = [0] * len(CacheStats._fields)
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                shard_stats = shard.stats()
+            totals = [total + count for total, count in zip(totals, shard_stats)]
+        return CacheStats(*totals)
+
+    def reset_stats(self):
+        """Function to set every shard's recorded operation counts back to zero
+
+            Args: None
+
+            Returns:
+                None
+        """
+        for index, shard in enumerate(self.shards):
+            with self.locks[index]:
+                shard.reset_stats()
+
+    def shard_index(self, key):
+        """Function to find the shard responsible for a key
+
+            Args:
+                key - hashable key
+
+            Returns:
+                int - index into self.shards and self.locks
+        """
+        return hash(key) % self.shard_count
+
+    def is_at_capacity(self):
+        """Function to check if every shard has reached its full capacity
+
+            Args: None
+
+            Returns:
+                boolean
+        """
+        return all(shard.is_at_capacity() for shard in self.shards)
+
+    def is_key_in_cache(self, key):
+        """Function to check if a key is present in the cache
+
+            Args:
+                key (int) - key that is being checked
+
+            Returns:
+                boolean
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].is_key_in_cache(key)
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            updating its shard to reflect its usage
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].get_value(key)
+
+    def peek(self, key):
+        """Function to read the value associated with a key without updating
+            its shard
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                value associated with key if it is present and not expired,
+                otherwise None
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].peek(key)
+
+    def put_key_value(self, key, value, ttl = None):
+        """Function to place a key and an associated value into the cache,
+            evicting from the key's shard if that shard is at capacity
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+                ttl (float) - optional time to live in seconds
+
+            Returns:
+                None
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            self.shards[index].put_key_value(key, value, ttl)
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                removed node if the key was present, otherwise None
+        """
+        index = self.shard_index(key)
+        with self.locks[index]:
+            return self.shards[index].remove_key(key)
+
+    def get_many(self, keys):
+        """Function to retrieve the values associated with several keys,
+            taking each shard's lock once for all of its keys
+
+            Args:
+                keys (iterable) - keys that are being queried
+
+            Returns:
+                list - value associated with each key in order, None for keys
+                that are not present in the cache
+        """
+        keys = list(keys)
+        values = [None] * len(keys)
+        for index, (positions, shard_keys) in self.__group_by_shard(keys).items():
+            with self.locks[index]:
+                shard_values = self.shards[index].get_many(shard_keys)
+            for position, value in zip(positions, shard_values):
+                values[position] = value
+        return values
+
+    def put_many(self, items):
+        """Function to place several keys and associated values into the cache,
+            taking each shard's lock once for all of its pairs
+
+            Args:
+                items (dict or iterable) - (key, value) pairs to place
+
+            Returns:
+                None
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        items = list(items)
+        for index, (_, shard_items) in self.__group_by_shard([key for key, _ in items], items).items():
+            with self.locks[index]:
+                self.shards[index].put_many(shard_items)
+
+    def __group_by_shard(self, keys, payloads = None):
+        """Function to group keys by the shard responsible for them, keeping
+            their relative order
+
+            Args:
+                keys (list) - keys to group
+                payloads (list) - optional objects to group in place of the keys
+
+            Returns:
+                dict - shard index to (positions, payloads) lists
+        """
+        if payloads is None:
+            payloads = keys
+        groups = dict()
+        for position, key in enumerate(keys):
+            index = self.shard_index(key)
+            if index not in groups:
+                groups[index] = ([], [])
+            groups[index][0].append(position)
+            groups[index][1].append(payloads[position])
+        return groups
+
+class ConcurrentLRUCache(ShardedCache):
+    """Thread-safe LRU cache striped over independent LRUCache shards"""
+    def __init__(self, capacity = 10, shard_count = 8, **cache_options):
+        super().__init__(LRUCache, capacity, shard_count, **cache_options)
+
+class ConcurrentLFUCache(ShardedCache):
+    """Thread-safe LFU cache striped over independent LFUCache shards"""
+    def __init__(self, capacity = 10, shard_count = 8, **cache_options):
+        super().__init__(LFUCache, capacity, shard_count, **cache_options)
@@ -1,13 +1,60 @@
-from SubLRUCache import SubLRUCache
 from CacheNode import CacheNode
 
 class LFUNode(CacheNode):
-    def __init__(self, key, capacity, prev = None, next = None):
+    """Frequency node of an LFU cache; its entries form a circular doubly
+        linked list threaded through the entry nodes themselves, with
+        entry_head as the list's sentinel, the most recently used entry after
+        it and the least recently used entry before it
+    """
+    __slots__ = ("size", "entry_head")
+
+    def __init__(self, key, prev = None, next = None):
         super().__init__(key, prev, next)
-        self.frequency_cache = SubLRUCache(capacity, key)
+        self.size = 0
+        self.entry_head = CacheNode(None)
+        self.entry_head.prev = self.entry_head
+        self.entry_head.next = self.entry_head
 
     def __repr__(self):
-        res = "Frequency: " + str(self.key) + "\n"
-        res += "Sub LRU Cache:\n"
-        res += str(self.frequency_cache)
-        return res
+        lines = ["Frequency: " + str(self.key), "Entries:"]
+        curr_node = self.entry_head.next
+        while curr_node is not self.entry_head:
+            lines.append(str(curr_node))
+            curr_node = curr_node.next
+        return "\n".join(lines) + "\n"
+
+    def add_entry(self, entry_node):
+        """Function to add an entry as the most recently used one of this
+            frequency
+
+            Args:
+                entry_node (LRUNode) - unlinked entry node
+
+            Returns:
+                None
+        """
+        entry_node.add_node_after(self.entry_head)
+        self.size += 1
+
+    def remove_entry(self, entry_node):
+        """Function to remove one of this frequency's entries
+
+            Args:
+                entry_node (LRUNode) - entry node linked into this frequency
+
+            Returns:
+                LRUNode - the removed entry node
+        """
+        self.size -= 1
+        return entry_node.remove_node()
+
+    def least_recent_entry(self):
+        """Function to find the least recently used entry of this frequency;
+            it is assumed that the frequency has at least one entry
+
+            Args: None
+
+            Returns:
+                LRUNode
+        """
+        return self.entry_head.prev
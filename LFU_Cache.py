@@ -1,26 +1,66 @@
+import time
+
 from Cache import Cache
+from CacheNode import CacheNode
 from LFUNode import LFUNode
 from LRUNode import LRUNode
+from Snapshot import read_snapshot, snapshot_size, write_snapshot
+
+FREQUENCY_NODE_POOL_SIZE = 16
+DEFAULT_DECAY_STEP = 4
 
 class LFUCache(Cache):
-    def __init__(self, capacity):
-        super().__init__(capacity)
-        self.head = LFUNode(0, capacity)
-        self.tail = LFUNode(0, capacity)
+    """Cache evicting the least frequently used entry, and the least recently
+        used one among entries of equal frequency
+
+        With decay_interval, every frequency is halved after each
+        decay_interval look ups and placements; with decay_period, after each
+        decay_period seconds of the cache's clock. A halving is spread over the
+        following operations: a cursor walks the frequency nodes from the
+        lowest, relabelling each with its halved frequency, or moving its
+        entries into the node before it once that node's frequency is at least
+        as high, and each operation does at most decay_step steps of this work,
+        each relabelling one node or moving one entry; get_many and put_many do
+        the work of all their operations at their end. Merged entries keep
+        their recency order and count as more recently used than the entries of
+        the node they join. If further halvings fall due before the walk ends,
+        the next walk applies them all at once.
+    """
+    def __init__(self, capacity, weigher = None, default_ttl = None, clock = time.monotonic,
+            record_stats = False, on_evict = None, on_miss = None, decay_interval = None,
+            decay_period = None, decay_step = DEFAULT_DECAY_STEP):
+        if decay_interval is not None and (decay_interval <= 0 or int(decay_interval) != decay_interval):
+            raise ValueError("Decay interval must be positive")
+        if decay_period is not None and decay_period <= 0:
+            raise ValueError("Decay period must be positive")
+        if decay_step <= 0 or int(decay_step) != decay_step:
+            raise ValueError("Decay step must be positive")
+        super().__init__(capacity, weigher, default_ttl, clock, record_stats, on_evict, on_miss)
+        self.head = CacheNode(0)
+        self.tail = CacheNode(0)
         self.tail.add_node_after(self.head)
         self.key_to_frequency_node = dict()
+        self.free_frequency_nodes = []
+        self.decay_interval = decay_interval
+        self.decay_period = decay_period
+        self.decay_step = decay_step
+        self.aging = decay_interval is not None or decay_period is not None
+        self.operations_since_decay = 0
+        self.next_decay_at = None if decay_period is None else clock() + decay_period
+        self.pending_decay_shift = 0 # halvings due but not yet started
+        self.decay_shift = 0 # halvings applied by the walk in progress
+        self.decay_cursor = None # next frequency node of the walk in progress
 
     def __repr__(self):
-        res = "LFU Cache:\n"
-        res += "----------\n"
-        res += "Capacity: " + str(self.capacity) + "\n"
-        res += "Size: " + str(self.size) + "\n"
-        res += "Key-Node-Map: " + str(self.key_node_map) + "\n\n"
+        parts = ["LFU Cache:\n", "----------\n"]
+        parts.append("Capacity: " + str(self.capacity) + "\n")
+        parts.append("Size: " + str(self.size) + "\n")
+        parts.append("Key-Node-Map: " + str(self.key_node_map) + "\n\n")
         curr_node = self.head.next
-        while curr_node != self.tail:
-            res += str(curr_node) + "\n\n"
+        while curr_node is not self.tail:
+            parts.append(str(curr_node) + "\n\n")
             curr_node = curr_node.next
-        return res
+        return "".join(parts)
 
     def get_value(self, key):
         """Function to retrieve value associated with a key if it exists,
@@ -35,20 +75,157 @@ class LFUCache(Cache):
                 is updated
         """
         if self.is_key_in_cache(key):
-            entry_node, frequency_node = self.__remove_key(key)
+            if self.counters is not None:
+                self.counters.hits += 1
+            self.modification_count += 1
+            entry_node = self.key_node_map[key]
+            frequency_node = self.key_to_frequency_node[key]
             if frequency_node.next.key != frequency_node.key + 1:
+                if frequency_node.size == 1: # sole entry of its frequency, so the node itself moves up
+                    frequency_node.key += 1
+                    if self.aging:
+                        self.__age(1)
+                    return entry_node.value
                 self.__create_frequency_node_after(frequency_node)
             new_frequency_node = frequency_node.next
+            frequency_node.remove_entry(entry_node)
             self.__add_entry_to_frequency_node(entry_node, new_frequency_node)
-            if frequency_node.frequency_cache.size == 0:
+            if frequency_node.size == 0:
                 self.__remove_frequency_node(frequency_node)
-            self.key_to_frequency_node[key] = new_frequency_node
+            if self.aging:
+                self.__age(1)
             return entry_node.value
         else:
+            if self.counters is not None:
+                self.counters.misses += 1
+            if self.on_miss is not None:
+                self.on_miss(key)
+            if self.aging:
+                self.__age(1)
             return None
 
+    def get_many(self, keys):
+        """Function to retrieve the values associated with several keys in one
+            call, with the same result and final frequency structure as calling
+            get_value on each key in turn; frequency nodes emptied during the
+            call are kept until its end so that each frequency node needed by
+            the batch is allocated at most once
+
+            Args:
+                keys (iterable) - keys that are being queried
+
+            Returns:
+                list - value associated with each key in order, None for keys
+                that are not present in the cache
+        """
+        if self.expiry_heap:
+            self.reap_expired()
+        self.modification_count += 1
+        values = []
+        misses = 0
+        emptied_frequency_nodes = []
+        for key in keys:
+            if key in self.key_node_map:
+                entry_node = self.__promote_entry(key, emptied_frequency_nodes)
+                values.append(entry_node.value)
+            else:
+                values.append(None)
+                misses += 1
+                if self.on_miss is not None:
+                    self.on_miss(key)
+        self.__remove_empty_frequency_nodes(emptied_frequency_nodes)
+        if self.counters is not None:
+            self.counters.hits += len(values) - misses
+            self.counters.misses += misses
+        if self.aging and values:
+            self.__age(len(values))
+        return values
+
+    def put_many(self, items):
+        """Function to place several keys and associated values into the cache
+            in one call, with the same final state as calling put_key_value on
+            each pair in turn; as in get_many, emptied frequency nodes are only
+            removed at the end of the call unless an eviction needs them gone
+
+            Args:
+                items (dict or iterable) - (key, value) pairs to place
+
+            Returns:
+                None
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        if self.weigher is not None or self.default_ttl is not None or self.expiry_heap:
+            for key, value in items:
+                self.put_key_value(key, value)
+            return
+        self.modification_count += 1
+        emptied_frequency_nodes = []
+        updates = 0
+        placed = 0
+        for key, value in items:
+            placed += 1
+            if key in self.key_node_map:
+                entry_node = self.__promote_entry(key, emptied_frequency_nodes)
+                entry_node.value = value
+                updates += 1
+                continue
+            if self.is_at_capacity():
+                while self.head.next.size == 0:
+                    self.__remove_frequency_node(self.head.next)
+                self.__add_new_entry(key, value, self.__evict_least_frequent_entry())
+            else:
+                self.__add_new_entry(key, value)
+        self.__remove_empty_frequency_nodes(emptied_frequency_nodes)
+        if self.counters is not None:
+            self.counters.updates += updates
+        if self.aging and placed:
+            self.__age(placed)
+
+    def __promote_entry(self, key, emptied_frequency_nodes):
+        """Function to move the entry for a key present in the cache to the
+            frequency node one above its current one, recording rather than
+            removing its old frequency node if that becomes empty
+
+            Args:
+                key (int) - key to promote
+                emptied_frequency_nodes (list) - collects emptied frequency nodes
+
+            Returns:
+                LRUNode - the promoted entry node
+        """
+        entry_node = self.key_node_map[key]
+        frequency_node = self.key_to_frequency_node[key]
+        if frequency_node.next.key != frequency_node.key + 1:
+            if frequency_node.size == 1: # sole entry of its frequency, so the node itself moves up
+                frequency_node.key += 1
+                return entry_node
+            self.__create_frequency_node_after(frequency_node)
+        frequency_node.remove_entry(entry_node)
+        self.__add_entry_to_frequency_node(entry_node, frequency_node.next)
+        if frequency_node.size == 0:
+            emptied_frequency_nodes.append(frequency_node)
+        return entry_node
+
+    def __remove_empty_frequency_nodes(self, frequency_nodes):
+        """Function to remove those of the given frequency nodes which are
+            still linked into the cache and have no entries
+
+            Args:
+                frequency_nodes (list) - candidate frequency nodes (LFUNode)
+
+            Returns:
+                None
+        """
+        for frequency_node in frequency_nodes:
+            if frequency_node.prev is not None and frequency_node.size == 0:
+                self.__remove_frequency_node(frequency_node)
+
     def __remove_frequency_node(self, frequency_node):
-        """Function to remove an existent frequency_node from the cache
+        """Function to remove an existent frequency_node from the cache,
+            keeping it for reuse by __new_frequency_node if fewer than
+            FREQUENCY_NODE_POOL_SIZE nodes are kept already; if it is the
+            cursor of a frequency decay walk, the cursor moves to the next node
 
             Args:
                 frequency_node (LFUNode) - node to remove
@@ -56,73 +233,181 @@ class LFUCache(Cache):
             Returns:
                 None
         """
+        if frequency_node is self.decay_cursor:
+            self.decay_cursor = None if frequency_node.next is self.tail else frequency_node.next
         frequency_node.remove_node()
+        if len(self.free_frequency_nodes) < FREQUENCY_NODE_POOL_SIZE:
+            self.free_frequency_nodes.append(frequency_node)
+        if self.counters is not None:
+            self.counters.frequency_nodes_removed += 1
 
-    def put_key_value(self, key, value):
+    def put_key_value(self, key, value, ttl = None):
         """Function to place a key and an associated value into the cache,
             updating frequency to reflect its placement
 
             Args:
                 key (int) - key that is being placed
                 value (int) - value that is being placed
+                ttl (float) - optional time to live in seconds, overriding the
+                    cache's default time to live
 
             Returns:
                 None; cache is updated to mark the (key, value) pair with its
                 new frequency
         """
-        if self.is_key_in_cache(key):
-            entry_node, entry_frequency_node = self.__remove_key(key)
+        self.modification_count += 1
+        if self.weigher is not None:
+            entry_node = self.__put_weighted(key, value)
+        elif self.is_key_in_cache(key):
+            emptied_frequency_nodes = []
+            entry_node = self.__promote_entry(key, emptied_frequency_nodes)
             entry_node.value = value
-            if entry_frequency_node.next.key != entry_frequency_node.key + 1:
-                self.__create_frequency_node_after(entry_frequency_node)
-            self.key_to_frequency_node[entry_node.key] = entry_frequency_node.next
-            self.__add_entry_to_frequency_node(entry_node, entry_frequency_node.next)
-            if entry_frequency_node.frequency_cache.size == 0: # if frequency group now empty, remove it
-                self.__remove_frequency_node(entry_frequency_node)
+            self.__remove_empty_frequency_nodes(emptied_frequency_nodes) # if frequency group now empty, remove it
+            if self.counters is not None:
+                self.counters.updates += 1
         elif self.is_at_capacity():
-            self.__evict_least_frequent_entry()
-            self.__add_new_entry(key, value)
+            entry_node = self.__add_new_entry(key, value, self.__evict_least_frequent_entry())
         else:
-            self.__add_new_entry(key, value)
+            entry_node = self.__add_new_entry(key, value)
+        if ttl is not None or self.default_ttl is not None or entry_node.expires_at is not None:
+            self.set_expiry(entry_node, ttl)
+        if self.aging:
+            self.__age(1)
 
-    def __add_entry_to_frequency_node(self, entry_node, frequency_node):
-        """Given an LRUCache node entry_node and a frequency_node, insert
-            entry_node into frequency_node's LRU cache
+    def __age(self, operations):
+        """Function to count operations towards the next frequency halving and
+            do this many operations' share of the frequency decay walk,
+            starting a walk if halvings are due and none is in progress
 
             Args:
-                entry_node (LRUNode) - node to be entered into cache
-                frequency_node (LFUNode) - frequency node at which to add LRUNode
+                operations (int) - number of look ups and placements made
 
             Returns:
                 None
         """
-        y = frequency_node.frequency_cache
-        if y.size == y.capacity:
-            raise ValueError("Frequency (LRU) cache is already at capacity!")
-        self.key_to_frequency_node[entry_node.key] = frequency_node
-        y.size += 1
-        entry_node.add_node_after(y.head)
-        y.key_node_map[entry_node.key] = entry_node
+        if self.decay_interval is not None:
+            self.operations_since_decay += operations
+            if self.operations_since_decay >= self.decay_interval:
+                self.pending_decay_shift += self.operations_since_decay // self.decay_interval
+                self.operations_since_decay %= self.decay_interval
+        if self.decay_period is not None:
+            now = self.clock()
+            if now >= self.next_decay_at:
+                periods = int((now - self.next_decay_at) // self.decay_period) + 1
+                self.pending_decay_shift += periods
+                self.next_decay_at += periods * self.decay_period
+        if self.decay_cursor is None:
+            if self.pending_decay_shift == 0 or self.size == 0:
+                return
+            self.decay_shift, self.pending_decay_shift = self.pending_decay_shift, 0
+            self.decay_cursor = self.head.next
+        self.__decay_frequencies(self.decay_step * operations)
 
-    def __remove_key(self, key):
-        """Function to remove the node corresponding to a specific key from the
-            cache; it is assumed that the key is present in the cache
+    def __decay_frequencies(self, work):
+        """Function to continue the frequency decay walk from its cursor for at
+            most the given number of steps, relabelling a frequency node with
+            its halved frequency if that stays above the frequency of the node
+            before it, and otherwise moving its least recently used entries to
+            the end of that node, removing it once it is empty
+
+            Args:
+                work (int) - number of nodes to relabel plus entries to move
+
+            Returns:
+                None
+        """
+        self.modification_count += 1
+        frequency_node = self.decay_cursor
+        while work > 0 and frequency_node is not self.tail:
+            decayed_frequency = max(1, frequency_node.key >> self.decay_shift)
+            previous_node = frequency_node.prev
+            work -= 1
+            if decayed_frequency > previous_node.key:
+                frequency_node.key = decayed_frequency
+                frequency_node = frequency_node.next
+                continue
+            while True:
+                entry_node = frequency_node.remove_entry(frequency_node.least_recent_entry())
+                self.__add_entry_to_frequency_node(entry_node, previous_node)
+                if frequency_node.size == 0 or work == 0:
+                    break
+                work -= 1
+            if frequency_node.size == 0:
+                next_node = frequency_node.next
+                self.__remove_frequency_node(frequency_node)
+                frequency_node = next_node
+        self.decay_cursor = None if frequency_node is self.tail else frequency_node
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache; if the LFU
+            group corresponding to its frequency becomes empty, it is removed
+            from the cache
 
             Args:
                 key (int) - key to remove
 
             Returns:
-                entry_node (LRUNode) - corresponds to key removed
-                entry_frequency_node (LFUNode) - frequency node containing key removed
+                LRUNode - the removed node if the key was present, otherwise None
         """
-        entry_node = self.key_node_map[key]
-        entry_frequency_node = self.key_to_frequency_node[key]
+        if key not in self.key_node_map:
+            return None
+        self.modification_count += 1
+        entry_node = self.key_node_map.pop(key)
+        entry_frequency_node = self.key_to_frequency_node.pop(key)
+        entry_frequency_node.remove_entry(entry_node)
+        self.size -= 1
+        if self.weigher is not None:
+            self.weight -= entry_node.weight
+        if entry_frequency_node.size == 0: # if frequency group now empty, remove it
+            self.__remove_frequency_node(entry_frequency_node)
+        return entry_node
 
-        entry_node.remove_node()
-        self.key_to_frequency_node[key].frequency_cache.size -= 1
-        del self.key_to_frequency_node[key].frequency_cache.key_node_map[key]
-        del self.key_to_frequency_node[key]
-        return entry_node, entry_frequency_node
+    def __put_weighted(self, key, value):
+        """Same functionality as put_key_value for a cache with a weigher,
+            evicting least frequently used entries until the total weight fits
+            within the capacity; the entry being placed is never evicted
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                LRUNode - the node of the placed entry
+        """
+        weight = self.weigh(value)
+        if self.is_key_in_cache(key):
+            emptied_frequency_nodes = []
+            entry_node = self.__promote_entry(key, emptied_frequency_nodes)
+            self.__remove_empty_frequency_nodes(emptied_frequency_nodes)
+            entry_node.value = value
+            self.weight += weight - entry_node.weight
+            entry_node.weight = weight
+            if self.counters is not None:
+                self.counters.updates += 1
+            while self.weight > self.capacity:
+                self.__evict_least_frequent_entry(entry_node)
+        else:
+            evicted_node = None
+            while self.weight + weight > self.capacity:
+                evicted_node = self.__evict_least_frequent_entry()
+            entry_node = self.__add_new_entry(key, value, evicted_node)
+            entry_node.weight = weight
+            self.weight += weight
+        return entry_node
+
+    def __add_entry_to_frequency_node(self, entry_node, frequency_node):
+        """Given an entry node and a frequency_node, insert entry_node as the
+            most recently used entry of frequency_node
+
+            Args:
+                entry_node (LRUNode) - node to be entered into cache
+                frequency_node (LFUNode) - frequency node at which to add LRUNode
+
+            Returns:
+                None
+        """
+        self.key_to_frequency_node[entry_node.key] = frequency_node
+        frequency_node.add_entry(entry_node)
 
     def __create_frequency_node_after(self, frequency_node):
         """Function to create a new top-level frequency node which has frequency
@@ -137,48 +422,225 @@ class LFUCache(Cache):
                 None
         """
         current_frequency = frequency_node.key
-        new_entry = LFUNode(current_frequency+1, self.capacity)
-        # self.key_to_frequency_node[current_frequency+1] = new_entry
+        new_entry = self.__new_frequency_node(current_frequency+1)
         new_entry.add_node_after(frequency_node)
+        if self.counters is not None:
+            self.counters.frequency_nodes_created += 1
 
-    def __add_new_entry(self, key, value):
+    def __new_frequency_node(self, frequency):
+        """Function to get an unlinked frequency node for a frequency, reusing
+            a removed one if any is kept
+
+            Args:
+                frequency (int)
+
+            Returns:
+                LFUNode - node without entries
+        """
+        if self.free_frequency_nodes:
+            frequency_node = self.free_frequency_nodes.pop()
+            frequency_node.key = frequency
+            return frequency_node
+        return LFUNode(frequency)
+
+    def __add_new_entry(self, key, value, evicted_node = None):
         """Function to add a new (key, value) pair to the cache; it is assumed
             that the cache is not at full capacity
 
             Args:
                 key (int)
                 value (int)
+                evicted_node (LRUNode) - optional node just evicted, reused for
+                    the new entry instead of allocating one
 
             Returns:
                 LRUNode - the LRUNode corresponding to the created entry
         """
         if not self.__has_frequency_one():
-            frequency_one = LFUNode(1, self.capacity)
+            frequency_one = self.__new_frequency_node(1)
             frequency_one.add_node_after(self.head)
+            if self.counters is not None:
+                self.counters.frequency_nodes_created += 1
         self.size += 1
-        self.key_node_map[key] = self.head.next.frequency_cache.put_key_value_internally(key, value)
-        self.key_to_frequency_node[key] = self.head.next
-        return self.key_node_map[key]
+        entry_node = LRUNode(key, value) if evicted_node is None else evicted_node.reuse(key, value)
+        self.key_node_map[key] = entry_node
+        self.__add_entry_to_frequency_node(entry_node, self.head.next)
+        if self.counters is not None:
+            self.counters.inserts += 1
+        return entry_node
+
+    def save_snapshot(self, path):
+        """Function to write the entries of the cache to a snapshot file with
+            their frequencies, in the order in which they would be evicted;
+            time to live is not saved
+
+            Args:
+                path (str) - path of the snapshot file, replaced if it exists
+
+            Returns:
+                int - number of entries written
+        """
+        return write_snapshot(path, self.__snapshot_records())
+
+    def load_snapshot(self, path):
+        """Function to fill an empty cache from a snapshot file in a single
+            pass, restoring the frequency and recency order of the entries; if
+            the snapshot holds more than fits, the entries that would be
+            evicted first are left out, and restored entries get the cache's
+            default time to live
+
+            Args:
+                path (str) - path of a snapshot file written by save_snapshot
+
+            Returns:
+                int - number of entries restored
+        """
+        if self.size != 0:
+            raise ValueError("Snapshot can only be loaded into an empty cache")
+        self.modification_count += 1
+        skip = 0 if self.weigher is not None else max(0, snapshot_size(path) - self.capacity)
+        for key, value, frequency in read_snapshot(path, skip):
+            frequency_node = self.tail.prev
+            if frequency_node.key != frequency:
+                if frequency < frequency_node.key or frequency < 1:
+                    raise ValueError("Snapshot entries are not ordered by frequency")
+                frequency_node = self.__new_frequency_node(frequency)
+                frequency_node.add_node_after(self.tail.prev)
+            entry_node = LRUNode(key, value)
+            if self.weigher is not None:
+                entry_node.weight = self.weigh(value)
+                self.weight += entry_node.weight
+            self.size += 1
+            self.key_node_map[key] = entry_node
+            self.__add_entry_to_frequency_node(entry_node, frequency_node)
+            if self.default_ttl is not None:
+                self.set_expiry(entry_node, None)
+        while self.weight > self.capacity:
+            self.__evict_least_frequent_entry()
+        return self.size
+
+    def __snapshot_records(self):
+        """Function to list the entries of the cache for a snapshot
+
+            Args: None
 
-    def __evict_least_frequent_entry(self):
+            Returns:
+                generator - (key, value, frequency) triples by increasing
+                frequency, and from the least to the most recently used entry
+                within a frequency
+        """
+        frequency_node = self.head.next
+        while frequency_node is not self.tail:
+            curr_node = frequency_node.least_recent_entry()
+            while curr_node is not frequency_node.entry_head:
+                yield curr_node.key, curr_node.value, frequency_node.key
+                curr_node = curr_node.prev
+            frequency_node = frequency_node.next
+
+    def items(self):
+        """Function to stream the (key, value) pairs of the cache in the order
+            of eviction, by increasing frequency and from the least to the most
+            recently used entry within a frequency
+
+            Args: None
+
+            Returns:
+                generator - (key, value) pairs
+        """
+        for key, value, _ in self.iter_by_frequency():
+            yield key, value
+
+    def keys(self):
+        """Function to stream the keys of the cache in the order of eviction
+
+            Args: None
+
+            Returns:
+                generator - keys
+        """
+        for key, _, _ in self.iter_by_frequency():
+            yield key
+
+    def iter_by_frequency(self, min_freq = 1, reverse = False):
+        """Function to stream the entries of the cache by walking the
+            frequency nodes and their entries, without copying them or changing
+            any frequency; expired entries that are not reaped yet are skipped
+
+            Args:
+                min_freq (int) - lowest frequency of the entries to stream
+                reverse (boolean) - whether to start from the most frequently
+                    and, within a frequency, most recently used entry rather
+                    than from the next one to be evicted
+
+            Returns:
+                generator - (key, value, frequency) triples; raises
+                RuntimeError if the cache is changed during the iteration
+        """
+        expected_count = self.modification_count
+        now = self.clock() if self.expiry_heap else None
+        frequency_node = self.tail.prev if reverse else self.head.next
+        end_node = self.head if reverse else self.tail
+        while frequency_node is not end_node:
+            frequency = frequency_node.key
+            if frequency < min_freq:
+                if reverse:
+                    return
+                frequency_node = frequency_node.next
+                continue
+            entry_head = frequency_node.entry_head
+            curr_node = entry_head.next if reverse else entry_head.prev
+            while curr_node is not entry_head:
+                if now is None or curr_node.expires_at is None or curr_node.expires_at > now:
+                    yield curr_node.key, curr_node.value, frequency
+                    if self.modification_count != expected_count:
+                        raise RuntimeError("Cache changed during iteration")
+                curr_node = curr_node.next if reverse else curr_node.prev
+            frequency_node = frequency_node.prev if reverse else frequency_node.next
+
+    def get_eviction_candidate(self):
+        """Function to find the entry that the next eviction would remove,
+            without changing the cache
+
+            Args: None
+
+            Returns:
+                LRUNode - the least recently used node among the least
+                frequently used ones, or None if the cache is empty
+        """
+        if self.size == 0:
+            return None
+        return self.head.next.least_recent_entry()
+
+    def __evict_least_frequent_entry(self, protected_node = None):
         """Function to remove the least frequently used entry of the cache;
             if there is a tie by frequency for least used, the least recently
             used entry is removed; if the LFU group corresponding to the
             frequency becomes empty, it is removed from the cache; it is assumed
             that the cache is non-empty at the start of this method
 
-            Args: None
+            Args:
+                protected_node (LRUNode) - optional entry that must not be
+                    evicted; it is assumed not to be the only entry
 
             Returns:
                 LRUNode - the LRUNode corresponding to the removed entry
         """
-        least_frequent_group = self.head.next.frequency_cache
+        least_frequent_node = self.head.next
+        if protected_node is not None and least_frequent_node.least_recent_entry() is protected_node:
+            least_frequent_node = least_frequent_node.next
+        removed_node = least_frequent_node.remove_entry(least_frequent_node.least_recent_entry())
         self.size -= 1
-        removed_node = least_frequent_group.evict_LRU_entry()
+        self.modification_count += 1
+        if self.weigher is not None:
+            self.weight -= removed_node.weight
         del self.key_node_map[removed_node.key] # remove from self.key_node_map
         del self.key_to_frequency_node[removed_node.key] # remove from self.key_to_frequency_node
-        if least_frequent_group.size == 0: # if frequency group now empty, remove it
-            self.__remove_frequency_node(self.head.next)
+        if least_frequent_node.size == 0: # if frequency group now empty, remove it
+            self.__remove_frequency_node(least_frequent_node)
+        if self.counters is not None:
+            self.counters.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(removed_node.key, removed_node.value)
         return removed_node
 
     def __has_frequency_one(self):
@@ -1,9 +1,30 @@
 from CacheNode import CacheNode
 
 class LRUNode(CacheNode):
+    __slots__ = ("value", "weight", "expires_at")
+
     def __init__(self, key, value, prev = None, next = None):
         super().__init__(key, prev, next)
         self.value = value
+        self.weight = 1
+        self.expires_at = None
 
     def __repr__(self):
         return f"(key: {self.key}, value: {self.value})"
+
+    def reuse(self, key, value):
+        """Function to turn an unlinked node, such as one just evicted, into
+            the node of a new entry instead of allocating another
+
+            Args:
+                key (int) - key of the new entry
+                value (int) - value of the new entry
+
+            Returns:
+                LRUNode - this node
+        """
+        self.key = key
+        self.value = value
+        self.weight = 1
+        self.expires_at = None
+        return self
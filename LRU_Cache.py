@@ -1,21 +1,25 @@
+import time
+
 from Cache import Cache
+from CacheNode import CacheNode
 from LRUNode import LRUNode
+from Snapshot import read_snapshot, snapshot_size, write_snapshot
 
 class LRUCache(Cache):
-    def __init__(self, capacity):
-        super().__init__(capacity)
-        self.head = LRUNode(0, 0)
-        self.tail = LRUNode(0, 0)
+    def __init__(self, capacity, weigher = None, default_ttl = None, clock = time.monotonic,
+            record_stats = False, on_evict = None, on_miss = None):
+        super().__init__(capacity, weigher, default_ttl, clock, record_stats, on_evict, on_miss)
+        self.head = CacheNode(None)
+        self.tail = CacheNode(None)
         self.tail.add_node_after(self.head)
 
     def __repr__(self):
-        res = "Nodes:\n"
+        lines = ["Nodes:"]
         curr_node = self.head.next
-        while curr_node != self.tail:
-            res += str(curr_node) + "\n"
+        while curr_node is not self.tail:
+            lines.append(str(curr_node))
             curr_node = curr_node.next
-        res += "\n"
-        return res
+        return "\n".join(lines) + "\n\n"
 
     def get_value(self, key):
         """Function to retrieve value associated with a key if it exists,
@@ -32,45 +36,283 @@ class LRUCache(Cache):
         if self.is_key_in_cache(key):
             matching_node = self.key_node_map[key]
             self.__mark_as_most_recent(matching_node)
+            self.modification_count += 1
+            if self.counters is not None:
+                self.counters.hits += 1
             return matching_node.value
         else:
+            if self.counters is not None:
+                self.counters.misses += 1
+            if self.on_miss is not None:
+                self.on_miss(key)
             return None
 
-    def put_key_value(self, key, value):
+    def put_key_value(self, key, value, ttl = None):
         """Function to place a key and an associated value into the cache,
             updating to reflect its recent placement
 
             Args:
                 key (int) - key that is being placed
                 value (int) - value that is being placed
+                ttl (float) - optional time to live in seconds, overriding the
+                    cache's default time to live
 
             Returns:
                 None
         """
-        self.put_key_value_internally(key, value)
+        self.put_key_value_internally(key, value, ttl)
+
+    def get_many(self, keys):
+        """Function to retrieve the values associated with several keys in one
+            call, with the same result and final recency order as calling
+            get_value on each key in turn
+
+            Args:
+                keys (iterable) - keys that are being queried
 
-    def put_key_value_internally(self, key, value):
-        """Same functionality as put_key_value but the resulting node is not
+            Returns:
+                list - value associated with each key in order, None for keys
+                that are not present in the cache
+        """
+        if self.expiry_heap:
+            self.reap_expired()
+        self.modification_count += 1
+        key_node_map = self.key_node_map
+        head = self.head
+        on_miss = self.on_miss
+        values = []
+        misses = 0
+        for key in keys:
+            matching_node = key_node_map.get(key)
+            if matching_node is None:
+                values.append(None)
+                misses += 1
+                if on_miss is not None:
+                    on_miss(key)
+                continue
+            if matching_node.prev is not head:
+                matching_node.remove_node()
+                matching_node.add_node_after(head)
+            values.append(matching_node.value)
+        if self.counters is not None:
+            self.counters.hits += len(values) - misses
+            self.counters.misses += misses
+        return values
+
+    def put_many(self, items):
+        """Function to place several keys and associated values into the cache
+            in one call, with the same final state as calling put_key_value on
+            each pair in turn
+
+            Args:
+                items (dict or iterable) - (key, value) pairs to place
+
+            Returns:
+                None
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        if self.weigher is not None or self.default_ttl is not None or self.expiry_heap:
+            for key, value in items:
+                self.put_key_value_internally(key, value)
+            return
+        self.modification_count += 1
+        key_node_map = self.key_node_map
+        head = self.head
+        placed = updates = 0
+        for key, value in items:
+            placed += 1
+            matching_node = key_node_map.get(key)
+            if matching_node is not None:
+                updates += 1
+                matching_node.value = value
+                if matching_node.prev is not head:
+                    matching_node.remove_node()
+                    matching_node.add_node_after(head)
+                continue
+            if self.size == self.capacity:
+                matching_node = self.evict_LRU_entry().reuse(key, value)
+            else:
+                matching_node = LRUNode(key, value)
+            self.size += 1
+            matching_node.add_node_after(head)
+            key_node_map[key] = matching_node
+        if self.counters is not None:
+            self.counters.inserts += placed - updates
+            self.counters.updates += updates
+
+    def put_key_value_internally(self, key, value, ttl = None):
+        """Same functionality as put_key_value but the resulting node is
             returned
 
             Args:
                 key (int) - key that is being placed
                 value (int) - value that is being placed
+                ttl (float) - optional time to live in seconds
 
             Returns:
                 updated node; cache is updated to mark the (key, value) pair as
                 the most recently queried
         """
-        if self.is_key_in_cache(key):
-            self.key_node_map[key].value = value
-            self.__mark_as_most_recent(self.key_node_map[key])
+        self.modification_count += 1
+        if self.weigher is not None:
+            entry_node = self.__put_weighted(key, value)
+        elif self.is_key_in_cache(key):
+            entry_node = self.key_node_map[key]
+            entry_node.value = value
+            self.__mark_as_most_recent(entry_node)
+            if self.counters is not None:
+                self.counters.updates += 1
         else:
             if self.is_at_capacity():
-                self.evict_LRU_entry()
+                entry_node = self.evict_LRU_entry().reuse(key, value)
+            else:
+                entry_node = LRUNode(key, value)
             self.size += 1
-            self.key_node_map[key] = LRUNode(key, value)
-            self.key_node_map[key].add_node_after(self.head)
-        return self.key_node_map[key]
+            self.key_node_map[key] = entry_node
+            entry_node.add_node_after(self.head)
+            if self.counters is not None:
+                self.counters.inserts += 1
+        if ttl is not None or self.default_ttl is not None or entry_node.expires_at is not None:
+            self.set_expiry(entry_node, ttl)
+        return entry_node
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                LRUNode - the removed node if the key was present, otherwise None
+        """
+        entry_node = self.key_node_map.pop(key, None)
+        if entry_node is None:
+            return None
+        self.modification_count += 1
+        self.size -= 1
+        if self.weigher is not None:
+            self.weight -= entry_node.weight
+        return entry_node.remove_node()
+
+    def save_snapshot(self, path):
+        """Function to write the entries of the cache to a snapshot file, from
+            the least to the most recently used; time to live is not saved
+
+            Args:
+                path (str) - path of the snapshot file, replaced if it exists
+
+            Returns:
+                int - number of entries written
+        """
+        return write_snapshot(path, self.__snapshot_records())
+
+    def load_snapshot(self, path):
+        """Function to fill an empty cache from a snapshot file in a single
+            pass, restoring the recency order of the entries; if the snapshot
+            holds more than fits, the least recently used entries are left out,
+            and restored entries get the cache's default time to live
+
+            Args:
+                path (str) - path of a snapshot file written by save_snapshot
+
+            Returns:
+                int - number of entries restored
+        """
+        if self.size != 0:
+            raise ValueError("Snapshot can only be loaded into an empty cache")
+        self.modification_count += 1
+        skip = 0 if self.weigher is not None else max(0, snapshot_size(path) - self.capacity)
+        for key, value, _ in read_snapshot(path, skip):
+            entry_node = LRUNode(key, value)
+            if self.weigher is not None:
+                entry_node.weight = self.weigh(value)
+                self.weight += entry_node.weight
+            self.size += 1
+            self.key_node_map[key] = entry_node
+            entry_node.add_node_after(self.head)
+            if self.default_ttl is not None:
+                self.set_expiry(entry_node, None)
+        while self.weight > self.capacity:
+            self.evict_LRU_entry()
+        return self.size
+
+    def __snapshot_records(self):
+        """Function to list the entries of the cache for a snapshot
+
+            Args: None
+
+            Returns:
+                generator - (key, value, frequency) triples from the least to
+                the most recently used entry, frequency always being 1
+        """
+        curr_node = self.tail.prev
+        while curr_node is not self.head:
+            yield curr_node.key, curr_node.value, 1
+            curr_node = curr_node.prev
+
+    def items(self):
+        """Function to stream the (key, value) pairs of the cache from the
+            least to the most recently used, the order of eviction
+
+            Args: None
+
+            Returns:
+                generator - (key, value) pairs
+        """
+        return self.iter_by_recency()
+
+    def keys(self):
+        """Function to stream the keys of the cache from the least to the most
+            recently used
+
+            Args: None
+
+            Returns:
+                generator - keys
+        """
+        for key, _ in self.iter_by_recency():
+            yield key
+
+    def iter_by_recency(self, reverse = False):
+        """Function to stream the (key, value) pairs of the cache by walking
+            the linked list, without copying it or changing the order; expired
+            entries that are not reaped yet are skipped
+
+            Args:
+                reverse (boolean) - whether to start from the most rather than
+                    the least recently used entry
+
+            Returns:
+                generator - (key, value) pairs; raises RuntimeError if the
+                cache is changed during the iteration
+        """
+        expected_count = self.modification_count
+        now = self.clock() if self.expiry_heap else None
+        if reverse:
+            curr_node, end_node = self.head.next, self.tail
+        else:
+            curr_node, end_node = self.tail.prev, self.head
+        while curr_node is not end_node:
+            if now is None or curr_node.expires_at is None or curr_node.expires_at > now:
+                yield curr_node.key, curr_node.value
+                if self.modification_count != expected_count:
+                    raise RuntimeError("Cache changed during iteration")
+            curr_node = curr_node.next if reverse else curr_node.prev
+
+    def get_eviction_candidate(self):
+        """Function to find the entry that evict_LRU_entry would remove next,
+            without changing the cache
+
+            Args: None
+
+            Returns:
+                LRUNode - the least recently used node, or None if the cache is
+                empty
+        """
+        if self.size == 0:
+            return None
+        return self.tail.prev
 
     def evict_LRU_entry(self):
         """Function to remove the least recently used entry from the cache;
@@ -80,11 +322,57 @@ class LRUCache(Cache):
 
             Returns:
                 LRUNode - the evicted node, now without links to the internal
-                 linked list
+                 linked list; when called to make room for a new entry, the
+                 node is reused as that entry's node
         """
         self.size -= 1
+        self.modification_count += 1
+        if self.weigher is not None:
+            self.weight -= self.tail.prev.weight
         del self.key_node_map[self.tail.prev.key]
-        return self.tail.prev.remove_node()
+        evicted_node = self.tail.prev.remove_node()
+        if self.counters is not None:
+            self.counters.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(evicted_node.key, evicted_node.value)
+        return evicted_node
+
+    def __put_weighted(self, key, value):
+        """Same functionality as put_key_value_internally for a cache with a
+            weigher, evicting least recently used entries until the total
+            weight fits within the capacity
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                updated node
+        """
+        weight = self.weigh(value)
+        if self.is_key_in_cache(key):
+            entry_node = self.key_node_map[key]
+            self.weight += weight - entry_node.weight
+            entry_node.value = value
+            entry_node.weight = weight
+            self.__mark_as_most_recent(entry_node)
+            if self.counters is not None:
+                self.counters.updates += 1
+            while self.weight > self.capacity:
+                self.evict_LRU_entry()
+        else:
+            evicted_node = None
+            while self.weight + weight > self.capacity:
+                evicted_node = self.evict_LRU_entry()
+            entry_node = LRUNode(key, value) if evicted_node is None else evicted_node.reuse(key, value)
+            entry_node.weight = weight
+            self.size += 1
+            self.weight += weight
+            self.key_node_map[key] = entry_node
+            entry_node.add_node_after(self.head)
+            if self.counters is not None:
+                self.counters.inserts += 1
+        return entry_node
 
     def __mark_as_most_recent(self, cache_entry):
         """Given an LRUNode cache_entry which is present in the cache, mark it
@@ -0,0 +1,268 @@
+import threading
+
+from LFU_Cache import LFUCache
+from LRU_Cache import LRUCache
+
+class LoadingMixin:
+    """Mixin adding read-through loading and write-behind writing to a cache
+
+        With a loader, a look up that misses asks loader(keys), a function
+        taking a list of keys and returning a dictionary of the values it
+        found, for the missing values and places them in the cache; get_many
+        asks for all of its misses in one call, and keys the loader does not
+        return are reported as misses and not cached.
+
+        With a writer, put_key_value and put_many mark entries dirty, keeping
+        only the latest value of each key, and writer(items) is later called
+        with a dictionary of the dirty entries in one batch: when flush_size
+        entries are dirty, every flush_interval seconds if set, before a dirty
+        entry is evicted, on flush() and on close(). Without flush_interval
+        the batches are written by the call that triggers them; with it, a
+        daemon thread writes them, and only evictions and flush() write from
+        the calling thread. Batches are written one at a time, and a look up
+        that misses on a dirty key, such as one removed with remove_key, is
+        served its dirty value instead of loading an older one. If a batch
+        fails, its entries stay dirty unless written again meanwhile, and the
+        error is raised by the call that wrote it, or by the next flush() or
+        close() if it was the thread, which then stops.
+
+        The cache itself is not thread-safe; only the dirty entries are shared
+        with the writer thread. Pass on_evict as a keyword argument so that it
+        is called after the dirty entries are written.
+    """
+    def __init__(self, *args, loader = None, writer = None, flush_interval = None, flush_size = 64,
+            on_evict = None, **kwargs):
+        if flush_size <= 0 or int(flush_size) != flush_size:
+            raise ValueError("Flush size must be positive")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError("Flush interval must be positive")
+        super().__init__(*args, on_evict = self.__write_before_eviction, **kwargs)
+        self.loader = loader
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.evict_callback = on_evict
+        self.dirty = dict()
+        self.flushing = dict()
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.flush_lock = threading.Lock() # held while a batch is written, so batches never overlap
+        self.closed = False
+        self.writer_error = None
+        self.flush_thread = None
+        if writer is not None and flush_interval is not None:
+            self.flush_thread = threading.Thread(target = self.__flush_periodically, daemon = True)
+            self.flush_thread.start()
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key, loading it on a
+            miss if the cache has a loader
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key if it is present or loaded, otherwise
+                None
+        """
+        value = super().get_value(key)
+        if value is not None or key in self.key_node_map:
+            return value
+        return self.__load([key]).get(key)
+
+    def get_many(self, keys):
+        """Function to retrieve the values associated with several keys,
+            loading every missing value with a single call to the loader
+
+            Args:
+                keys (iterable) - keys that are being queried
+
+            Returns:
+                list - value associated with each key in order, None for keys
+                that are neither present nor loaded
+        """
+        keys = list(keys)
+        values = super().get_many(keys)
+        missing = dict.fromkeys(key for key, value in zip(keys, values)
+            if value is None and key not in self.key_node_map)
+        if not missing:
+            return values
+        loaded = self.__load(list(missing))
+        return [loaded.get(key) if key in missing else value for key, value in zip(keys, values)]
+
+    def put_key_value(self, key, value, ttl = None):
+        """Function to place a key and an associated value into the cache,
+            marking the entry dirty if the cache has a writer
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+                ttl (float) - optional time to live in seconds
+
+            Returns:
+                None
+        """
+        super().put_key_value(key, value, ttl)
+        if self.writer is not None:
+            self.__mark_dirty([(key, value)])
+
+    def put_many(self, items):
+        """Function to place several keys and associated values into the cache
+            in one call, marking the entries dirty if the cache has a writer
+
+            Args:
+                items (dict or iterable) - (key, value) pairs to place
+
+            Returns:
+                None
+        """
+        items = list(items.items() if hasattr(items, "items") else items)
+        super().put_many(items)
+        if self.writer is not None:
+            self.__mark_dirty(items)
+
+    def flush(self):
+        """Function to write every dirty entry in one batch
+
+            Args: None
+
+            Returns:
+                int - number of entries written
+        """
+        if self.writer_error is not None:
+            error, self.writer_error = self.writer_error, None
+            raise error
+        return self.__write_dirty()
+
+    def close(self):
+        """Function to stop the writer thread and write the dirty entries
+
+            Args: None
+
+            Returns:
+                None
+        """
+        if self.flush_thread is not None:
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+            self.flush_thread.join()
+        if self.writer is not None:
+            self.flush()
+
+    def __load(self, keys):
+        """Function to fetch the values of missing keys, dirty values first and
+            then from the loader in one call, placing them in the cache without
+            marking them dirty
+
+            Args:
+                keys (list) - distinct keys missing from the cache
+
+            Returns:
+                dict - values found, by key
+        """
+        loaded = dict()
+        with self.lock:
+            for key in keys:
+                if key in self.dirty:
+                    loaded[key] = self.dirty[key]
+                elif key in self.flushing:
+                    loaded[key] = self.flushing[key]
+        remaining = [key for key in keys if key not in loaded]
+        if remaining and self.loader is not None:
+            found = self.loader(remaining)
+            loaded.update((key, found[key]) for key in remaining if key in found)
+        for key, value in loaded.items():
+            super().put_key_value(key, value)
+        return loaded
+
+    def __mark_dirty(self, items):
+        """Function to record placed entries as dirty, writing them if
+            flush_size entries are dirty and no writer thread runs
+
+            Args:
+                items (list) - placed (key, value) pairs
+
+            Returns:
+                None
+        """
+        with self.condition:
+            self.dirty.update(items)
+            if len(self.dirty) < self.flush_size:
+                return
+            if self.flush_thread is not None:
+                self.condition.notify()
+                return
+        self.__write_dirty()
+
+    def __write_before_eviction(self, key, value):
+        """Function called by the cache for each entry it evicts, writing the
+            dirty entries first if the evicted entry is one of them
+
+            Args:
+                key - evicted key
+                value - evicted value
+
+            Returns:
+                None
+        """
+        if key in self.dirty:
+            self.__write_dirty()
+        if self.evict_callback is not None:
+            self.evict_callback(key, value)
+
+    def __write_dirty(self):
+        """Function to pass the dirty entries to the writer in one batch; the
+            entries stay visible to look ups until the writer returns, and are
+            marked dirty again if it fails
+
+            Args: None
+
+            Returns:
+                int - number of entries written
+        """
+        with self.flush_lock:
+            with self.lock:
+                batch, self.dirty = self.dirty, dict()
+                self.flushing = batch
+            if not batch:
+                return 0
+            try:
+                self.writer(batch)
+            except BaseException:
+                with self.lock:
+                    batch.update(self.dirty) # entries placed during the write are newer
+                    self.dirty = batch
+                raise
+            finally:
+                with self.lock:
+                    self.flushing = dict()
+            return len(batch)
+
+    def __flush_periodically(self):
+        """Function run by the writer thread, writing the dirty entries every
+            flush_interval seconds or as soon as flush_size of them are dirty,
+            until the cache is closed or a write fails
+
+            Args: None
+
+            Returns:
+                None
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or len(self.dirty) >= self.flush_size,
+                    self.flush_interval)
+                if self.closed:
+                    return
+            try:
+                self.__write_dirty()
+            except Exception as error:
+                self.writer_error = error
+                return
+
+class LoadingLRUCache(LoadingMixin, LRUCache):
+    """LRUCache with read-through loading and write-behind writing"""
+
+class LoadingLFUCache(LoadingMixin, LFUCache):
+    """LFUCache with read-through loading and write-behind writing"""
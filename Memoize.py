@@ -0,0 +1,117 @@
+import functools
+import threading
+from collections import namedtuple
+
+from Cache_Policies import policy_cache_class
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+_KEYWORD_MARK = object()
+_FAST_KEY_TYPES = {int, str}
+
+def make_key(args, kwargs, typed = False):
+    """Function to build a hashable cache key from a call's arguments
+
+        Args:
+            args (tuple) - positional arguments of the call
+            kwargs (dict) - keyword arguments of the call
+            typed (boolean) - whether arguments of different types are cached
+                separately
+
+        Returns:
+            hashable key; a lone int or str argument is used as is
+    """
+    if not kwargs and len(args) == 1 and type(args[0]) in _FAST_KEY_TYPES and not typed:
+        return args[0]
+    key = args
+    if kwargs:
+        key += (_KEYWORD_MARK,)
+        for item in kwargs.items():
+            key += item
+    if typed:
+        key += tuple(type(arg) for arg in args)
+        if kwargs:
+            key += tuple(type(value) for value in kwargs.values())
+    return key
+
+class _Call:
+    """Result slot shared by a computing call and the calls waiting on it"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+def cached(function = None, policy = "lru", capacity = 128, typed = False):
+    """Decorator to memoize a function in an LRUCache or LFUCache; results
+        equal to None are cached like any other, and concurrent calls with the
+        same arguments wait for a single computation instead of repeating it
+
+        Args:
+            function (callable) - function to decorate when used without
+                arguments as @cached
+            policy (str) - "lru" or "lfu", the eviction policy of the cache
+            capacity (int) - maximum number of cached results
+            typed (boolean) - whether arguments of different types are cached
+                separately
+
+        Returns:
+            decorated function with cache_info() and cache_clear() attributes
+    """
+    cache_class = policy_cache_class(policy)
+    if function is None:
+        return lambda function: cached(function, policy, capacity, typed)
+
+    cache = cache_class(capacity)
+    lock = threading.Lock()
+    in_flight = dict()
+    hits = misses = evictions = 0
+
+    def wrapper(*args, **kwargs):
+        nonlocal cache, hits, misses, evictions
+        key = make_key(args, kwargs, typed)
+        with lock:
+            if cache.is_key_in_cache(key):
+                hits += 1
+                return cache.get_value(key)
+            misses += 1
+            call = in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = in_flight[key] = _Call()
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        else:
+            with lock:
+                if cache.is_at_capacity() and not cache.is_key_in_cache(key):
+                    evictions += 1
+                cache.put_key_value(key, call.result)
+        finally:
+            with lock:
+                del in_flight[key]
+            call.done.set()
+        return call.result
+
+    def cache_info():
+        """Report cache statistics"""
+        with lock:
+            return CacheInfo(hits, misses, evictions, capacity, cache.size)
+
+    def cache_clear():
+        """Clear the cache and its statistics"""
+        nonlocal cache, hits, misses, evictions
+        with lock:
+            cache = cache_class(capacity)
+            hits = misses = evictions = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    wrapper.cache_parameters = lambda: {"policy": policy, "capacity": capacity, "typed": typed}
+    return functools.update_wrapper(wrapper, function)
@@ -0,0 +1,197 @@
+import random
+from array import array
+
+from Cache import Cache
+
+POLICIES = ("lru", "lfu")
+
+LFU_INITIAL_COUNT = 5
+LFU_LOG_FACTOR = 10
+LFU_MAX_COUNT = 255
+
+class SampledCache(Cache):
+    """Cache approximating LRU or LFU eviction by sampling, as Redis does:
+        entries occupy the first self.size slots of flat arrays, each with a
+        score that a read updates with a single store, and eviction removes the
+        worst scored of sample_size randomly chosen entries, moving the last
+        entry into the freed slot; with a sample size of at least the capacity
+        eviction is exact
+
+        For LRU the score is the tick of the entry's last access. For LFU it
+        is a one-byte logarithmic counter starting at LFU_INITIAL_COUNT, which
+        an access increments with a probability falling as the counter grows,
+        so that it saturates only after about a million accesses; counters do
+        not decay.
+    """
+    def __init__(self, capacity, policy = "lru", sample_size = 5, seed = None):
+        super().__init__(capacity)
+        if policy not in POLICIES:
+            raise ValueError("Policy must be one of: " + ", ".join(POLICIES))
+        if sample_size <= 0 or int(sample_size) != sample_size:
+            raise ValueError("Sample size must be positive")
+        self.policy = policy
+        self.sample_size = sample_size
+        self.random = random.Random(seed)
+        self.slot_keys = [None] * capacity
+        self.slot_values = [None] * capacity
+        if policy == "lru":
+            self.slot_scores = array("q", bytes(8 * capacity))
+        else:
+            self.slot_scores = bytearray(capacity)
+        self.tick = 0
+
+    def __repr__(self):
+        lines = ["Sampled " + self.policy.upper() + " Cache:"]
+        for slot in range(self.size):
+            lines.append(f"(key: {self.slot_keys[slot]}, value: {self.slot_values[slot]}, score: {self.slot_scores[slot]})")
+        return "\n".join(lines) + "\n\n"
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            updating its score to reflect the access
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is None:
+            return None
+        self.__record_access(slot)
+        return self.slot_values[slot]
+
+    def peek(self, key):
+        """Function to read the value associated with a key without updating
+            its score
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                value associated with key if it is present, otherwise None
+        """
+        slot = self.key_node_map.get(key)
+        return None if slot is None else self.slot_values[slot]
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache,
+            evicting a sampled entry if the cache is at capacity
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is not None:
+            self.slot_values[slot] = value
+            self.__record_access(slot)
+            return
+        if self.size == self.capacity:
+            self.evict_sampled_entry()
+        slot = self.size
+        self.size += 1
+        self.key_node_map[key] = slot
+        self.slot_keys[slot] = key
+        self.slot_values[slot] = value
+        if self.policy == "lru":
+            self.tick += 1
+            self.slot_scores[slot] = self.tick
+        else:
+            self.slot_scores[slot] = LFU_INITIAL_COUNT
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                tuple - the removed (key, value) pair if the key was present,
+                otherwise None
+        """
+        slot = self.key_node_map.get(key)
+        if slot is None:
+            return None
+        return self.__remove_slot(slot)
+
+    def get_eviction_candidate_slot(self):
+        """Function to sample entries and pick the one to evict: the least
+            recently used for LRU, the least frequently used for LFU; all
+            entries are compared if the sample size is at least the size
+
+            Args: None
+
+            Returns:
+                int - slot of the chosen entry; it is assumed that the cache is
+                non-empty
+        """
+        scores = self.slot_scores
+        if self.sample_size >= self.size:
+            return min(range(self.size), key = scores.__getitem__)
+        randrange = self.random.randrange
+        size = self.size
+        worst_slot = randrange(size)
+        for _ in range(self.sample_size - 1):
+            slot = randrange(size)
+            if scores[slot] < scores[worst_slot]:
+                worst_slot = slot
+        return worst_slot
+
+    def evict_sampled_entry(self):
+        """Function to remove the entry chosen by sampling; it is assumed that
+            the cache has at least one entry in it
+
+            Args: None
+
+            Returns:
+                tuple - the (key, value) pair of the evicted entry
+        """
+        return self.__remove_slot(self.get_eviction_candidate_slot())
+
+    def __record_access(self, slot):
+        """Function to update the score of an accessed slot
+
+            Args:
+                slot (int) - occupied slot
+
+            Returns:
+                None
+        """
+        if self.policy == "lru":
+            self.tick += 1
+            self.slot_scores[slot] = self.tick
+            return
+        count = self.slot_scores[slot]
+        if count < LFU_MAX_COUNT and self.random.random() * ((count - LFU_INITIAL_COUNT) * LFU_LOG_FACTOR + 1) < 1:
+            self.slot_scores[slot] = count + 1
+
+    def __remove_slot(self, slot):
+        """Function to remove the entry of a slot, moving the entry of the last
+            occupied slot into it
+
+            Args:
+                slot (int) - occupied slot
+
+            Returns:
+                tuple - the removed (key, value) pair
+        """
+        key = self.slot_keys[slot]
+        value = self.slot_values[slot]
+        del self.key_node_map[key]
+        self.size -= 1
+        last_slot = self.size
+        if slot != last_slot:
+            moved_key = self.slot_keys[last_slot]
+            self.slot_keys[slot] = moved_key
+            self.slot_values[slot] = self.slot_values[last_slot]
+            self.slot_scores[slot] = self.slot_scores[last_slot]
+            self.key_node_map[moved_key] = slot
+        self.slot_keys[last_slot] = None
+        self.slot_values[last_slot] = None
+        return key, value
@@ -0,0 +1,464 @@
+from array import array
+import multiprocessing
+import os
+import pickle
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+MAGIC = 0x53484C5255  # "SHLRU"
+HEADER_FIELDS = 4
+INT_SIZE = 8
+
+class SharedLRUCache:
+    """LRU cache whose entries, hash index and recency links live in a
+        multiprocessing.shared_memory segment, so that every process holding
+        the cache (for example the pre-forked workers of a server) shares the
+        same entries; keys and values are stored pickled in fixed-size slots
+
+        The slots are striped over independent segments, each with its own
+        multiprocessing lock, hash buckets and recency list; keys are routed
+        to a stripe by a hash of their pickled bytes, so LRU ordering is
+        maintained within each stripe rather than globally. Like
+        ArrayLRUCache, each stripe links its slots through integer arrays
+        where slot 0 is the sentinel of a circular recency list and unused
+        slots are chained through the next array as a free list.
+
+        The cache must be created before the worker processes are forked, or
+        be passed to them as a multiprocessing.Process argument, since the
+        locks cannot be shared otherwise; the locks belong to the given
+        multiprocessing context, the default one if none is given. Keys are
+        compared by their pickled bytes, so keys that are equal but pickle
+        differently (1 and 1.0) are different keys here.
+    """
+    def __init__(self, capacity = 10, max_item_size = 256, stripe_count = 8, name = None,
+            context = None):
+        if capacity <= 0 or int(capacity) != capacity:
+            raise ValueError("Capacity must be positive")
+        if max_item_size <= 0 or int(max_item_size) != max_item_size:
+            raise ValueError("Maximum item size must be positive")
+        if stripe_count <= 0 or int(stripe_count) != stripe_count:
+            raise ValueError("Stripe count must be positive")
+        if stripe_count > capacity:
+            raise ValueError("Stripe count must not exceed capacity")
+        self.capacity = capacity
+        self.max_item_size = max_item_size
+        self.stripe_count = stripe_count
+        self.__compute_layout()
+        self.memory = shared_memory.SharedMemory(name, create = True, size = self.memory_size)
+        if context is None:
+            context = multiprocessing.get_context()
+        self.locks = [context.Lock() for _ in range(stripe_count)]
+        self.__attach()
+        self.ints[0:HEADER_FIELDS] = array("q", [MAGIC, capacity, stripe_count, max_item_size])
+        for stripe in range(stripe_count):
+            self.__initialize_stripe(stripe)
+
+    def __getstate__(self):
+        return {"name": self.memory.name, "locks": self.locks}
+
+    def __setstate__(self, state):
+        self.memory = shared_memory.SharedMemory(state["name"])
+        # the creating process owns the segment; keep this process's resource
+        # tracker from unlinking it when this process exits; on POSIX the
+        # segment is registered under its name with a leading slash
+        if os.name == "posix":
+            resource_tracker.unregister("/" + self.memory.name, "shared_memory")
+        self.locks = state["locks"]
+        header = self.memory.buf[:HEADER_FIELDS * INT_SIZE].cast("q")
+        magic, self.capacity, self.stripe_count, self.max_item_size = header
+        header.release()
+        if magic != MAGIC:
+            raise ValueError("Shared memory segment does not hold a SharedLRUCache")
+        self.__compute_layout()
+        self.__attach()
+
+    def __repr__(self):
+        lines = ["Shared LRU Cache:", "Capacity: " + str(self.capacity), "Size: " + str(self.size)]
+        for stripe in range(self.stripe_count):
+            lines.append("Stripe " + str(stripe) + ":")
+            with self.locks[stripe]:
+                entries = self.__entries(stripe)
+            for key, value in entries:
+                lines.append(f"(key: {key}, value: {value})")
+        return "\n".join(lines) + "\n"
+
+    @property
+    def name(self):
+        """Name of the shared memory segment"""
+        return self.memory.name
+
+    @property
+    def size(self):
+        """Total number of entries over all stripes"""
+        return sum(self.ints[self.stripe_bases[stripe]] for stripe in range(self.stripe_count))
+
+    def is_at_capacity(self):
+        """Function to check if every stripe has reached its full capacity
+
+            Args: None
+
+            Returns:
+                boolean
+        """
+        return self.size == self.capacity
+
+    def is_key_in_cache(self, key):
+        """Function to check if a key is present in the cache
+
+            Args:
+                key - picklable key that is being checked
+
+            Returns:
+                boolean
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        key_hash = zlib.crc32(key_bytes)
+        stripe = key_hash % self.stripe_count
+        with self.locks[stripe]:
+            return self.__find_slot(stripe, key_hash, key_bytes) != 0
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            updating its stripe to reflect its recent usage; the value is
+            unpickled after the stripe's lock is released
+
+            Args:
+                key - picklable key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        key_hash = zlib.crc32(key_bytes)
+        stripe = key_hash % self.stripe_count
+        with self.locks[stripe]:
+            slot = self.__find_slot(stripe, key_hash, key_bytes)
+            if slot == 0:
+                return None
+            self.__mark_as_most_recent(stripe, slot)
+            start = self.__data_offset(stripe, slot) + len(key_bytes)
+            value_bytes = bytes(self.memory.buf[start:start + self.ints[self.value_length_bases[stripe] + slot]])
+        return pickle.loads(value_bytes)
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache,
+            evicting the least recently used entry of the key's stripe if that
+            stripe is at capacity; the pair is pickled before the stripe's
+            lock is taken
+
+            Args:
+                key - picklable key that is being placed
+                value - picklable value that is being placed
+
+            Returns:
+                None
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(key_bytes) + len(value_bytes) > self.max_item_size:
+            raise ValueError("Pickled key and value exceed the maximum item size of "
+                + str(self.max_item_size) + " bytes")
+        key_hash = zlib.crc32(key_bytes)
+        stripe = key_hash % self.stripe_count
+        ints = self.ints
+        base = self.stripe_bases[stripe]
+        with self.locks[stripe]:
+            slot = self.__find_slot(stripe, key_hash, key_bytes)
+            if slot != 0:
+                self.__mark_as_most_recent(stripe, slot)
+            else:
+                slot = ints[base + 1]
+                if slot == 0:
+                    slot = self.__evict_LRU_slot(stripe)
+                else:
+                    ints[base + 1] = ints[self.next_slot_bases[stripe] + slot]
+                ints[base] += 1
+                bucket = self.bucket_bases[stripe] + self.__bucket_index(key_hash)
+                ints[self.chain_bases[stripe] + slot] = ints[bucket]
+                ints[bucket] = slot
+                ints[self.hash_bases[stripe] + slot] = key_hash
+                ints[self.key_length_bases[stripe] + slot] = len(key_bytes)
+                self.__link_as_most_recent(stripe, slot)
+            ints[self.value_length_bases[stripe] + slot] = len(value_bytes)
+            start = self.__data_offset(stripe, slot)
+            self.memory.buf[start:start + len(key_bytes)] = key_bytes
+            start += len(key_bytes)
+            self.memory.buf[start:start + len(value_bytes)] = value_bytes
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache
+
+            Args:
+                key - picklable key to remove
+
+            Returns:
+                boolean - whether the key was present
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        key_hash = zlib.crc32(key_bytes)
+        stripe = key_hash % self.stripe_count
+        ints = self.ints
+        base = self.stripe_bases[stripe]
+        with self.locks[stripe]:
+            slot = self.__find_slot(stripe, key_hash, key_bytes)
+            if slot == 0:
+                return False
+            self.__unlink_from_chain(stripe, slot)
+            self.__unlink(stripe, slot)
+            ints[self.next_slot_bases[stripe] + slot] = ints[base + 1]
+            ints[base + 1] = slot
+            ints[base] -= 1
+            return True
+
+    def close(self):
+        """Function to detach this process from the shared memory segment;
+            the cache cannot be used by this process afterwards
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.ints.release()
+        self.memory.close()
+
+    def unlink(self):
+        """Function to destroy the shared memory segment once every process
+            has closed it; meant to be called once, by the creating process
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.memory.unlink()
+
+    def __compute_layout(self):
+        """Function to compute where each stripe's integer arrays and slot
+            data start, from the capacity, stripe count and maximum item size
+
+            Args: None
+
+            Returns:
+                None
+        """
+        stripe_capacity, remainder = divmod(self.capacity, self.stripe_count)
+        self.stripe_capacities = [stripe_capacity + (1 if stripe < remainder else 0)
+            for stripe in range(self.stripe_count)]
+        bucket_count = 1 << (max(self.stripe_capacities) - 1).bit_length()
+        self.bucket_mask = bucket_count - 1
+        self.stripe_bases = []
+        self.bucket_bases = []
+        self.next_slot_bases = []
+        self.prev_slot_bases = []
+        self.chain_bases = []
+        self.hash_bases = []
+        self.key_length_bases = []
+        self.value_length_bases = []
+        offset = HEADER_FIELDS
+        for capacity in self.stripe_capacities:
+            self.stripe_bases.append(offset)       # size, then free slot
+            offset += 2
+            self.bucket_bases.append(offset)
+            offset += bucket_count
+            for bases in (self.next_slot_bases, self.prev_slot_bases, self.chain_bases,
+                    self.hash_bases, self.key_length_bases, self.value_length_bases):
+                bases.append(offset)
+                offset += capacity + 1
+        self.data_bases = []
+        offset *= INT_SIZE
+        for capacity in self.stripe_capacities:
+            self.data_bases.append(offset)
+            offset += (capacity + 1) * self.max_item_size
+        self.ints_size = self.data_bases[0]
+        self.memory_size = offset
+
+    def __attach(self):
+        """Function to view the integer arrays of the shared memory segment
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.ints = self.memory.buf[:self.ints_size].cast("q")
+
+    def __initialize_stripe(self, stripe):
+        """Function to set up an empty stripe, chaining all of its slots into
+            the free list
+
+            Args:
+                stripe (int) - stripe to set up
+
+            Returns:
+                None
+        """
+        ints = self.ints
+        capacity = self.stripe_capacities[stripe]
+        base = self.stripe_bases[stripe]
+        ints[base] = 0
+        ints[base + 1] = 1
+        next_base = self.next_slot_bases[stripe]
+        for slot in range(1, capacity):
+            ints[next_base + slot] = slot + 1
+        ints[next_base + capacity] = 0
+        ints[next_base] = 0
+        ints[self.prev_slot_bases[stripe]] = 0
+
+    def __bucket_index(self, key_hash):
+        """Function to find the hash bucket of a key within its stripe
+
+            Args:
+                key_hash (int) - hash of the pickled key
+
+            Returns:
+                int - index into the stripe's buckets
+        """
+        return (key_hash // self.stripe_count) & self.bucket_mask
+
+    def __data_offset(self, stripe, slot):
+        """Function to find where the pickled key and value of a slot start
+
+            Args:
+                stripe (int) - stripe of the slot
+                slot (int) - slot within the stripe
+
+            Returns:
+                int - byte offset into the shared memory segment
+        """
+        return self.data_bases[stripe] + slot * self.max_item_size
+
+    def __find_slot(self, stripe, key_hash, key_bytes):
+        """Function to look a key up in its stripe's hash chain
+
+            Args:
+                stripe (int) - stripe responsible for the key
+                key_hash (int) - hash of key_bytes
+                key_bytes (bytes) - pickled key
+
+            Returns:
+                int - slot of the key, or 0 if it is not present
+        """
+        ints = self.ints
+        buf = self.memory.buf
+        hash_base = self.hash_bases[stripe]
+        key_length_base = self.key_length_bases[stripe]
+        chain_base = self.chain_bases[stripe]
+        key_length = len(key_bytes)
+        slot = ints[self.bucket_bases[stripe] + self.__bucket_index(key_hash)]
+        while slot != 0:
+            if ints[hash_base + slot] == key_hash and ints[key_length_base + slot] == key_length:
+                start = self.__data_offset(stripe, slot)
+                if buf[start:start + key_length] == key_bytes:
+                    return slot
+            slot = ints[chain_base + slot]
+        return 0
+
+    def __unlink_from_chain(self, stripe, slot):
+        """Function to remove an occupied slot from its hash chain
+
+            Args:
+                stripe (int) - stripe of the slot
+                slot (int) - slot to remove
+
+            Returns:
+                None
+        """
+        ints = self.ints
+        chain_base = self.chain_bases[stripe]
+        index = self.bucket_bases[stripe] + self.__bucket_index(ints[self.hash_bases[stripe] + slot])
+        while ints[index] != slot:
+            index = chain_base + ints[index]
+        ints[index] = ints[chain_base + slot]
+
+    def __evict_LRU_slot(self, stripe):
+        """Function to remove the least recently used entry of a full stripe,
+            handing its slot to the caller rather than to the free list
+
+            Args:
+                stripe (int) - stripe to evict from
+
+            Returns:
+                int - the freed slot
+        """
+        slot = self.ints[self.prev_slot_bases[stripe]]
+        self.__unlink_from_chain(stripe, slot)
+        self.__unlink(stripe, slot)
+        self.ints[self.stripe_bases[stripe]] -= 1
+        return slot
+
+    def __unlink(self, stripe, slot):
+        """Function to remove a slot from its stripe's recency list, leaving
+            its own links stale
+
+            Args:
+                stripe (int) - stripe of the slot
+                slot (int) - occupied slot to unlink
+
+            Returns:
+                None
+        """
+        ints = self.ints
+        next_base = self.next_slot_bases[stripe]
+        prev_base = self.prev_slot_bases[stripe]
+        prev_slot = ints[prev_base + slot]
+        next_slot = ints[next_base + slot]
+        ints[next_base + prev_slot] = next_slot
+        ints[prev_base + next_slot] = prev_slot
+
+    def __link_as_most_recent(self, stripe, slot):
+        """Function to link an unlinked slot directly after its stripe's
+            sentinel
+
+            Args:
+                stripe (int) - stripe of the slot
+                slot (int) - slot to link
+
+            Returns:
+                None
+        """
+        ints = self.ints
+        next_base = self.next_slot_bases[stripe]
+        prev_base = self.prev_slot_bases[stripe]
+        first_slot = ints[next_base]
+        ints[next_base + slot] = first_slot
+        ints[prev_base + first_slot] = slot
+        ints[prev_base + slot] = 0
+        ints[next_base] = slot
+
+    def __mark_as_most_recent(self, stripe, slot):
+        """Given an occupied slot, mark it internally as the most recently
+            queried of its stripe
+
+            Args:
+                stripe (int) - stripe of the slot
+                slot (int) - slot to be marked
+
+            Returns:
+                None
+        """
+        if self.ints[self.next_slot_bases[stripe]] != slot:
+            self.__unlink(stripe, slot)
+            self.__link_as_most_recent(stripe, slot)
+
+    def __entries(self, stripe):
+        """Function to list the entries of a stripe from most to least
+            recently used; the caller holds the stripe's lock
+
+            Args:
+                stripe (int) - stripe to list
+
+            Returns:
+                list - (key, value) pairs
+        """
+        ints = self.ints
+        entries = []
+        slot = ints[self.next_slot_bases[stripe]]
+        while slot != 0:
+            start = self.__data_offset(stripe, slot)
+            middle = start + ints[self.key_length_bases[stripe] + slot]
+            end = middle + ints[self.value_length_bases[stripe] + slot]
+            entries.append((pickle.loads(self.memory.buf[start:middle]), pickle.loads(self.memory.buf[middle:end])))
+            slot = ints[self.next_slot_bases[stripe] + slot]
+        return entries
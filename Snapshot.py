@@ -0,0 +1,126 @@
+"""Binary snapshot format used by LRUCache and LFUCache to persist their
+entries across restarts
+
+A snapshot is a header, holding a magic string, a format version and the
+number of entries, followed by one record per entry in the order in which it
+is to be restored, the entry to be evicted first coming first. Each record is
+the entry's frequency, the lengths of its pickled key and value, and then the
+pickled key and value themselves.
+"""
+import mmap
+import os
+import pickle
+import struct
+
+MAGIC = b"CACHESNP"
+VERSION = 1
+HEADER = struct.Struct("<8sIQ")
+RECORD = struct.Struct("<QII")
+BATCH_SIZE = 1 << 16
+
+def write_snapshot(path, records):
+    """Function to write entries to a snapshot file; records are pickled and
+        written in batches while they are produced, and the number of entries
+        is filled into the header at the end. The entries go to a temporary
+        file next to the snapshot, which replaces it only once it is complete
+        and flushed to disk, so a failed write leaves any previous snapshot
+        intact
+
+        Args:
+            path (str) - path of the snapshot file, replaced if it exists
+            records (iterable) - (key, value, frequency) triples in restore
+                order
+
+        Returns:
+            int - number of entries written
+    """
+    count = 0
+    temporary_path = path + ".tmp"
+    try:
+        with open(temporary_path, "wb") as snapshot_file:
+            snapshot_file.write(HEADER.pack(MAGIC, VERSION, 0))
+            batch = []
+            for key, value, frequency in records:
+                key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+                value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                batch.append(RECORD.pack(frequency, len(key_bytes), len(value_bytes)))
+                batch.append(key_bytes)
+                batch.append(value_bytes)
+                count += 1
+                if len(batch) >= BATCH_SIZE:
+                    snapshot_file.write(b"".join(batch))
+                    batch = []
+            snapshot_file.write(b"".join(batch))
+            snapshot_file.seek(0)
+            snapshot_file.write(HEADER.pack(MAGIC, VERSION, count))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+    return count
+
+def read_snapshot(path, skip = 0):
+    """Function to read the entries of a snapshot file through a memory map,
+        unpickling each key and value straight from the mapped file
+
+        Args:
+            path (str) - path of the snapshot file
+            skip (int) - number of leading entries to pass over without
+                unpickling them
+
+        Returns:
+            generator - (key, value, frequency) triples in restore order
+    """
+    with open(path, "rb") as snapshot_file, \
+            mmap.mmap(snapshot_file.fileno(), 0, access = mmap.ACCESS_READ) as mapped_file:
+        count = unpack_header(mapped_file[:HEADER.size], path)
+        view = memoryview(mapped_file)
+        loads = pickle.loads
+        unpack_record = RECORD.unpack_from
+        record_size = RECORD.size
+        try:
+            offset = HEADER.size
+            for index in range(count):
+                frequency, key_length, value_length = unpack_record(view, offset)
+                offset += record_size
+                if index >= skip:
+                    value_offset = offset + key_length
+                    offset = value_offset + value_length
+                    yield loads(view[value_offset - key_length:value_offset]), loads(view[value_offset:offset]), frequency
+                else:
+                    offset += key_length + value_length
+        finally:
+            view.release()
+
+def snapshot_size(path):
+    """Function to read the number of entries of a snapshot file from its
+        header
+
+        Args:
+            path (str) - path of the snapshot file
+
+        Returns:
+            int - number of entries
+    """
+    with open(path, "rb") as snapshot_file:
+        return unpack_header(snapshot_file.read(HEADER.size), path)
+
+def unpack_header(header, path):
+    """Function to check the header of a snapshot file
+
+        Args:
+            header (bytes) - first bytes of the file
+            path (str) - path of the snapshot file, for error messages
+
+        Returns:
+            int - number of entries
+    """
+    if len(header) < HEADER.size:
+        raise ValueError("Snapshot file is truncated: " + path)
+    magic, version, count = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version " + str(VERSION) + " cache snapshot: " + path)
+    return count
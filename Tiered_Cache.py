@@ -0,0 +1,411 @@
+import itertools
+import os
+import pickle
+import threading
+
+from Cache_Policies import policy_cache_class
+
+class DiskStore:
+    """Append-only log of pickled values with an in-memory index from keys to
+        the offset and size of their latest record; the live records are kept
+        within a byte budget by dropping the oldest ones, and the log is
+        rewritten with only the live records once the dead records take more
+        space than the budget; it is not thread-safe, except that
+        copy_live_records may run alongside get and discard, and its contents
+        do not outlive the process, as the log is truncated when opened
+    """
+    def __init__(self, path, byte_budget):
+        if byte_budget <= 0 or int(byte_budget) != byte_budget:
+            raise ValueError("Byte budget must be positive")
+        self.path = path
+        self.byte_budget = byte_budget
+        self.index = dict()
+        self.live_bytes = 0
+        self.file_size = 0
+        self.file_descriptor = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+
+    def __repr__(self):
+        return f"Disk Store: {len(self.index)} entries, {self.live_bytes} live bytes, {self.file_size} file bytes\n"
+
+    def append(self, records):
+        """Function to write records at the end of the log in one call,
+            without indexing them
+
+            Args:
+                records (list) - pickled values (bytes)
+
+            Returns:
+                list - offset of each record in the log
+        """
+        data = memoryview(b"".join(records))
+        written = 0
+        while written < len(data):
+            written += os.write(self.file_descriptor, data[written:])
+        offsets = []
+        offset = self.file_size
+        for record in records:
+            offsets.append(offset)
+            offset += len(record)
+        self.file_size = offset
+        return offsets
+
+    def add(self, key, offset, size):
+        """Function to index an appended record as the latest value of a key,
+            dropping the oldest records while the live ones exceed the budget
+
+            Args:
+                key - hashable key
+                offset (int) - offset of the record, as returned by append
+                size (int) - size of the record in bytes
+
+            Returns:
+                None
+        """
+        self.discard(key)
+        self.index[key] = (offset, size)
+        self.live_bytes += size
+        while self.live_bytes > self.byte_budget:
+            self.discard(next(iter(self.index)))
+
+    def get(self, key):
+        """Function to read the latest value of a key
+
+            Args:
+                key - key present in the index
+
+            Returns:
+                unpickled value
+        """
+        offset, size = self.index[key]
+        return pickle.loads(os.pread(self.file_descriptor, size, offset))
+
+    def discard(self, key):
+        """Function to drop a key from the index, leaving its record as dead
+            bytes in the log
+
+            Args:
+                key - hashable key
+
+            Returns:
+                boolean - whether the key was present
+        """
+        entry = self.index.pop(key, None)
+        if entry is None:
+            return False
+        self.live_bytes -= entry[1]
+        return True
+
+    def needs_compaction(self):
+        """Function to check if the dead records of the log take more space
+            than the byte budget
+
+            Args: None
+
+            Returns:
+                boolean
+        """
+        return self.file_size - self.live_bytes > self.byte_budget
+
+    def compact(self):
+        """Function to rewrite the log with only its live records, in their
+            current order, replacing the log file once the copy is complete
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.install_compacted(self.copy_live_records(list(self.index.items())))
+
+    def copy_live_records(self, entries):
+        """Function to copy records to a new log file, which replaces the log
+            file once the copy is complete; the store itself is not changed, so
+            other threads can read and discard keys meanwhile as long as
+            nothing is appended
+
+            Args:
+                entries (list) - (key, (offset, size)) pairs of the index, in
+                    the order in which to copy them
+
+            Returns:
+                tuple - (descriptor of the new log, its index, its size), to be
+                passed to install_compacted
+        """
+        compacted_path = self.path + ".compact"
+        compacted_descriptor = os.open(compacted_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        compacted_index = dict()
+        offset = 0
+        try:
+            for key, (old_offset, size) in entries:
+                record = memoryview(os.pread(self.file_descriptor, size, old_offset))
+                written = 0
+                while written < size:
+                    written += os.write(compacted_descriptor, record[written:])
+                compacted_index[key] = (offset, size)
+                offset += size
+            os.replace(compacted_path, self.path)
+        except BaseException:
+            os.close(compacted_descriptor)
+            os.unlink(compacted_path)
+            raise
+        return compacted_descriptor, compacted_index, offset
+
+    def install_compacted(self, compacted):
+        """Function to switch to a log written by copy_live_records, dropping
+            the keys discarded during the copy; their records stay in the new
+            log as dead bytes
+
+            Args:
+                compacted (tuple) - result of copy_live_records
+
+            Returns:
+                None
+        """
+        compacted_descriptor, compacted_index, file_size = compacted
+        os.close(self.file_descriptor)
+        self.file_descriptor = compacted_descriptor
+        self.index = {key: entry for key, entry in compacted_index.items() if key in self.index}
+        self.file_size = file_size
+
+    def close(self):
+        """Function to close the log file
+
+            Args: None
+
+            Returns:
+                None
+        """
+        os.close(self.file_descriptor)
+
+class TieredCache:
+    """Two-tier cache with an LRUCache or LFUCache in memory and a DiskStore
+        on disk; entries evicted from memory are spilled to disk by a
+        background thread in batches, so that placing entries never waits for
+        the disk, and a look up that misses in memory is served from the
+        spilled entries, moving the entry back into memory
+
+        Spilled entries wait in self.pending until the writer thread has
+        appended them to the log, and are served from there until then;
+        pending entries are not bounded, so a disk slower than the eviction
+        rate keeps them in memory. If the writer thread fails, its error is
+        raised by every later placement, and by look ups that would move an
+        entry back into memory, since nothing would drain the entries they
+        spill.
+    """
+    def __init__(self, capacity, path, byte_budget, policy = "lru", batch_size = 64, **cache_options):
+        cache_class = policy_cache_class(policy)
+        if batch_size <= 0 or int(batch_size) != batch_size:
+            raise ValueError("Batch size must be positive")
+        self.memory = cache_class(capacity, on_evict = self.__spill, **cache_options)
+        self.disk = DiskStore(path, byte_budget)
+        self.batch_size = batch_size
+        self.pending = dict()
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.write_lock = threading.Lock() # held by the writer from append until indexing, and by compaction
+        self.closed = False
+        self.writer_error = None
+        self.writer = threading.Thread(target = self.__write_spilled, daemon = True)
+        self.writer.start()
+
+    def __repr__(self):
+        with self.lock:
+            res = "Tiered Cache:\n"
+            res += "Memory:\n" + str(self.memory)
+            res += "Pending: " + str(len(self.pending)) + "\n"
+            res += str(self.disk)
+        return res
+
+    def is_key_in_cache(self, key):
+        """Function to check if a key is present in memory, pending spill or
+            on disk
+
+            Args:
+                key - key that is being checked
+
+            Returns:
+                boolean
+        """
+        with self.lock:
+            return self.memory.is_key_in_cache(key) or key in self.pending or key in self.disk.index
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists in
+            either tier; a value found on disk or pending spill is moved back
+            into memory, possibly spilling another entry
+
+            Args:
+                key - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        with self.lock:
+            if self.memory.is_key_in_cache(key):
+                return self.memory.get_value(key)
+            if key not in self.pending and key not in self.disk.index:
+                return None
+            self.__check_writer()
+            if key in self.pending:
+                value = self.pending.pop(key)
+            else:
+                value = self.disk.get(key)
+                self.disk.discard(key)
+            self.memory.put_key_value(key, value)
+            return value
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into memory,
+            dropping any older copy of the key from disk
+
+            Args:
+                key - key that is being placed
+                value - picklable value that is being placed
+
+            Returns:
+                None
+        """
+        with self.lock:
+            self.__check_writer()
+            self.pending.pop(key, None)
+            self.disk.discard(key)
+            self.memory.put_key_value(key, value)
+
+    def remove_key(self, key):
+        """Function to remove a key from both tiers
+
+            Args:
+                key - key to remove
+
+            Returns:
+                boolean - whether the key was present
+        """
+        with self.lock:
+            removed = self.memory.remove_key(key) is not None
+            removed = self.pending.pop(key, None) is not None or removed
+            return self.disk.discard(key) or removed
+
+    def flush(self):
+        """Function to wait until every spilled entry has been written to disk
+
+            Args: None
+
+            Returns:
+                None
+        """
+        with self.condition:
+            while self.pending and self.writer_error is None:
+                self.condition.wait()
+            if self.writer_error is not None:
+                raise self.writer_error
+
+    def compact(self):
+        """Function to rewrite the disk log with only its live records
+
+            Args: None
+
+            Returns:
+                None
+        """
+        with self.write_lock:
+            with self.lock:
+                entries = list(self.disk.index.items())
+            self.__compact(entries)
+
+    def close(self):
+        """Function to write the pending spilled entries, stop the writer
+            thread and close the disk log
+
+            Args: None
+
+            Returns:
+                None
+        """
+        try:
+            self.flush()
+        finally:
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+            self.writer.join()
+            self.disk.close()
+
+    def __check_writer(self):
+        """Function to raise the error of a failed writer thread, called with
+            self.lock held before anything that may spill entries
+
+            Args: None
+
+            Returns:
+                None
+        """
+        if self.writer_error is not None:
+            raise self.writer_error
+
+    def __spill(self, key, value):
+        """Function called by the memory tier for each entry it evicts, with
+            self.lock held, queueing the entry for the writer thread
+
+            Args:
+                key - evicted key
+                value - evicted value
+
+            Returns:
+                None
+        """
+        self.pending[key] = value
+        self.condition.notify()
+
+    def __compact(self, entries):
+        """Function to rewrite the disk log with the given index entries,
+            holding self.write_lock throughout so that nothing is appended, but
+            self.lock only to switch to the new log, so that look ups and
+            placements do not wait for the copy
+
+            Args:
+                entries (list) - (key, (offset, size)) pairs of the disk index
+
+            Returns:
+                None
+        """
+        compacted = self.disk.copy_live_records(entries)
+        with self.lock:
+            self.disk.install_compacted(compacted)
+
+    def __write_spilled(self):
+        """Function run by the writer thread, appending pending entries to the
+            disk log in batches; an entry is only indexed if it is still
+            pending, unchanged, once its batch is written, and the log is
+            compacted when needed after a batch, outside self.lock
+
+            Args: None
+
+            Returns:
+                None
+        """
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                batch = list(itertools.islice(self.pending.items(), self.batch_size))
+            try:
+                records = [pickle.dumps(value, pickle.HIGHEST_PROTOCOL) for _, value in batch]
+                with self.write_lock:
+                    offsets = self.disk.append(records)
+                    with self.condition:
+                        for (key, value), offset, record in zip(batch, offsets, records):
+                            if key in self.pending and self.pending[key] is value:
+                                del self.pending[key]
+                                self.disk.add(key, offset, len(record))
+                        entries = list(self.disk.index.items()) if self.disk.needs_compaction() else None
+                        self.condition.notify_all()
+                    if entries is not None:
+                        self.__compact(entries)
+            except Exception as error:
+                with self.condition:
+                    self.writer_error = error
+                    self.condition.notify_all()
+                return
@@ -0,0 +1,195 @@
+from Cache import Cache
+from Cache_Policies import policy_cache_class
+from LRU_Cache import LRUCache
+
+HASH_MASK = (1 << 64) - 1
+HALVED = bytes(count >> 1 for count in range(256))
+
+class CountMinSketch:
+    """Count-min sketch estimating how often keys were seen, using four rows of
+        one-byte counters saturating at 15; every sample_size additions all
+        counters are halved so that the estimates follow recent traffic
+    """
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    MAX_COUNT = 15
+
+    def __init__(self, width, sample_size = None):
+        if width <= 0 or int(width) != width:
+            raise ValueError("Width must be positive")
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.row_shift = self.width.bit_length() - 1
+        self.table = bytearray(len(self.SEEDS) * self.width)
+        self.sample_size = sample_size if sample_size is not None else 10 * self.width
+        self.additions = 0
+
+    def indexes(self, key):
+        """Function to find the counter of a key in each row of the table
+
+            Args:
+                key - hashable key
+
+            Returns:
+                list - one index into self.table per row
+        """
+        key_hash = hash(key)
+        shift = 64 - self.row_shift
+        return [(row << self.row_shift) + ((((key_hash ^ seed) * seed) & HASH_MASK) >> shift)
+            for row, seed in enumerate(self.SEEDS)]
+
+    def estimate(self, key):
+        """Function to estimate how often a key was seen recently
+
+            Args:
+                key - hashable key
+
+            Returns:
+                int - estimated count, never below the true aged count
+        """
+        table = self.table
+        return min(table[index] for index in self.indexes(key))
+
+    def increment(self, key):
+        """Function to record one occurrence of a key; only the smallest
+            counters are incremented (conservative update), and the table is
+            aged once sample_size occurrences have been recorded
+
+            Args:
+                key - hashable key
+
+            Returns:
+                None
+        """
+        table = self.table
+        indexes = self.indexes(key)
+        smallest = min(table[index] for index in indexes)
+        if smallest < self.MAX_COUNT:
+            for index in indexes:
+                if table[index] == smallest:
+                    table[index] = smallest + 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.age()
+
+    def age(self):
+        """Function to halve every counter
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.table = bytearray(self.table.translate(HALVED))
+        self.additions //= 2
+
+class WTinyLFUCache(Cache):
+    """Cache admitting new keys through a small window LRU cache; a key leaving
+        the window only displaces the main cache's eviction candidate if the
+        count-min sketch estimates it was used more often, which keeps scans
+        and one-off keys from flushing frequently used entries
+    """
+    def __init__(self, capacity, window_ratio = 0.01, main_policy = "lru"):
+        super().__init__(capacity)
+        main_class = policy_cache_class(main_policy)
+        if not 0 < window_ratio < 1:
+            raise ValueError("Window ratio must be between 0 and 1")
+        window_capacity = max(1, int(capacity * window_ratio))
+        if capacity - window_capacity < 1:
+            raise ValueError("Capacity must be at least 2")
+        self.window = LRUCache(window_capacity)
+        self.main = main_class(capacity - window_capacity)
+        self.sketch = CountMinSketch(4 * capacity)
+
+    def __repr__(self):
+        res = "W-TinyLFU Cache:\n"
+        res += "Window:\n" + str(self.window)
+        res += "Main:\n" + str(self.main)
+        return res
+
+    def is_key_in_cache(self, key):
+        """Function to check if a key is present in the window or main cache
+
+            Args:
+                key (int) - key that is being checked
+
+            Returns:
+                boolean
+        """
+        return key in self.window.key_node_map or key in self.main.key_node_map
+
+    def peek(self, key):
+        """Function to read the value associated with a key from the window or
+            main cache without recording the access
+
+            Args:
+                key (int) - key that is being read
+
+            Returns:
+                value associated with key if it is present, otherwise None
+        """
+        if key in self.window.key_node_map:
+            return self.window.peek(key)
+        return self.main.peek(key)
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            recording the access in the frequency sketch
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        self.sketch.increment(key)
+        if key in self.window.key_node_map:
+            return self.window.get_value(key)
+        return self.main.get_value(key)
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache; a
+            new key enters the window, and the key it pushes out of the window
+            is offered to the main cache; placing a new key is only recorded
+            in the frequency sketch if the key was not seen before, since it
+            usually follows a look-up that missed and was already recorded
+
+            Args:
+                key (int) - key that is being placed
+                value (int) - value that is being placed
+
+            Returns:
+                None
+        """
+        if key in self.window.key_node_map:
+            self.sketch.increment(key)
+            self.window.put_key_value(key, value)
+        elif key in self.main.key_node_map:
+            self.sketch.increment(key)
+            self.main.put_key_value(key, value)
+        else:
+            if self.sketch.estimate(key) == 0:
+                self.sketch.increment(key)
+            if self.window.is_at_capacity():
+                candidate = self.window.evict_LRU_entry()
+                self.admit(candidate.key, candidate.value)
+            self.window.put_key_value(key, value)
+            self.size = self.window.size + self.main.size
+
+    def admit(self, key, value):
+        """Function to offer an entry to the main cache; when the main cache is
+            full the entry is only placed if the sketch estimates it was used
+            more often than the entry that would be evicted for it
+
+            Args:
+                key (int) - candidate key
+                value (int) - candidate value
+
+            Returns:
+                boolean - whether the entry was placed in the main cache
+        """
+        if self.main.is_at_capacity():
+            victim = self.main.get_eviction_candidate()
+            if self.sketch.estimate(key) <= self.sketch.estimate(victim.key):
+                return False
+        self.main.put_key_value(key, value)
+        return True
@@ -0,0 +1,457 @@
+import numpy as np
+
+POLICIES = ("lru", "lfu")
+
+EMPTY = -1
+DELETED = -2
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+MAX_TABLE_LOAD = 0.75
+EVICTION_QUEUE_SIZE = 64
+
+class VectorCache:
+    """LRU or LFU cache of 64-bit integer keys held in NumPy arrays, for
+        look ups and placements of whole arrays of keys at a time
+
+        Entries occupy the first self.size slots of the slot arrays, which
+        hold each entry's key, value, last access tick and, for LFU, access
+        count; an open addressing table with linear probing maps keys to
+        slots, with twice as many positions as the capacity, and is rebuilt
+        when removed keys leave too few empty positions. Every operation on a
+        batch of keys probes the table for all of them at once, so its number
+        of NumPy calls grows with the longest probe sequence rather than the
+        batch size.
+
+        Eviction is exact: LRU evicts the entries with the oldest ticks, and
+        LFU the entries with the lowest counts, the least recently used first
+        among equal counts, as LFUCache does. The lowest scoring entries are
+        kept in a short eviction queue, filled by partitioning the ticks of
+        every entry for LRU, or sorting every entry by count and then tick for
+        LFU; a queued entry is used only while its tick and count are
+        unchanged and no entry placed since could score lower, so the
+        O(capacity) selection is paid once per EVICTION_QUEUE_SIZE evictions
+        rather than on every put. The victims of an LRU put_many call are
+        picked after its ticks are applied, from the entries present before
+        the call and its new keys together, so the call ends with the same
+        entries as placing its keys one at a time. The new keys of an LFU call
+        are all placed, evicting entries present before the call, whereas
+        placing them one at a time would let a later new key evict an earlier
+        one; if a call holds more new keys than the capacity, only the last of
+        them are placed.
+    """
+    def __init__(self, capacity, policy = "lru", value_dtype = np.int64):
+        if capacity <= 0 or int(capacity) != capacity:
+            raise ValueError("Capacity must be positive")
+        if policy not in POLICIES:
+            raise ValueError("Policy must be one of: " + ", ".join(POLICIES))
+        self.capacity = capacity
+        self.policy = policy
+        self.size = 0
+        self.tick = 0
+        self.slot_keys = np.zeros(capacity, np.int64)
+        self.slot_values = np.zeros(capacity, value_dtype)
+        self.slot_ticks = np.zeros(capacity, np.int64)
+        self.slot_counts = np.zeros(capacity, np.int64) if policy == "lfu" else None
+        self.slot_positions = np.zeros(capacity, np.int64)
+        self.table_bits = (2 * capacity - 1).bit_length()
+        self.table_keys = np.zeros(1 << self.table_bits, np.int64)
+        self.table_slots = np.full(1 << self.table_bits, EMPTY, np.int64)
+        self.deleted_count = 0
+        self.queue_keys = np.zeros(0, np.int64)
+        self.queue_ticks = np.zeros(0, np.int64)
+        self.queue_counts = np.zeros(0, np.int64)
+        self.queue_floor = None
+
+    def __repr__(self):
+        lines = ["Vector " + self.policy.upper() + " Cache:"]
+        for slot in np.argsort(self.slot_ticks[:self.size]):
+            lines.append(f"(key: {self.slot_keys[slot]}, value: {self.slot_values[slot]})")
+        return "\n".join(lines) + "\n\n"
+
+    def get_many(self, keys):
+        """Function to retrieve the values associated with an array of keys,
+            updating each present key as if get_value were called on each key
+            in turn
+
+            Args:
+                keys (array-like) - integer keys that are being queried
+
+            Returns:
+                tuple - (boolean array marking the keys present in the cache,
+                array of the value of each key, zero for absent keys)
+        """
+        keys = self.__as_keys(keys)
+        slots = self.__find_slots(keys)[0]
+        hit_mask = slots >= 0
+        hit_slots = slots[hit_mask]
+        values = np.zeros(len(keys), self.slot_values.dtype)
+        values[hit_mask] = self.slot_values[hit_slots]
+        np.maximum.at(self.slot_ticks, hit_slots, self.tick + 1 + np.flatnonzero(hit_mask))
+        if self.slot_counts is not None:
+            np.add.at(self.slot_counts, hit_slots, 1)
+        self.tick += len(keys)
+        return hit_mask, values
+
+    def put_many(self, keys, values):
+        """Function to place an array of keys and associated values into the
+            cache; a key given more than once keeps its last value, and counts
+            once per occurrence for LFU
+
+            Args:
+                keys (array-like) - integer keys that are being placed
+                values (array-like) - value of each key, or a single value for
+                    every key
+
+            Returns:
+                None
+        """
+        keys = self.__as_keys(keys)
+        values = np.broadcast_to(np.asarray(values, self.slot_values.dtype), keys.shape)
+        if len(keys) == 0:
+            return
+        first_tick = self.tick + 1
+        ticks = first_tick + np.arange(len(keys))
+        self.tick += len(keys)
+        _, reversed_index, occurrences = np.unique(keys[::-1], return_index = True, return_counts = True)
+        last_index = len(keys) - 1 - reversed_index
+        order = np.argsort(last_index)
+        last_index = last_index[order]
+        occurrences = occurrences[order]
+        keys = keys[last_index]
+        values = values[last_index]
+        ticks = ticks[last_index]
+        slots = self.__find_slots(keys)[0]
+        present = slots >= 0
+        present_slots = slots[present]
+        self.slot_values[present_slots] = values[present]
+        self.slot_ticks[present_slots] = ticks[present]
+        if self.slot_counts is not None:
+            self.slot_counts[present_slots] += occurrences[present]
+        new_index = np.flatnonzero(~present)[-self.capacity:]
+        if len(new_index) == 0:
+            return
+        excess = self.size + len(new_index) - self.capacity
+        if excess > 0 and self.slot_counts is None:
+            victims, kept = self.__lru_victims(excess, ticks[new_index], first_tick)
+            self.__remove_slots(victims)
+            new_index = new_index[kept]
+        elif excess > 0:
+            self.__remove_slots(self.__lfu_victims(excess, first_tick))
+        if self.slot_counts is not None:
+            placed_floor = int(occurrences[new_index].min())
+            self.queue_floor = placed_floor if self.queue_floor is None else min(self.queue_floor, placed_floor)
+        if self.size + self.deleted_count + len(new_index) > MAX_TABLE_LOAD * len(self.table_slots):
+            self.__rebuild_table()
+        new_slots = np.arange(self.size, self.size + len(new_index))
+        self.slot_keys[new_slots] = keys[new_index]
+        self.slot_values[new_slots] = values[new_index]
+        self.slot_ticks[new_slots] = ticks[new_index]
+        if self.slot_counts is not None:
+            self.slot_counts[new_slots] = occurrences[new_index]
+        self.size += len(new_index)
+        self.__insert_keys(keys[new_index], new_slots)
+
+    def remove_many(self, keys):
+        """Function to remove the entries for an array of keys
+
+            Args:
+                keys (array-like) - integer keys to remove
+
+            Returns:
+                boolean array - marking the keys that were present
+        """
+        keys = self.__as_keys(keys)
+        slots = self.__find_slots(keys)[0]
+        present = slots >= 0
+        self.__remove_slots(np.unique(slots[present]))
+        return present
+
+    def get_value(self, key):
+        """Function to retrieve value associated with a key if it exists,
+            updating to reflect its access
+
+            Args:
+                key (int) - key that is being queried
+
+            Returns:
+                value associated with key in cache if it is present, otherwise
+                None
+        """
+        hit_mask, values = self.get_many([key])
+        return values.tolist()[0] if hit_mask[0] else None
+
+    def put_key_value(self, key, value):
+        """Function to place a key and an associated value into the cache,
+            evicting an entry if the cache is at capacity
+
+            Args:
+                key (int) - key that is being placed
+                value - value that is being placed, of the cache's value type
+
+            Returns:
+                None
+        """
+        self.put_many([key], [value])
+
+    def is_key_in_cache(self, key):
+        """Function to check if a key is present in the cache
+
+            Args:
+                key (int) - key that is being checked
+
+            Returns:
+                boolean
+        """
+        return bool(self.__find_slots(self.__as_keys([key]))[0][0] >= 0)
+
+    def remove_key(self, key):
+        """Function to remove the entry for a key from the cache
+
+            Args:
+                key (int) - key to remove
+
+            Returns:
+                tuple - the removed (key, value) pair if the key was present,
+                otherwise None
+        """
+        slots = self.__find_slots(self.__as_keys([key]))[0]
+        if slots[0] < 0:
+            return None
+        value = self.slot_values[slots].tolist()[0]
+        self.__remove_slots(slots)
+        return key, value
+
+    def __as_keys(self, keys):
+        """Function to convert keys to a contiguous one-dimensional int64 array"""
+        keys = np.ascontiguousarray(keys, np.int64)
+        if keys.ndim != 1:
+            raise ValueError("Keys must be a one-dimensional array")
+        return keys
+
+    def __hash_positions(self, keys):
+        """Function to compute the first table position of each key with
+            Fibonacci hashing
+
+            Args:
+                keys (np.ndarray) - int64 keys
+
+            Returns:
+                np.ndarray - int64 table positions
+        """
+        return ((keys.view(np.uint64) * HASH_MULTIPLIER) >> np.uint64(64 - self.table_bits)).astype(np.int64)
+
+    def __find_slots(self, keys):
+        """Function to probe the table for every key at once, advancing only
+            the keys still unresolved after each step
+
+            Args:
+                keys (np.ndarray) - int64 keys
+
+            Returns:
+                tuple - (slot of each key, EMPTY for absent keys, table
+                position at which each probe stopped)
+        """
+        positions = self.__hash_positions(keys)
+        slots = np.full(len(keys), EMPTY, np.int64)
+        active = np.arange(len(keys))
+        mask = len(self.table_slots) - 1
+        while len(active):
+            probed = positions[active]
+            table_slots = self.table_slots[probed]
+            found = (table_slots >= 0) & (self.table_keys[probed] == keys[active])
+            slots[active[found]] = table_slots[found]
+            active = active[~found & (table_slots != EMPTY)]
+            positions[active] = (positions[active] + 1) & mask
+        return slots, positions
+
+    def __insert_keys(self, keys, slots):
+        """Function to add keys absent from the table, each at the first empty
+            or deleted position of its probe sequence; when keys of the batch
+            reach the same free position, the first of them takes it and the
+            others keep probing
+
+            Args:
+                keys (np.ndarray) - distinct int64 keys absent from the table
+                slots (np.ndarray) - slot of each key
+
+            Returns:
+                None
+        """
+        positions = self.__hash_positions(keys)
+        active = np.arange(len(keys))
+        mask = len(self.table_slots) - 1
+        while len(active):
+            probed = positions[active]
+            free = np.flatnonzero(self.table_slots[probed] < 0)
+            _, first = np.unique(probed[free], return_index = True)
+            placed = free[first]
+            winners = active[placed]
+            winner_positions = probed[placed]
+            self.deleted_count -= int(np.count_nonzero(self.table_slots[winner_positions] == DELETED))
+            self.table_keys[winner_positions] = keys[winners]
+            self.table_slots[winner_positions] = slots[winners]
+            self.slot_positions[slots[winners]] = winner_positions
+            remaining = np.ones(len(active), bool)
+            remaining[placed] = False
+            active = active[remaining]
+            positions[active] = (positions[active] + 1) & mask
+
+    def __rebuild_table(self):
+        """Function to clear the table, dropping deleted positions, and add the
+            key of every slot back
+
+            Args: None
+
+            Returns:
+                None
+        """
+        self.table_slots.fill(EMPTY)
+        self.deleted_count = 0
+        self.__insert_keys(self.slot_keys[:self.size], np.arange(self.size))
+
+    def __lru_victims(self, count, new_ticks, first_tick):
+        """Function to pick the entries with the oldest ticks among the entries
+            in the cache and the new keys of a put_many call
+
+            Args:
+                count (int) - number of entries to evict
+                new_ticks (np.ndarray) - tick of each new key of the call
+                first_tick (int) - first tick of the call, older than the
+                    ticks of its new and refreshed keys
+
+            Returns:
+                tuple - (slots of the cache entries to remove, boolean array
+                marking the new keys that are kept)
+        """
+        kept = np.ones(len(new_ticks), bool)
+        victims = self.__queued_victims(count, first_tick)
+        if victims is not None:
+            return victims, kept
+        all_ticks = np.concatenate((self.slot_ticks[:self.size], new_ticks))
+        lowest = np.argpartition(all_ticks, count - 1)[:count]
+        kept[lowest[lowest >= self.size] - self.size] = False
+        return lowest[lowest < self.size], kept
+
+    def __lfu_victims(self, count, first_tick):
+        """Function to pick the entries with the lowest counts, then the
+            oldest ticks
+
+            Args:
+                count (int) - number of entries to evict
+                first_tick (int) - first tick of the put_many call
+
+            Returns:
+                np.ndarray - slots of the entries to remove
+        """
+        if count >= self.size:
+            return np.arange(self.size)
+        victims = self.__queued_victims(count, first_tick)
+        if victims is not None:
+            return victims
+        # counts and ticks are compared separately, as packing them into one score could overflow
+        return np.lexsort((self.slot_ticks[:self.size], self.slot_counts[:self.size]))[:count]
+
+    def __queued_victims(self, count, first_tick):
+        """Function to take the lowest scoring entries from the front of the
+            eviction queue, filling the queue again if it holds too few usable
+            entries; queued entries whose key was removed or whose tick or
+            count changed are dropped
+
+            Args:
+                count (int) - number of entries to take
+                first_tick (int) - first tick of the put_many call
+
+            Returns:
+                np.ndarray - slots of the entries, or None if the queue cannot
+                supply them
+        """
+        if count > EVICTION_QUEUE_SIZE:
+            return None
+        slots, usable = self.__usable_queue_slots()
+        if usable < count:
+            self.__fill_eviction_queue(first_tick)
+            slots, usable = self.__usable_queue_slots()
+            if usable < count:
+                return None
+        self.queue_keys = self.queue_keys[count:]
+        self.queue_ticks = self.queue_ticks[count:]
+        self.queue_counts = self.queue_counts[count:]
+        return slots[:count]
+
+    def __usable_queue_slots(self):
+        """Function to drop the stale entries of the eviction queue and count
+            the entries at its front that score lower than every other entry
+
+            Args: None
+
+            Returns:
+                tuple - (slot of each queued entry, number of usable entries)
+        """
+        slots = self.__find_slots(self.queue_keys)[0]
+        valid = slots >= 0
+        valid[valid] = self.slot_ticks[slots[valid]] == self.queue_ticks[valid]
+        if self.slot_counts is not None:
+            valid[valid] = self.slot_counts[slots[valid]] == self.queue_counts[valid]
+        if not valid.all():
+            slots = slots[valid]
+            self.queue_keys = self.queue_keys[valid]
+            self.queue_ticks = self.queue_ticks[valid]
+            self.queue_counts = self.queue_counts[valid]
+        if self.queue_floor is None:
+            return slots, len(slots)
+        # an entry placed since the queue was filled has a newer tick than every queued entry
+        return slots, int(np.searchsorted(self.queue_counts, self.queue_floor, "right"))
+
+    def __fill_eviction_queue(self, tick_limit):
+        """Function to fill the eviction queue with the lowest scoring entries,
+            in eviction order, up to the first entry whose tick is not older
+            than the given tick, so that every entry placed later has a newer
+            tick than the queued entries
+
+            Args:
+                tick_limit (int) - first tick of the put_many call
+
+            Returns:
+                None
+        """
+        length = min(self.size, EVICTION_QUEUE_SIZE)
+        ticks = self.slot_ticks[:self.size]
+        if self.slot_counts is not None:
+            order = np.lexsort((ticks, self.slot_counts[:self.size]))[:length]
+        elif length < self.size:
+            order = np.argpartition(ticks, length - 1)[:length]
+            order = order[np.argsort(ticks[order])]
+        else:
+            order = np.argsort(ticks)
+        order = order[:np.cumprod(ticks[order] < tick_limit).sum()]
+        self.queue_keys = self.slot_keys[order]
+        self.queue_ticks = ticks[order]
+        self.queue_counts = self.slot_counts[order] if self.slot_counts is not None else np.zeros(len(order), np.int64)
+        self.queue_floor = None
+
+    def __remove_slots(self, slots):
+        """Function to remove the entries of distinct occupied slots, moving
+            the entries of the last occupied slots into the freed slots below
+            the new size
+
+            Args:
+                slots (np.ndarray) - distinct occupied slots
+
+            Returns:
+                None
+        """
+        if len(slots) == 0:
+            return
+        self.table_slots[self.slot_positions[slots]] = DELETED
+        self.deleted_count += len(slots)
+        new_size = self.size - len(slots)
+        holes = np.sort(slots[slots < new_size])
+        movers = np.arange(new_size, self.size)
+        movers = movers[~np.isin(movers, slots)]
+        arrays = [self.slot_keys, self.slot_values, self.slot_ticks, self.slot_positions]
+        if self.slot_counts is not None:
+            arrays.append(self.slot_counts)
+        for slot_array in arrays:
+            slot_array[holes] = slot_array[movers]
+        self.table_slots[self.slot_positions[holes]] = holes
+        self.slot_values[new_size:self.size] = 0 # drops references held by object values
+        self.size = new_size
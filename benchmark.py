@@ -0,0 +1,615 @@
+"""Micro-benchmarks comparing the cache implementations of this package
+
+Run a single comparison with ``python benchmark.py <name>`` or every
+comparison with ``python benchmark.py``; results are printed as a table.
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from ARC_Cache import ARCCache
+from Arena_LRU_Cache import ArenaLRUCache
+from Array_LRU_Cache import ArrayLRUCache
+from Cache_Server import CacheClient, CacheServer
+from Clock_Cache import ClockCache
+from Concurrent_Cache import ConcurrentLFUCache, ConcurrentLRUCache
+from TinyLFU import WTinyLFUCache
+from simulator import measure_hit_ratio, measure_latencies, percentile, zipf_keys
+from LFU_Cache import LFUCache
+from LRU_Cache import LRUCache
+from Loading_Cache import LoadingLRUCache
+from Sampled_Cache import SampledCache
+
+try:
+    import numpy
+    from Vector_Cache import VectorCache
+except ImportError: # numpy is optional, only needed by the vector benchmark
+    numpy = None
+
+def measure_memory(factory, entries):
+    """Function to measure the memory held by a cache filled with a number of
+        integer entries
+
+        Args:
+            factory (callable) - builds an empty cache given its capacity
+            entries (int) - number of entries to place in the cache
+
+        Returns:
+            float - bytes allocated per entry, including the cache's own
+            preallocated structures
+    """
+    gc.collect()
+    tracemalloc.start()
+    cache = factory(entries)
+    for key in range(entries):
+        cache.put_key_value(key, key)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return allocated / entries
+
+def measure_throughput(cache, operations):
+    """Function to replay a sequence of operations against a cache
+
+        Args:
+            cache - cache exposing get_value and put_key_value
+            operations (list) - (key, is_put) pairs to replay
+
+        Returns:
+            float - operations per second
+    """
+    get_value = cache.get_value
+    put_key_value = cache.put_key_value
+    start = time.perf_counter()
+    for key, is_put in operations:
+        if is_put:
+            put_key_value(key, key)
+        else:
+            get_value(key)
+    return len(operations) / (time.perf_counter() - start)
+
+def make_operations(key_space, count, put_ratio = 0.2, seed = 0):
+    """Function to build a uniformly random mix of gets and puts
+
+        Args:
+            key_space (int) - keys are drawn from range(key_space)
+            count (int) - number of operations
+            put_ratio (float) - fraction of operations that are puts
+            seed (int) - random seed
+
+        Returns:
+            list - (key, is_put) pairs
+    """
+    rng = random.Random(seed)
+    return [(rng.randrange(key_space), rng.random() < put_ratio) for _ in range(count)]
+
+def print_table(title, rows):
+    """Function to print benchmark rows as an aligned table
+
+        Args:
+            title (str) - heading printed above the table
+            rows (list) - dictionaries sharing the same keys
+
+        Returns:
+            None
+    """
+    print(title)
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(format_cell(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(format_cell(row[column]).ljust(width) for column, width in zip(columns, widths)))
+    print()
+
+def format_cell(value):
+    """Function to format a single table cell"""
+    if isinstance(value, float) and value < 1:
+        return f"{value:.4f}"
+    if isinstance(value, float):
+        return f"{value:,.1f}"
+    return str(value)
+
+def bench_array_lru(entries = 200_000, operations = 500_000):
+    """Compare memory per entry and throughput of ArrayLRUCache and LRUCache"""
+    workload = make_operations(2 * entries, operations)
+    rows = []
+    for name, factory in (("LRUCache", LRUCache), ("ArrayLRUCache", ArrayLRUCache)):
+        cache = factory(entries)
+        for key in range(entries):
+            cache.put_key_value(key, key)
+        rows.append({
+            "cache": name,
+            "bytes/entry": measure_memory(factory, entries),
+            "ops/s": measure_throughput(cache, workload),
+        })
+    print_table(f"LRU engines ({entries:,} entries, {operations:,} mixed operations)", rows)
+    return rows
+
+def measure_threaded_throughput(cache, workloads):
+    """Function to replay one workload per thread against a shared cache
+
+        Args:
+            cache - thread-safe cache exposing get_value and put_key_value
+            workloads (list) - one list of (key, is_put) pairs per thread
+
+        Returns:
+            float - total operations per second over all threads
+    """
+    barrier = threading.Barrier(len(workloads) + 1)
+    def worker(operations):
+        barrier.wait()
+        measure_throughput(cache, operations)
+    threads = [threading.Thread(target = worker, args = (operations,)) for operations in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return sum(len(operations) for operations in workloads) / (time.perf_counter() - start)
+
+def bench_sharded(capacity = 100_000, threads = 8, operations = 100_000):
+    """Compare multi-threaded throughput of the concurrent caches as the
+        shard count grows"""
+    workloads = [make_operations(2 * capacity, operations, seed = seed) for seed in range(threads)]
+    rows = []
+    for name, factory in (("ConcurrentLRUCache", ConcurrentLRUCache), ("ConcurrentLFUCache", ConcurrentLFUCache)):
+        for shard_count in (1, 2, 4, 8, 16, 32):
+            cache = factory(capacity, shard_count)
+            rows.append({
+                "cache": name,
+                "shards": shard_count,
+                "ops/s": measure_threaded_throughput(cache, workloads),
+            })
+    print_table(f"Sharded caches ({threads} threads x {operations:,} mixed operations)", rows)
+    return rows
+
+def bench_batch(capacity = 50_000, batches = 2_000):
+    """Compare get_many/put_many against looped get_value/put_key_value"""
+    rng = random.Random(0)
+    rows = []
+    for name, factory in (("LRUCache", LRUCache), ("LFUCache", LFUCache)):
+        for batch_size in (50, 500):
+            key_batches = [[rng.randrange(2 * capacity) for _ in range(batch_size)] for _ in range(batches)]
+            looped = factory(capacity)
+            batched = factory(capacity)
+            start = time.perf_counter()
+            for keys in key_batches:
+                for key in keys:
+                    looped.get_value(key)
+                for key in keys[::4]:
+                    looped.put_key_value(key, key)
+            looped_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            for keys in key_batches:
+                batched.get_many(keys)
+                batched.put_many([(key, key) for key in keys[::4]])
+            batched_seconds = time.perf_counter() - start
+            keys_per_batch = batch_size + len(range(0, batch_size, 4))
+            rows.append({
+                "cache": name,
+                "batch size": batch_size,
+                "looped keys/s": batches * keys_per_batch / looped_seconds,
+                "batched keys/s": batches * keys_per_batch / batched_seconds,
+            })
+    print_table(f"Batch operations ({batches:,} batches)", rows)
+    return rows
+
+def bench_admission(capacity = 1_000, accesses = 200_000):
+    """Compare hit ratios of W-TinyLFU admission against plain LRU, LFU and
+        ARC on skewed and scan-polluted traces"""
+    skewed = zipf_keys(100 * capacity, accesses)
+    scanned = list(skewed)
+    for start in range(0, accesses, accesses // 10):
+        scanned[start:start] = range(10**9 + start, 10**9 + start + 5 * capacity)
+    rows = []
+    for name, factory in (
+            ("LRUCache", LRUCache),
+            ("LFUCache", LFUCache),
+            ("ARCCache", ARCCache),
+            ("WTinyLFUCache (lru)", lambda capacity: WTinyLFUCache(capacity, main_policy = "lru")),
+            ("WTinyLFUCache (lfu)", lambda capacity: WTinyLFUCache(capacity, main_policy = "lfu"))):
+        rows.append({
+            "cache": name,
+            "zipf hit ratio": measure_hit_ratio(factory(capacity), skewed),
+            "zipf + scans hit ratio": measure_hit_ratio(factory(capacity), scanned),
+        })
+    print_table(f"Admission (capacity {capacity:,}, {accesses:,} accesses)", rows)
+    return rows
+
+def bench_lfu_buckets(entries = 100_000, operations = 500_000):
+    """Measure LFUCache memory per entry, cost per hit and throughput under
+        churn, where most operations create and drop frequency nodes"""
+    cache = LFUCache(entries)
+    for key in range(entries):
+        cache.put_key_value(key, key)
+    rng = random.Random(0)
+    hit_keys = [rng.randrange(entries) for _ in range(operations)]
+    get_value = cache.get_value
+    start = time.perf_counter()
+    for key in hit_keys:
+        get_value(key)
+    hit_seconds = time.perf_counter() - start
+    churn = LFUCache(entries // 10)
+    rows = [{
+        "bytes/entry": measure_memory(LFUCache, entries),
+        "ns/hit": hit_seconds / operations * 1e9,
+        "churn ops/s": measure_throughput(churn, make_operations(entries // 5, operations, put_ratio = 0.5)),
+    }]
+    print_table(f"LFUCache ({entries:,} entries, {operations:,} operations)", rows)
+    return rows
+
+def bench_node_churn(entries = 100_000, capacity = 10_000, operations = 500_000, repeats = 5):
+    """Measure memory per entry of LRUCache and LFUCache, and put throughput
+        under churn, where every put of a new key evicts an entry; the best of
+        several runs is kept"""
+    rows = []
+    for name, factory in (("LRUCache", LRUCache), ("LFUCache", LFUCache)):
+        best_seconds = float("inf")
+        for _ in range(repeats):
+            put_key_value = factory(capacity).put_key_value
+            start = time.perf_counter()
+            for key in range(operations):
+                put_key_value(key, key)
+            best_seconds = min(best_seconds, time.perf_counter() - start)
+        rows.append({
+            "cache": name,
+            "bytes/entry": measure_memory(factory, entries),
+            "churn puts/s": operations / best_seconds,
+        })
+    print_table(f"Node churn ({entries:,} entries, {operations:,} puts into capacity {capacity:,})", rows)
+    return rows
+
+def bench_instrumentation(capacity = 50_000, operations = 500_000, repeats = 3):
+    """Compare throughput with instrumentation off, with counters and with
+        counters and no-op callbacks; the best of several runs is kept"""
+    workload = make_operations(2 * capacity, operations)
+    rows = []
+    for name, factory in (("LRUCache", LRUCache), ("LFUCache", LFUCache)):
+        row = {"cache": name}
+        for label, options in (
+                ("off ops/s", {}),
+                ("stats ops/s", {"record_stats": True}),
+                ("stats + hooks ops/s", {"record_stats": True, "on_evict": lambda key, value: None,
+                    "on_miss": lambda key: None})):
+            row[label] = max(measure_throughput(factory(capacity, **options), workload) for _ in range(repeats))
+        rows.append(row)
+    print_table(f"Instrumentation ({capacity:,} capacity, {operations:,} mixed operations)", rows)
+    return rows
+
+def bench_sampled(entries = 100_000, operations = 500_000, capacity = 1_000, accesses = 200_000):
+    """Compare memory per entry, cost per hit and zipf hit ratio of sampled
+        eviction, over several sample sizes, against exact LRU and LFU"""
+    rng = random.Random(0)
+    hit_keys = [rng.randrange(entries) for _ in range(operations)]
+    trace = zipf_keys(100 * capacity, accesses)
+    engines = [("LRUCache", "exact", LRUCache), ("LFUCache", "exact", LFUCache)]
+    for policy in ("lru", "lfu"):
+        for sample_size in (1, 3, 5, 10, 64):
+            engines.append(("SampledCache (" + policy + ")", sample_size,
+                lambda capacity, policy = policy, sample_size = sample_size:
+                    SampledCache(capacity, policy, sample_size, seed = 0)))
+    rows = []
+    for name, sample_size, factory in engines:
+        cache = factory(entries)
+        for key in range(entries):
+            cache.put_key_value(key, key)
+        get_value = cache.get_value
+        start = time.perf_counter()
+        for key in hit_keys:
+            get_value(key)
+        hit_seconds = time.perf_counter() - start
+        rows.append({
+            "cache": name,
+            "sample size": sample_size,
+            "bytes/entry": measure_memory(factory, entries),
+            "ns/hit": hit_seconds / operations * 1e9,
+            "zipf hit ratio": measure_hit_ratio(factory(capacity), trace),
+        })
+    print_table(f"Sampled eviction ({entries:,} entries; hit ratio at capacity {capacity:,})", rows)
+    return rows
+
+def bench_clock_reads(capacity = 100_000, operations = 100_000):
+    """Compare multi-threaded read throughput of ClockCache, whose look ups
+        take no lock, against the lock-per-shard concurrent LRU cache"""
+    rows = []
+    for name, factory in (
+            ("ClockCache", ClockCache),
+            ("ConcurrentLRUCache (1 shard)", lambda capacity: ConcurrentLRUCache(capacity, 1)),
+            ("ConcurrentLRUCache (8 shards)", lambda capacity: ConcurrentLRUCache(capacity, 8))):
+        cache = factory(capacity)
+        for key in range(capacity):
+            cache.put_key_value(key, key)
+        row = {"cache": name}
+        for threads in (1, 2, 4, 8):
+            workloads = [make_operations(capacity, operations, put_ratio = 0, seed = seed) for seed in range(threads)]
+            row[f"{threads} threads ops/s"] = measure_threaded_throughput(cache, workloads)
+        rows.append(row)
+    print_table(f"Concurrent reads ({capacity:,} entries, {operations:,} hits per thread)", rows)
+    return rows
+
+def bench_arena(entries = 50_000, operations = 200_000, value_size = 200):
+    """Compare ArenaLRUCache against LRUCache holding bytes values: memory
+        held per entry and throughput of puts of fresh payloads and of gets"""
+    rng = random.Random(0)
+    payloads = [rng.randbytes(value_size) for _ in range(1_000)]
+    keys = [rng.randrange(2 * entries) for _ in range(operations)]
+    rows = []
+    for name, factory in (("LRUCache", LRUCache), ("ArenaLRUCache", ArenaLRUCache)):
+        gc.collect()
+        tracemalloc.start()
+        cache = factory(entries)
+        for key in range(entries):
+            cache.put_key_value(key, bytes(bytearray(payloads[key % len(payloads)])))
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        put_key_value = cache.put_key_value
+        start = time.perf_counter()
+        for index, key in enumerate(keys):
+            put_key_value(key, payloads[index % len(payloads)])
+        put_seconds = time.perf_counter() - start
+        get_value = cache.get_value
+        start = time.perf_counter()
+        for key in keys:
+            get_value(key)
+        get_seconds = time.perf_counter() - start
+        rows.append({
+            "cache": name,
+            "bytes/entry": allocated / entries,
+            "puts/s": operations / put_seconds,
+            "gets/s": operations / get_seconds,
+        })
+    print_table(f"Byte values ({entries:,} entries of {value_size} bytes, {operations:,} operations)", rows)
+    return rows
+
+def serve_cache(path, capacity, stop):
+    """Function run in a separate process by bench_server, hosting an
+        LFUCache named "bench" on a unix socket until stop is set"""
+    server = CacheServer({"bench": LFUCache(capacity)})
+    server.start_thread(path)
+    stop.wait()
+    server.stop_thread()
+
+def measure_client_latency(client, workloads, batch_size, multi_key):
+    """Function to replay one workload per thread through a cache client,
+        timing every request
+
+        Args:
+            client (CacheClient) - client shared by the threads
+            workloads (list) - one list of (key, is_put) pairs per thread
+            batch_size (int) - operations per request; above 1 they are sent
+                as a pipeline, or as one MGET and one MSET if multi_key
+            multi_key (boolean) - whether to batch with MGET and MSET
+
+        Returns:
+            tuple - (total operations per second, sorted request latencies in
+            seconds)
+    """
+    barrier = threading.Barrier(len(workloads) + 1)
+    latencies = []
+    def worker(operations):
+        thread_latencies = []
+        barrier.wait()
+        for start_index in range(0, len(operations), batch_size):
+            batch = operations[start_index:start_index + batch_size]
+            start = time.perf_counter()
+            if batch_size == 1:
+                key, is_put = batch[0]
+                if is_put:
+                    client.set("bench", key, key)
+                else:
+                    client.get("bench", key)
+            elif multi_key:
+                get_keys = [key for key, is_put in batch if not is_put]
+                put_keys = [key for key, is_put in batch if is_put]
+                pipeline = client.pipeline()
+                if get_keys:
+                    pipeline.get_many("bench", get_keys)
+                if put_keys:
+                    pipeline.set_many("bench", [(key, key) for key in put_keys])
+                pipeline.execute()
+            else:
+                pipeline = client.pipeline()
+                for key, is_put in batch:
+                    if is_put:
+                        pipeline.set("bench", key, key)
+                    else:
+                        pipeline.get("bench", key)
+                pipeline.execute()
+            thread_latencies.append(time.perf_counter() - start)
+        latencies.extend(thread_latencies)
+    threads = [threading.Thread(target = worker, args = (operations,)) for operations in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return sum(len(operations) for operations in workloads) / seconds, sorted(latencies)
+
+def bench_server(capacity = 10_000, clients = 4, operations = 20_000, batch_size = 50):
+    """Load-test a cache server running in a separate process over a unix
+        socket, one request per operation, pipelined, and batched with
+        MGET/MSET, reporting throughput and request latency percentiles"""
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sock")
+        stop = multiprocessing.Event()
+        server_process = multiprocessing.Process(target = serve_cache, args = (path, capacity, stop))
+        server_process.start()
+        try:
+            while not os.path.exists(path):
+                time.sleep(0.01)
+            client = CacheClient(path, pool_size = clients)
+            client.set_many("bench", [(key, key) for key in range(capacity)])
+            workloads = [make_operations(2 * capacity, operations, seed = seed) for seed in range(clients)]
+            for mode, size, multi_key in (
+                    ("GET/SET", 1, False),
+                    (f"pipelined x{batch_size}", batch_size, False),
+                    (f"MGET/MSET x{batch_size}", batch_size, True)):
+                throughput, latencies = measure_client_latency(client, workloads, size, multi_key)
+                rows.append({
+                    "requests": mode,
+                    "ops/s": throughput,
+                    "p50 us": percentile(latencies, 0.5) * 1e6,
+                    "p99 us": percentile(latencies, 0.99) * 1e6,
+                    "p99.9 us": percentile(latencies, 0.999) * 1e6,
+                })
+            client.close()
+        finally:
+            stop.set()
+            server_process.join()
+    print_table(f"Cache server ({clients} client threads, {operations:,} operations each, LFUCache of {capacity:,})", rows)
+    return rows
+
+def bench_vector(capacity = 100_000, batches = 50, batch_size = 10_000):
+    """Compare batch look up and placement throughput, and memory per entry,
+        of VectorCache against LRUCache and LFUCache with integer keys"""
+    if numpy is None:
+        print("Vector benchmark skipped: numpy is not installed\n")
+        return []
+    rng = random.Random(0)
+    key_batches = [[rng.randrange(2 * capacity) for _ in range(batch_size)] for _ in range(batches)]
+    array_batches = [numpy.array(keys) for keys in key_batches]
+    rows = []
+    for name, factory in (
+            ("LRUCache", LRUCache),
+            ("LFUCache", LFUCache),
+            ("VectorCache (lru)", VectorCache),
+            ("VectorCache (lfu)", lambda capacity: VectorCache(capacity, "lfu"))):
+        gc.collect()
+        tracemalloc.start()
+        cache = factory(capacity)
+        if isinstance(cache, VectorCache):
+            cache.put_many(numpy.arange(capacity), numpy.arange(capacity))
+        else:
+            cache.put_many((key, key) for key in range(capacity))
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        if isinstance(cache, VectorCache):
+            for keys in array_batches:
+                cache.get_many(keys)
+        else:
+            for keys in key_batches:
+                cache.get_many(keys)
+        get_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        if isinstance(cache, VectorCache):
+            for keys in array_batches:
+                cache.put_many(keys, keys)
+        else:
+            for keys in key_batches:
+                cache.put_many(zip(keys, keys))
+        put_seconds = time.perf_counter() - start
+        rows.append({
+            "cache": name,
+            "bytes/entry": allocated / capacity,
+            "batch gets keys/s": batches * batch_size / get_seconds,
+            "batch puts keys/s": batches * batch_size / put_seconds,
+        })
+    print_table(f"Integer keys ({capacity:,} entries, {batches} batches of {batch_size:,} keys)", rows)
+    return rows
+
+def bench_loading(capacity = 1_000, batches = 200, batch_size = 50, backend_latency = 0.0005):
+    """Compare backend round trips and time of loading misses and writing
+        updates one key at a time against a LoadingLRUCache that loads the
+        misses of a batch together and writes dirty entries behind in batches,
+        with a simulated backend taking backend_latency seconds per call"""
+    calls = 0
+    def fetch(keys):
+        nonlocal calls
+        calls += 1
+        time.sleep(backend_latency)
+        return {key: key for key in keys}
+    def store(items):
+        nonlocal calls
+        calls += 1
+        time.sleep(backend_latency)
+    keys = zipf_keys(10 * capacity, batches * batch_size, seed = 1)
+    key_batches = [keys[start:start + batch_size] for start in range(0, len(keys), batch_size)]
+    rows = []
+    cache = LRUCache(capacity)
+    start = time.perf_counter()
+    for batch in key_batches:
+        for key, value in zip(batch, cache.get_many(batch)):
+            if value is None:
+                cache.put_key_value(key, fetch([key])[key])
+        for key in batch[:batch_size // 5]:
+            cache.put_key_value(key, key + 1)
+            store({key: key + 1})
+    rows.append({"mode": "per key", "backend calls": calls, "seconds": time.perf_counter() - start})
+    calls = 0
+    cache = LoadingLRUCache(capacity, loader = fetch, writer = store, flush_size = 256)
+    start = time.perf_counter()
+    for batch in key_batches:
+        cache.get_many(batch)
+        cache.put_many((key, key + 1) for key in batch[:batch_size // 5])
+    cache.close()
+    rows.append({"mode": "read-through/write-behind", "backend calls": calls, "seconds": time.perf_counter() - start})
+    print_table(f"Loading ({batches} batches of {batch_size} zipf keys, capacity {capacity:,})", rows)
+    return rows
+
+def bench_lfu_aging(capacity = 1_000, accesses = 400_000):
+    """Compare LFUCache with and without frequency aging on a zipf trace
+        whose popular keys change halfway through: hit ratio after the
+        change, frequency nodes left at the end and operation latencies"""
+    before = zipf_keys(100 * capacity, accesses // 2, seed = 0)
+    after = [key + 10**9 for key in zipf_keys(100 * capacity, accesses // 2, seed = 1)]
+    rows = []
+    for name, factory in (
+            ("LFUCache", lambda: LFUCache(capacity)),
+            ("LFUCache (decay_interval=10*capacity)", lambda: LFUCache(capacity, decay_interval = 10 * capacity))):
+        cache = factory()
+        measure_hit_ratio(cache, before)
+        hit_ratio = measure_hit_ratio(cache, after)
+        frequency_nodes = 0
+        frequency_node = cache.head.next
+        while frequency_node is not cache.tail:
+            frequency_nodes += 1
+            frequency_node = frequency_node.next
+        latencies = measure_latencies(factory(), before + after)
+        rows.append({
+            "cache": name,
+            "hit ratio after shift": hit_ratio,
+            "frequency nodes": frequency_nodes,
+            "p99 ns": percentile(latencies, 0.99),
+            "max ns": latencies[-1],
+        })
+    print_table(f"LFU aging (capacity {capacity:,}, {accesses:,} accesses)", rows)
+    return rows
+
+BENCHMARKS = {
+    "array_lru": bench_array_lru,
+    "sharded": bench_sharded,
+    "batch": bench_batch,
+    "admission": bench_admission,
+    "lfu_buckets": bench_lfu_buckets,
+    "node_churn": bench_node_churn,
+    "instrumentation": bench_instrumentation,
+    "sampled": bench_sampled,
+    "clock_reads": bench_clock_reads,
+    "arena": bench_arena,
+    "server": bench_server,
+    "vector": bench_vector,
+    "loading": bench_loading,
+    "lfu_aging": bench_lfu_aging,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("names", nargs = "*", metavar = "name",
+        help = "benchmarks to run, any of: " + ", ".join(BENCHMARKS) + " (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmark(s): " + ", ".join(unknown))
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,369 @@
+"""Trace-driven benchmark and hit-ratio simulator for the caches of this package
+
+Each access of a key trace is replayed as a look-up, followed by placing the
+key in the cache when the look-up misses. For every (workload, engine,
+capacity) combination the simulator reports throughput, p50/p99 latency per
+operation, peak memory and hit ratio as JSON, and it can compare the results
+against a stored baseline, exiting with status 1 on regressions.
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from ARC_Cache import ARCCache
+from Array_LRU_Cache import ArrayLRUCache
+from Clock_Cache import ClockCache
+from LFU_Cache import LFUCache
+from LRU_Cache import LRUCache
+from Sampled_Cache import SampledCache
+from TinyLFU import WTinyLFUCache
+
+ENGINES = {
+    "lru": LRUCache,
+    "lfu": LFUCache,
+    "lfu_aging": lambda capacity: LFUCache(capacity, decay_interval = 10 * capacity),
+    "array_lru": ArrayLRUCache,
+    "wtinylfu": WTinyLFUCache,
+    "arc": ARCCache,
+    "sampled_lru": lambda capacity: SampledCache(capacity, "lru", seed = 0),
+    "sampled_lfu": lambda capacity: SampledCache(capacity, "lfu", seed = 0),
+    "clock": ClockCache,
+}
+
+DEFAULT_TOLERANCES = {
+    "hit_ratio": 0.01,
+    "ops_per_sec": 0.2,
+    "p99_ns": 0.5,
+    "peak_memory_bytes": 0.2,
+}
+
+def zipf_keys(key_space, count, exponent = 1.0, seed = 0):
+    """Function to draw keys following a Zipf distribution
+
+        Args:
+            key_space (int) - keys are drawn from range(key_space), key 0 being
+                the most popular
+            count (int) - number of keys to draw
+            exponent (float) - skew of the distribution
+            seed (int) - random seed
+
+        Returns:
+            list - drawn keys
+    """
+    cumulative_weights = []
+    total = 0.0
+    for rank in range(1, key_space + 1):
+        total += 1.0 / rank ** exponent
+        cumulative_weights.append(total)
+    return random.Random(seed).choices(range(key_space), cum_weights = cumulative_weights, k = count)
+
+def uniform_keys(key_space, count, seed = 0):
+    """Function to draw keys uniformly at random
+
+        Args:
+            key_space (int) - keys are drawn from range(key_space)
+            count (int) - number of keys to draw
+            seed (int) - random seed
+
+        Returns:
+            list - drawn keys
+    """
+    rng = random.Random(seed)
+    return [rng.randrange(key_space) for _ in range(count)]
+
+def scan_keys(key_space, count, scan_length, scans = 10, seed = 0):
+    """Function to build a Zipf trace interrupted by sequential scans of keys
+        that are never seen again; scans are shortened if needed so that at
+        least half of the trace follows the Zipf distribution
+
+        Args:
+            key_space (int) - Zipf keys are drawn from range(key_space)
+            count (int) - total number of keys
+            scan_length (int) - number of keys in each scan
+            scans (int) - number of scans spread evenly over the trace
+            seed (int) - random seed
+
+        Returns:
+            list - trace of keys
+    """
+    scan_length = min(scan_length, count // (2 * scans))
+    keys = zipf_keys(key_space, count - scans * scan_length, seed = seed)
+    step = len(keys) // scans
+    trace = []
+    for scan in range(scans):
+        trace.extend(keys[scan * step:(scan + 1) * step])
+        first_key = key_space + scan * scan_length
+        trace.extend(range(first_key, first_key + scan_length))
+    trace.extend(keys[scans * step:])
+    return trace
+
+def loop_keys(loop_length, count):
+    """Function to build a trace cycling through the same keys in order
+
+        Args:
+            loop_length (int) - number of distinct keys in the loop
+            count (int) - number of keys
+
+        Returns:
+            list - trace of keys
+    """
+    return [index % loop_length for index in range(count)]
+
+def read_trace(path):
+    """Function to read a recorded key trace, one key per line; blank lines and
+        lines starting with # are skipped, and keys made of digits are read as
+        integers
+
+        Args:
+            path (str) - path to the trace file
+
+        Returns:
+            list - trace of keys
+    """
+    keys = []
+    with open(path) as trace_file:
+        for line in trace_file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            keys.append(int(line) if line.lstrip("-").isdigit() else line)
+    return keys
+
+def build_workload(name, capacity, count, seed = 0):
+    """Function to build one of the synthetic workloads, sized relative to the
+        cache capacity
+
+        Args:
+            name (str) - "zipf", "uniform", "scan" or "loop"
+            capacity (int) - capacity of the simulated cache
+            count (int) - number of accesses
+            seed (int) - random seed
+
+        Returns:
+            list - trace of keys
+    """
+    if name == "zipf":
+        return zipf_keys(100 * capacity, count, seed = seed)
+    if name == "uniform":
+        return uniform_keys(10 * capacity, count, seed = seed)
+    if name == "scan":
+        return scan_keys(100 * capacity, count, 5 * capacity, seed = seed)
+    if name == "loop":
+        return loop_keys(capacity + capacity // 10 + 1, count)
+    raise ValueError("Unknown workload: " + name)
+
+def measure_hit_ratio(cache, keys):
+    """Function to replay a key trace, placing each missed key in the cache
+
+        Args:
+            cache - cache exposing get_value and put_key_value
+            keys (list) - trace of keys to look up
+
+        Returns:
+            float - fraction of look ups that were hits, 0.0 for an empty
+            trace
+    """
+    if not keys:
+        return 0.0
+    hits = 0
+    for key in keys:
+        if cache.get_value(key) is None:
+            cache.put_key_value(key, True)
+        else:
+            hits += 1
+    return hits / len(keys)
+
+def measure_latencies(cache, keys):
+    """Function to replay a key trace, timing every get_value and put_key_value
+
+        Args:
+            cache - cache exposing get_value and put_key_value
+            keys (list) - trace of keys to look up
+
+        Returns:
+            list - sorted per-operation latencies in nanoseconds
+    """
+    clock = time.perf_counter_ns
+    get_value = cache.get_value
+    put_key_value = cache.put_key_value
+    latencies = []
+    for key in keys:
+        start = clock()
+        value = get_value(key)
+        latencies.append(clock() - start)
+        if value is None:
+            start = clock()
+            put_key_value(key, True)
+            latencies.append(clock() - start)
+    latencies.sort()
+    return latencies
+
+def measure_peak_memory(factory, keys):
+    """Function to measure the peak memory allocated while a fresh cache
+        replays a key trace
+
+        Args:
+            factory (callable) - builds an empty cache
+            keys (list) - trace of keys to look up
+
+        Returns:
+            int - peak bytes allocated
+    """
+    gc.collect()
+    tracemalloc.start()
+    measure_hit_ratio(factory(), keys)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def percentile(sorted_values, fraction):
+    """Function to pick a percentile from sorted values (nearest rank)
+
+        Args:
+            sorted_values (list) - values in increasing order
+            fraction (float) - percentile as a fraction, such as 0.99
+
+        Returns:
+            value at the requested percentile, None if there are no values
+    """
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def simulate(workload, engine, capacity, keys):
+    """Function to run every measurement of one engine on one key trace
+
+        Args:
+            workload (str) - name of the trace, used in the result
+            engine (str) - key into ENGINES
+            capacity (int) - capacity of the simulated cache
+            keys (list) - trace of keys to look up
+
+        Returns:
+            dict - result with throughput, latency, memory and hit ratio
+    """
+    factory = lambda: ENGINES[engine](capacity)
+    cache = factory()
+    operations = len(keys)
+    start = time.perf_counter()
+    hit_ratio = measure_hit_ratio(cache, keys)
+    elapsed = time.perf_counter() - start
+    operations += round(len(keys) * (1 - hit_ratio))
+    latencies = measure_latencies(factory(), keys)
+    return {
+        "workload": workload,
+        "engine": engine,
+        "capacity": capacity,
+        "accesses": len(keys),
+        "hit_ratio": hit_ratio,
+        "ops_per_sec": operations / elapsed if elapsed > 0 else 0.0,
+        "p50_ns": percentile(latencies, 0.5),
+        "p99_ns": percentile(latencies, 0.99),
+        "peak_memory_bytes": measure_peak_memory(factory, keys),
+    }
+
+def find_regressions(results, baseline, tolerances = DEFAULT_TOLERANCES):
+    """Function to compare results against a baseline; hit ratio is compared
+        in absolute terms and the other metrics relative to the baseline
+
+        Args:
+            results (list) - results produced by simulate
+            baseline (list) - results stored from an earlier run
+            tolerances (dict) - allowed change for each metric
+
+        Returns:
+            list - one message per regressed metric
+    """
+    stored = {(result["workload"], result["engine"], result["capacity"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = stored.get((result["workload"], result["engine"], result["capacity"]))
+        if previous is None:
+            continue
+        label = f"{result['workload']}/{result['engine']}/{result['capacity']}"
+        if result["hit_ratio"] < previous["hit_ratio"] - tolerances["hit_ratio"]:
+            regressions.append(f"{label}: hit_ratio {previous['hit_ratio']:.4f} -> {result['hit_ratio']:.4f}")
+        if result["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerances["ops_per_sec"]):
+            regressions.append(f"{label}: ops_per_sec {previous['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f}")
+        for metric in ("p99_ns", "peak_memory_bytes"):
+            if result[metric] is None or previous[metric] is None: # empty trace
+                continue
+            if result[metric] > previous[metric] * (1 + tolerances[metric]):
+                regressions.append(f"{label}: {metric} {previous[metric]} -> {result[metric]}")
+    return regressions
+
+def parse_tolerance(text):
+    """Function to parse a metric=value command line tolerance
+
+        Args:
+            text (str) - such as "ops_per_sec=0.3"
+
+        Returns:
+            tuple - (metric, allowed change)
+    """
+    metric, _, value = text.partition("=")
+    if metric not in DEFAULT_TOLERANCES:
+        raise argparse.ArgumentTypeError("unknown metric: " + metric)
+    return metric, float(value)
+
+def main(argv = None):
+    """Function to run the simulator from the command line
+
+        Args:
+            argv (list) - command line arguments, sys.argv[1:] by default
+
+        Returns:
+            int - exit status, 1 if a regression was found
+    """
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--workload", action = "append", choices = ["zipf", "uniform", "scan", "loop"],
+        help = "synthetic workload to replay, may be repeated (default: all)")
+    parser.add_argument("--trace", action = "append", default = [],
+        help = "recorded key trace file, one key per line, may be repeated")
+    parser.add_argument("--engine", action = "append", choices = list(ENGINES),
+        help = "cache engine to simulate, may be repeated (default: lru, lfu and arc)")
+    parser.add_argument("--capacity", action = "append", type = int,
+        help = "cache capacity, may be repeated (default: 1000)")
+    parser.add_argument("--accesses", type = int, default = 100_000,
+        help = "number of accesses in each synthetic workload")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--output", help = "write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help = "JSON results to compare against; exit with status 1 on regressions")
+    parser.add_argument("--tolerance", action = "append", type = parse_tolerance, default = [],
+        help = "allowed change of a metric as metric=value, overriding the defaults " + str(DEFAULT_TOLERANCES))
+    args = parser.parse_args(argv)
+
+    workloads = args.workload if args.workload is not None else ([] if args.trace else ["zipf", "uniform", "scan", "loop"])
+    traces = {path: read_trace(path) for path in args.trace}
+    results = []
+    for capacity in args.capacity or [1000]:
+        named_traces = [(name, build_workload(name, capacity, args.accesses, args.seed)) for name in workloads]
+        named_traces += list(traces.items())
+        for name, keys in named_traces:
+            for engine in args.engine or ["lru", "lfu", "arc"]:
+                results.append(simulate(name, engine, capacity, keys))
+
+    report = json.dumps({"results": results}, indent = 2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file)["results"],
+                dict(DEFAULT_TOLERANCES, **dict(args.tolerance)))
+        for regression in regressions:
+            print("REGRESSION " + regression, file = sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
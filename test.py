@@ -1,11 +1,43 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import socket
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
 from CacheNode import CacheNode
 from LRUNode import LRUNode
 from LFUNode import LFUNode
-from Cache import Cache
+from Cache import Cache, CacheStats
 from LRU_Cache import LRUCache
+import LFU_Cache
 from LFU_Cache import LFUCache
+from Arena_LRU_Cache import ArenaLRUCache
+from Cache_Server import CacheClient, CacheServer, CacheServerError
+from Loading_Cache import LoadingLFUCache, LoadingLRUCache
+from Array_LRU_Cache import ArrayLRUCache
+from Clock_Cache import ClockCache
+from ARC_Cache import ARCCache
+from Concurrent_Cache import ConcurrentLFUCache, ConcurrentLRUCache
+from Memoize import cached
+from Async_Cache import AsyncLFUCache, AsyncLRUCache
+from Sampled_Cache import SampledCache
+from Shared_LRU_Cache import SharedLRUCache
+from Tiered_Cache import DiskStore, TieredCache
+from TinyLFU import CountMinSketch, WTinyLFUCache
+import simulator
+
+try:
+    import numpy
+    from Vector_Cache import VectorCache
+except ImportError:
+    numpy = None
 
 class TestCacheNode(unittest.TestCase):
     def setUp(self):
@@ -50,16 +82,64 @@ class TestLRUNode(unittest.TestCase):
     def test_string_representation(self):
         self.assertEqual(repr(self.lru_node), "(key: 3, value: 7)", "LRU node's representation is inaccurate")
 
+    def test_slots(self):
+        self.assertFalse(hasattr(self.lru_node, "__dict__"), "LRU node has an instance dictionary")
+        self.assertFalse(hasattr(LFUNode(1), "__dict__"), "LFU node has an instance dictionary")
+        self.lru_node.expires_at = 5.0
+        self.lru_node.weight = 4
+        self.assertIs(self.lru_node.reuse(8, 9), self.lru_node, "Reused node is a different node")
+        self.assertEqual((self.lru_node.key, self.lru_node.value), (8, 9), "Reused node has an incorrect entry")
+        self.assertEqual((self.lru_node.weight, self.lru_node.expires_at), (1, None), "Reused node kept old state")
+
+class TestNodeRecycling(unittest.TestCase):
+    def test_lru_eviction_reuses_node(self):
+        lru_cache = LRUCache(2)
+        lru_cache.put_key_value(1, 1, ttl = 60)
+        lru_cache.put_key_value(2, 2)
+        evicted_node = lru_cache.key_node_map[1]
+        lru_cache.put_key_value(3, 3)
+        self.assertIs(lru_cache.key_node_map[3], evicted_node, "Evicted node was not reused")
+        self.assertEqual(evicted_node.expires_at, None, "Reused node kept the evicted entry's expiry")
+        lru_cache.put_many([(4, 4), (5, 5)])
+        self.assertEqual(lru_cache.get_value(3), None, "Incorrect eviction")
+        self.assertEqual(lru_cache.get_value(4), 4, "Incorrect value")
+        self.assertIs(type(lru_cache.head), CacheNode, "Head sentinel carries a payload")
+
+    def test_lfu_eviction_reuses_nodes(self):
+        lfu_cache = LFUCache(2)
+        lfu_cache.put_key_value(1, 1)
+        lfu_cache.put_key_value(2, 2)
+        lfu_cache.get_value(2)
+        evicted_node = lfu_cache.key_node_map[1]
+        frequency_one = lfu_cache.key_to_frequency_node[1]
+        lfu_cache.put_key_value(3, 3)
+        self.assertIs(lfu_cache.key_node_map[3], evicted_node, "Evicted node was not reused")
+        self.assertIs(lfu_cache.key_to_frequency_node[3], frequency_one, "Removed frequency node was not reused")
+        self.assertEqual(lfu_cache.free_frequency_nodes, [], "Reused frequency node is still kept")
+        lfu_cache.remove_key(2)
+        self.assertEqual(lfu_cache.free_frequency_nodes[0].size, 0, "Kept frequency node has entries")
+        lfu_cache.get_value(3)
+        self.assertEqual(lfu_cache.key_to_frequency_node[3].key, 2, "Incorrect frequency")
+
 class TestLFUNode(unittest.TestCase):
     def setUp(self):
-        self.lfu_node = LFUNode(5, 20)
+        self.lfu_node = LFUNode(5)
 
     def test_LFU_node_initialization(self):
-        self.assertEqual(self.lfu_node.frequency_cache.capacity, 20, "LFU node's frequency cache has an incorrect capacity")
-        self.assertEqual(self.lfu_node.frequency_cache.size, 0, "LFU node's frequency cache has an incorrect size")
+        self.assertEqual(self.lfu_node.size, 0, "LFU node has an incorrect size")
+        self.assertIs(self.lfu_node.entry_head.next, self.lfu_node.entry_head, "LFU node's entry list is not empty")
+
+    def test_entries_in_recency_order(self):
+        first_node, second_node = LRUNode(1, 2), LRUNode(3, 4)
+        self.lfu_node.add_entry(first_node)
+        self.lfu_node.add_entry(second_node)
+        self.assertEqual(self.lfu_node.size, 2, "LFU node has an incorrect size")
+        self.assertIs(self.lfu_node.least_recent_entry(), first_node, "Incorrect least recent entry")
+        self.assertIs(self.lfu_node.remove_entry(first_node), first_node, "Incorrect removed entry")
+        self.assertIs(self.lfu_node.least_recent_entry(), second_node, "Incorrect least recent entry")
 
     def test_string_representation(self):
-        res = "Frequency: 5\nSub LRU Cache:\nNodes:\n\n"
+        res = "Frequency: 5\nEntries:\n"
         self.assertEqual(repr(self.lfu_node), res, "LFU node's representation is inaccurate")
 
 class TestCache(unittest.TestCase):
@@ -102,6 +182,49 @@ class TestLRUCache(unittest.TestCase):
         self.lru_cache.put_key_value(6,13)
         self.assertEqual(self.lru_cache.get_value(5), None, "Incorrect value for evicted key 5")
 
+class TestArrayLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.array_cache = ArrayLRUCache(3)
+        self.array_cache.put_key_value(1,3)
+        self.array_cache.put_key_value(2,5)
+
+    def test_get_value(self):
+        self.assertEqual(self.array_cache.get_value(1), 3, "Incorrect value for 1")
+        self.assertEqual(self.array_cache.get_value(2), 5, "Incorrect value for 2")
+        self.assertEqual(self.array_cache.get_value(3), None, "Incorrect value for key not in cache")
+
+    def test_put_key_value(self):
+        self.array_cache.put_key_value(3,7)
+        self.array_cache.put_key_value(4,9)
+        self.assertEqual(self.array_cache.get_value(1), None, "Incorrect value for evicted key 1")
+        self.assertEqual(self.array_cache.get_value(2), 5, "Incorrect value for key 2")
+        self.array_cache.put_key_value(5,11)
+        self.assertEqual(self.array_cache.get_value(3), None, "Incorrect value for evicted key 3")
+        self.assertEqual(self.array_cache.get_value(4), 9, "Incorrect value for key 4")
+        self.array_cache.put_key_value(2,8)
+        self.array_cache.put_key_value(6,13)
+        self.assertEqual(self.array_cache.get_value(5), None, "Incorrect value for evicted key 5")
+        self.assertEqual(self.array_cache.get_value(2), 8, "Incorrect value for updated key 2")
+
+    def test_evicted_slots_are_reused(self):
+        self.assertEqual(self.array_cache.evict_LRU_entry(), (1, 3), "Incorrect evicted entry")
+        self.assertEqual(self.array_cache.size, 1, "Incorrect size after eviction")
+        for key in range(10, 20):
+            self.array_cache.put_key_value(key, key)
+        self.assertEqual(sorted(self.array_cache.key_node_map.values()), [1, 2, 3], "Slots outside the preallocated range were used")
+        self.assertEqual(len(self.array_cache.slot_keys), 4, "Slot arrays grew")
+        self.assertEqual(self.array_cache.get_value(17), 17, "Incorrect value for key 17")
+        self.assertEqual(self.array_cache.get_value(16), None, "Incorrect value for evicted key 16")
+
+    def test_remove_key(self):
+        self.assertEqual(self.array_cache.remove_key(1), (1, 3), "Incorrect removed entry")
+        self.assertEqual(self.array_cache.remove_key(1), None, "Missing key was removed")
+        self.assertEqual(self.array_cache.size, 1, "Incorrect size after removal")
+        for key in range(10, 13):
+            self.array_cache.put_key_value(key, key)
+        self.assertEqual(self.array_cache.get_value(2), None, "Least recently used entry was not evicted")
+        self.assertEqual(sorted(self.array_cache.key_node_map.values()), [1, 2, 3], "Removed slot was not reused")
+
 class TestLFUCache(unittest.TestCase):
     def setUp(self):
         self.lfu_cache_1 = LFUCache(1)
@@ -121,15 +244,8 @@ class TestLFUCache(unittest.TestCase):
         self.assertEqual(self.lfu_cache_1.head.prev, None, "Head does not have None prev")
         self.assertEqual(self.lfu_cache_1.tail.next, None, "Tail does not have None next")
 
-        head_fc = self.lfu_cache_1.head.frequency_cache
-        self.assertEqual(head_fc.capacity, 1, "Head frequency cache capacity is not 1")
-        self.assertEqual(head_fc.size, 0, "Head frequency cache size is not 0")
-        self.assertEqual(head_fc.top_level_frequency, 0, "Head frequency cache top level frequency is incorrect")
-
-        tail_fc = self.lfu_cache_1.tail.frequency_cache
-        self.assertEqual(tail_fc.capacity, 1, "Tail frequency cache capacity is not 1")
-        self.assertEqual(tail_fc.size, 0, "Tail frequency cache size is not 0")
-        self.assertEqual(tail_fc.top_level_frequency, 0, "Tail frequency cache top level frequency is incorrect")
+        self.assertIs(type(self.lfu_cache_1.head), CacheNode, "Head sentinel carries a frequency payload")
+        self.assertIs(type(self.lfu_cache_1.tail), CacheNode, "Tail sentinel carries a frequency payload")
 
     def test_capacity_one_operations(self):
         self.assertEqual(self.lfu_cache_1.get_value(3), None, "Entry not in cache has non-None value")
@@ -204,5 +320,1270 @@ class TestLFUCache(unittest.TestCase):
         self.assertEqual(self.lfu_cache_3.get_value(7), 15, "Incorrect entry value")
         self.assertEqual(self.lfu_cache_3.get_value(8), 23, "Incorrect entry value")
 
+class TestWeightedCapacity(unittest.TestCase):
+    def setUp(self):
+        self.lru_cache = LRUCache(10, weigher = len)
+        self.lfu_cache = LFUCache(10, weigher = len)
+
+    def test_evicts_until_new_value_fits(self):
+        for cache in (self.lru_cache, self.lfu_cache):
+            cache.put_key_value(1, "aaa")
+            cache.put_key_value(2, "bbb")
+            cache.put_key_value(3, "ccc")
+            self.assertEqual(cache.get_size(), (3, 9), "Incorrect size after insertions")
+            self.assertEqual(cache.is_at_capacity(), False, "Cache is incorrectly at capacity")
+            cache.put_key_value(4, "dddddd")
+            self.assertEqual(cache.get_size(), (2, 9), "Incorrect size after evictions")
+            self.assertEqual(cache.get_value(1), None, "Least used key 1 was not evicted")
+            self.assertEqual(cache.get_value(2), None, "Least used key 2 was not evicted")
+            self.assertEqual(cache.get_value(4), "dddddd", "Incorrect value for key 4")
+
+    def test_growing_update_evicts_other_entries(self):
+        for cache in (self.lru_cache, self.lfu_cache):
+            cache.put_key_value(1, "aaaa")
+            cache.get_value(1)
+            cache.put_key_value(2, "bb")
+            cache.put_key_value(2, "bbbbbbbb")
+            self.assertEqual(cache.get_size(), (1, 8), "Incorrect size after growing update")
+            self.assertEqual(cache.get_value(2), "bbbbbbbb", "Updated entry was evicted")
+            self.assertEqual(cache.get_value(1), None, "Other entry was not evicted")
+
+    def test_oversized_values_are_rejected(self):
+        for cache in (self.lru_cache, self.lfu_cache):
+            cache.put_key_value(1, "a")
+            self.assertRaises(ValueError, cache.put_key_value, 1, "a" * 11)
+            self.assertRaises(ValueError, cache.put_key_value, 2, "")
+            self.assertEqual(cache.get_value(1), "a", "Rejected value replaced the existing one")
+            self.assertEqual(cache.get_size(), (1, 1), "Rejected values changed the size")
+
+    def test_unweighted_size(self):
+        lru_cache = LRUCache(3)
+        lru_cache.put_many([(1, "abc"), (2, "de")])
+        self.assertEqual(lru_cache.get_size(), (2, 2), "Unweighted entries do not weigh 1")
+
+    def test_weighted_batch_and_sharded(self):
+        self.lfu_cache.put_many([(key, "xx") for key in range(8)])
+        self.assertEqual(self.lfu_cache.get_size(), (5, 10), "Incorrect size after weighted put_many")
+        sharded = ConcurrentLRUCache(20, 2, weigher = len)
+        sharded.put_many([(key, "xxxx") for key in range(10)])
+        self.assertEqual(sharded.get_size()[1] <= 20, True, "Sharded cache exceeded its weight capacity")
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestExpiry(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.caches = [LRUCache(3, clock = self.clock), LFUCache(3, clock = self.clock)]
+
+    def test_expired_entries_are_misses(self):
+        for cache in self.caches:
+            cache.put_key_value(1, 3, ttl = 5)
+            cache.put_key_value(2, 5)
+            self.clock.now += 4
+            self.assertEqual(cache.get_value(1), 3, "Entry expired early")
+            self.clock.now += 1
+            self.assertEqual(cache.get_value(1), None, "Expired entry was returned")
+            self.assertEqual(cache.is_key_in_cache(1), False, "Expired entry is still in the cache")
+            self.assertEqual(cache.get_many([1, 2]), [None, 5], "Incorrect values after expiry")
+            self.assertEqual(cache.size, 1, "Expired entry still counts towards the size")
+            self.clock.now = 0.0
+
+    def test_default_ttl_and_update(self):
+        for cache_class in (LRUCache, LFUCache):
+            cache = cache_class(3, default_ttl = 10, clock = self.clock)
+            cache.put_key_value(1, 3)
+            cache.put_key_value(2, 5, ttl = 20)
+            self.clock.now = 8
+            cache.put_key_value(1, 4)
+            self.clock.now = 15
+            self.assertEqual(cache.get_many([1, 2]), [4, 5], "Updated entry kept its original expiry")
+            self.clock.now = 19
+            self.assertEqual(cache.get_value(1), None, "Entry outlived the default time to live")
+            self.assertEqual(cache.get_value(2), 5, "Entry expired before its own time to live")
+            self.clock.now = 0.0
+        self.assertRaises(ValueError, LRUCache, 3, default_ttl = 0)
+        self.assertRaises(ValueError, self.caches[1].put_key_value, 1, 1, -1)
+
+    def test_lfu_expiry_collapses_frequency_nodes(self):
+        lfu_cache = self.caches[1]
+        lfu_cache.put_key_value(1, 3, ttl = 1)
+        lfu_cache.get_value(1)
+        lfu_cache.put_key_value(2, 5)
+        self.clock.now = 2
+        self.assertEqual(lfu_cache.reap_expired(), 1, "Expired entry was not reaped")
+        self.assertEqual(lfu_cache.head.next.key, 1, "Incorrect remaining frequency node")
+        self.assertEqual(lfu_cache.head.next.next, lfu_cache.tail, "Empty frequency node was not removed")
+        self.assertEqual(len(lfu_cache.key_to_frequency_node), 1, "Expired key still has a frequency node")
+
+    def test_stale_heap_items_are_dropped(self):
+        lru_cache = self.caches[0]
+        for _ in range(500):
+            lru_cache.put_key_value(1, 3, ttl = 100)
+        self.assertEqual(len(lru_cache.expiry_heap) <= 2 * lru_cache.size + 64, True, "Expiry heap kept stale items")
+        lru_cache.put_key_value(1, 3)
+        self.clock.now = 200
+        self.assertEqual(lru_cache.get_value(1), 3, "Entry without a time to live expired")
+
+    def test_remove_key(self):
+        for cache in self.caches:
+            cache.put_key_value(1, 3)
+            self.assertEqual(cache.remove_key(1).value, 3, "Incorrect removed node")
+            self.assertEqual(cache.remove_key(1), None, "Missing key was removed")
+            self.assertEqual((cache.size, len(cache.key_node_map)), (0, 0), "Removal left the entry behind")
+
+class TestBatchOperations(unittest.TestCase):
+    def replay(self, cache_class, batched):
+        rng = random.Random(7)
+        cache = cache_class(8)
+        results = []
+        for _ in range(300):
+            keys = [rng.randrange(16) for _ in range(rng.randrange(1, 12))]
+            if rng.random() < 0.5:
+                if batched:
+                    results.append(cache.get_many(keys))
+                else:
+                    results.append([cache.get_value(key) for key in keys])
+            else:
+                items = [(key, rng.randrange(100)) for key in keys]
+                if batched:
+                    cache.put_many(items)
+                else:
+                    for key, value in items:
+                        cache.put_key_value(key, value)
+        return results, repr(cache)
+
+    def test_matches_sequential_semantics(self):
+        for cache_class in (LRUCache, LFUCache):
+            self.assertEqual(self.replay(cache_class, True), self.replay(cache_class, False),
+                "Batch operations diverged from sequential operations for " + cache_class.__name__)
+
+    def test_put_many_accepts_mapping(self):
+        lru_cache = LRUCache(2)
+        lru_cache.put_many({1: 3, 2: 5, 3: 7})
+        self.assertEqual(lru_cache.get_many([1, 2, 3]), [None, 5, 7], "Incorrect values after put_many")
+
+    def test_frequency_nodes_allocated_once(self):
+        lfu_cache = LFUCache(4)
+        lfu_cache.put_many([(1, 3), (2, 5)])
+        with mock.patch.object(LFU_Cache, "LFUNode", wraps = LFU_Cache.LFUNode) as frequency_node_class:
+            self.assertEqual(lfu_cache.get_many([1, 1, 2, 2]), [3, 3, 5, 5], "Incorrect values from get_many")
+        self.assertEqual(frequency_node_class.call_count, 1, "Frequency nodes were allocated more than once")
+        self.assertEqual(lfu_cache.head.next.key, 3, "Emptied frequency nodes were not removed")
+        self.assertEqual(lfu_cache.head.next.next, lfu_cache.tail, "Emptied frequency nodes were not removed")
+
+    def test_sharded_batch_operations(self):
+        cache = ConcurrentLFUCache(12, 3)
+        cache.put_many((key, key * 2) for key in range(6))
+        self.assertEqual(cache.get_many([5, 6, 0]), [10, None, 0], "Incorrect values from sharded get_many")
+
+class TestArenaLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.arena_cache = ArenaLRUCache(3, slab_size = 1024, min_chunk_size = 16)
+
+    def test_views(self):
+        self.arena_cache.put_key_value(1, b"first")
+        view = self.arena_cache.get_value(1)
+        self.assertIsInstance(view, memoryview, "Value is not a memoryview")
+        self.assertEqual(view, b"first", "Incorrect value")
+        self.assertEqual(view.readonly, True, "View is writable")
+        self.assertIs(self.arena_cache.get_value(1), view, "View was not made once per value")
+        self.arena_cache.put_key_value(1, b"second")
+        self.assertRaises(ValueError, len, view)
+        self.assertEqual(self.arena_cache.get_value(1), b"second", "Incorrect overwritten value")
+
+    def test_chunk_reuse(self):
+        for key in range(100):
+            self.arena_cache.put_key_value(key, bytes([key]) * (key % 40))
+        self.assertEqual(self.arena_cache.arena_bytes, 3 * 1024, "Freed chunks were not reused")
+        self.assertEqual(self.arena_cache.get_value(99), bytes([99]) * 19, "Incorrect value")
+        self.assertEqual(self.arena_cache.get_value(97), bytes([97]) * 17, "Incorrect value")
+        self.assertEqual(self.arena_cache.leaked_bytes, 0, "Chunks were leaked")
+        self.assertRaises(ValueError, self.arena_cache.put_key_value, 0, bytes(2048))
+
+    def test_exported_view_leaks_chunk(self):
+        self.arena_cache.put_key_value(1, b"x" * 20)
+        export = pickle.PickleBuffer(self.arena_cache.get_value(1))
+        self.arena_cache.remove_key(1)
+        self.assertEqual(self.arena_cache.leaked_bytes, 32, "Exported chunk was not leaked")
+        self.arena_cache.put_key_value(2, b"y" * 20)
+        self.assertEqual(export.raw(), b"x" * 20, "Exported chunk was reused")
+
+    def test_expiry_and_options(self):
+        now = [0.0]
+        evicted = []
+        arena_cache = ArenaLRUCache(2, slab_size = 1024, min_chunk_size = 16, default_ttl = 1,
+            clock = lambda: now[0], record_stats = True, on_evict = lambda key, value: evicted.append((key, value)))
+        arena_cache.put_key_value(0, b"a" * 10)
+        arena_cache.put_key_value(1, b"b" * 10)
+        now[0] = 2.0
+        arena_cache.put_key_value(1, b"c" * 10) # the entry expires during this put
+        self.assertEqual(arena_cache.get_value(1), b"c" * 10, "Chunk of the new value was freed")
+        arena_cache.put_key_value(2, b"d" * 10)
+        self.assertEqual(arena_cache.get_value(1), b"c" * 10, "Chunk of a live value was reused")
+        self.assertEqual(arena_cache.size, 2, "Expired entry was kept")
+        self.assertEqual(arena_cache.stats().inserts, 4, "Inserts were not counted")
+        weighted_cache = ArenaLRUCache(30, slab_size = 1024, min_chunk_size = 16, weigher = len,
+            on_evict = lambda key, value: evicted.append((key, value)))
+        weighted_cache.put_many({1: b"x" * 10, 2: b"y" * 10, 3: b"z" * 10})
+        weighted_cache.put_key_value(3, b"z" * 20)
+        self.assertEqual(weighted_cache.get_size(), (2, 30), "Weights were not applied")
+        self.assertEqual(evicted, [(1, b"x" * 10)], "Evicted value was not passed to on_evict")
+
+    def test_snapshot(self):
+        for key in range(4):
+            self.arena_cache.put_key_value(key, str(key).encode() * 10)
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self.arena_cache.save_snapshot(path)
+            restored_cache = ArenaLRUCache(3)
+            self.assertEqual(restored_cache.load_snapshot(path), 3, "Incorrect number of entries restored")
+            self.assertEqual(restored_cache.tail.prev.key, 1, "Restored cache has a different order")
+            self.assertEqual(restored_cache.get_many([3, 2, 1, 0]), [b"3" * 10, b"2" * 10, b"1" * 10, None],
+                "Incorrect restored values")
+        finally:
+            os.remove(path)
+
+class TestConcurrentCache(unittest.TestCase):
+    def setUp(self):
+        self.lru_cache = ConcurrentLRUCache(10, 3)
+        self.lfu_cache = ConcurrentLFUCache(10, 3)
+
+    def test_initialization(self):
+        self.assertEqual([shard.capacity for shard in self.lru_cache.shards], [4, 3, 3], "Shard capacities are incorrect")
+        self.assertEqual(self.lru_cache.capacity, 10, "Aggregate capacity is incorrect")
+        self.assertEqual(self.lru_cache.size, 0, "Initial size is not 0")
+        self.assertRaises(ValueError, ConcurrentLRUCache, 2, 3)
+        self.assertRaises(ValueError, ConcurrentLFUCache, 10, 0)
+
+    def test_operations(self):
+        for cache in (self.lru_cache, self.lfu_cache):
+            for key in range(30):
+                cache.put_key_value(key, key * 2)
+            self.assertEqual(cache.size, 10, "Aggregate size is incorrect")
+            self.assertEqual(cache.is_at_capacity(), True, "Cache is not at capacity")
+            self.assertEqual(cache.get_value(29), 58, "Incorrect value for most recent key")
+            self.assertEqual(cache.get_value(0), None, "Incorrect value for evicted key")
+
+    def test_per_shard_eviction_order(self):
+        for key in range(100):
+            self.lru_cache.put_key_value(key, key)
+        for index, shard in enumerate(self.lru_cache.shards):
+            expected = [key for key in range(100) if self.lru_cache.shard_index(key) == index][-shard.capacity:]
+            self.assertEqual(sorted(shard.key_node_map), expected, "Shard did not keep its most recent keys")
+
+    def test_parallel_access(self):
+        def worker(offset):
+            for key in range(offset, offset + 2000):
+                self.lfu_cache.put_key_value(key % 50, key)
+                self.lfu_cache.get_value((key + 7) % 50)
+        threads = [threading.Thread(target = worker, args = (offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.lfu_cache.size, 10, "Aggregate size is incorrect after parallel access")
+        for shard in self.lfu_cache.shards:
+            self.assertEqual(len(shard.key_node_map), shard.size, "Shard map and size disagree")
+
+class TestCached(unittest.TestCase):
+    def test_none_results_are_cached(self):
+        calls = []
+        @cached(capacity = 2)
+        def lookup(key):
+            calls.append(key)
+            return None
+        self.assertEqual(lookup(1), None, "Incorrect result")
+        self.assertEqual(lookup(1), None, "Incorrect cached result")
+        self.assertEqual(calls, [1], "None result was not cached")
+        self.assertEqual(lookup.cache_info().hits, 1, "Incorrect hit count")
+
+    def test_cache_info(self):
+        @cached(policy = "lfu", capacity = 2)
+        def square(x, offset = 0):
+            return x * x + offset
+        square(2)
+        square(2)
+        square(3)
+        square(3, offset = 1)
+        square(2)
+        info = square.cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions), (2, 3, 1), "Incorrect statistics")
+        self.assertEqual((info.maxsize, info.currsize), (2, 2), "Incorrect sizes")
+        self.assertEqual(square(3, offset = 1), 10, "Incorrect result for keyword arguments")
+        square.cache_clear()
+        self.assertEqual(square.cache_info(), (0, 0, 0, 2, 0), "Statistics were not cleared")
+
+    def test_bare_decorator_and_invalid_policy(self):
+        @cached
+        def identity(x):
+            return x
+        self.assertEqual(identity("a"), "a", "Incorrect result")
+        self.assertEqual(identity.__name__, "identity", "Function metadata was not kept")
+        self.assertRaises(ValueError, cached, policy = "fifo")
+
+    def test_exceptions_are_not_cached(self):
+        calls = []
+        @cached
+        def fail(x):
+            calls.append(x)
+            raise KeyError(x)
+        self.assertRaises(KeyError, fail, 1)
+        self.assertRaises(KeyError, fail, 1)
+        self.assertEqual(len(calls), 2, "Exception was cached")
+
+    def test_concurrent_calls_are_coalesced(self):
+        calls = []
+        release = threading.Event()
+        @cached(capacity = 4)
+        def slow(x):
+            calls.append(x)
+            release.wait()
+            return x + 1
+        results = []
+        threads = [threading.Thread(target = lambda: results.append(slow(1))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        while slow.cache_info().misses < 6:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [1], "Concurrent calls were not coalesced")
+        self.assertEqual(results, [2] * 6, "Waiting calls received an incorrect result")
+
+class TestAsyncCache(unittest.TestCase):
+    def test_concurrent_misses_share_one_load(self):
+        async def scenario(cache):
+            calls = []
+            async def loader(key):
+                calls.append(key)
+                await asyncio.sleep(0.01)
+                return key * 10
+            results = await asyncio.gather(*(cache.get_or_load(4, loader) for _ in range(20)))
+            cached_result = await cache.get_or_load(4, loader)
+            return calls, results, cached_result
+        for cache in (AsyncLRUCache(2), AsyncLFUCache(2)):
+            calls, results, cached_result = asyncio.run(scenario(cache))
+            self.assertEqual(calls, [4], "Concurrent misses were not coalesced")
+            self.assertEqual(results, [40] * 20, "Waiters received an incorrect value")
+            self.assertEqual(cached_result, 40, "Loaded value was not cached")
+            self.assertEqual(cache.in_flight, {}, "In-flight load was not cleared")
+
+    def test_loader_errors_propagate_and_are_not_cached(self):
+        async def scenario(cache):
+            async def loader(key):
+                await asyncio.sleep(0)
+                raise LookupError(key)
+            results = await asyncio.gather(*(cache.get_or_load(1, loader) for _ in range(3)), return_exceptions = True)
+            return results
+        cache = AsyncLRUCache(2)
+        results = asyncio.run(scenario(cache))
+        self.assertEqual([type(result) for result in results], [LookupError] * 3, "Error did not reach every waiter")
+        self.assertEqual(cache.is_key_in_cache(1), False, "Failed load was cached")
+
+    def test_loading_entries_survive_eviction(self):
+        async def scenario(cache):
+            release = asyncio.Event()
+            async def loader(key):
+                await release.wait()
+                return key
+            task = asyncio.ensure_future(cache.get_or_load(100, loader))
+            await asyncio.sleep(0)
+            for key in range(5):
+                cache.put_key_value(key, key)
+            loading = cache.is_loading(100)
+            release.set()
+            return loading, await task
+        cache = AsyncLFUCache(2)
+        loading, result = asyncio.run(scenario(cache))
+        self.assertEqual(loading, True, "Load was dropped by evictions")
+        self.assertEqual(result, 100, "Incorrect loaded value")
+        self.assertEqual(cache.get_value(100), 100, "Loaded value was not cached")
+
+class TestCountMinSketch(unittest.TestCase):
+    def test_estimate_and_aging(self):
+        sketch = CountMinSketch(64, sample_size = 1000)
+        for _ in range(6):
+            sketch.increment("hot")
+        sketch.increment("warm")
+        self.assertEqual(sketch.estimate("hot") >= 6, True, "Estimate is below the true count")
+        self.assertEqual(sketch.estimate("warm") >= 1, True, "Estimate is below the true count")
+        for _ in range(30):
+            sketch.increment("hot")
+        self.assertEqual(sketch.estimate("hot"), CountMinSketch.MAX_COUNT, "Counter did not saturate")
+        sketch.age()
+        self.assertEqual(sketch.estimate("hot"), CountMinSketch.MAX_COUNT // 2, "Counters were not halved")
+
+    def test_periodic_aging(self):
+        sketch = CountMinSketch(16, sample_size = 10)
+        for _ in range(10):
+            sketch.increment(1)
+        self.assertEqual(sketch.estimate(1), 5, "Counters were not aged after the sample size")
+        self.assertEqual(sketch.additions, 5, "Addition count was not halved")
+
+class TestWTinyLFUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = WTinyLFUCache(10, window_ratio = 0.2)
+
+    def test_initialization(self):
+        self.assertEqual((self.cache.window.capacity, self.cache.main.capacity), (2, 8), "Incorrect window and main capacities")
+        self.assertRaises(ValueError, WTinyLFUCache, 1)
+        self.assertRaises(ValueError, WTinyLFUCache, 10, main_policy = "fifo")
+
+    def test_get_and_put(self):
+        for key in range(10):
+            self.cache.put_key_value(key, key * 2)
+        self.assertEqual(self.cache.size, 10, "Incorrect size")
+        self.assertEqual([self.cache.get_value(key) for key in range(10)], [key * 2 for key in range(10)], "Incorrect values")
+        self.cache.put_key_value(3, 7)
+        self.assertEqual(self.cache.get_value(3), 7, "Incorrect updated value")
+
+    def test_scan_does_not_flush_frequent_keys(self):
+        for main_policy in ("lru", "lfu"):
+            cache = WTinyLFUCache(10, window_ratio = 0.2, main_policy = main_policy)
+            for _ in range(5):
+                for key in range(8):
+                    if cache.get_value(key) is None:
+                        cache.put_key_value(key, key)
+            for key in range(100, 200):
+                if cache.get_value(key) is None:
+                    cache.put_key_value(key, key)
+            self.assertEqual(all(cache.is_key_in_cache(key) for key in range(8)), True, "Scan flushed frequent keys")
+            self.assertEqual(cache.size, 10, "Incorrect size after scan")
+
+class TestARCCache(unittest.TestCase):
+    def setUp(self):
+        self.arc_cache = ARCCache(4)
+
+    def test_lists(self):
+        for key in range(4):
+            self.arc_cache.put_key_value(key, key * 2)
+        self.arc_cache.get_value(0)
+        self.arc_cache.put_key_value(4, 8)
+        self.assertEqual((self.arc_cache.t1.size, self.arc_cache.t2.size), (3, 1), "Incorrect resident list sizes")
+        self.assertEqual(list(self.arc_cache.ghost_node_map), [1], "Evicted key is not remembered in B1")
+        self.assertEqual(self.arc_cache.get_value(1), None, "Evicted key has a value")
+        self.arc_cache.put_key_value(1, 3)
+        self.assertEqual(self.arc_cache.target_t1_size, 1, "Target size of T1 did not grow on a B1 hit")
+        self.assertIs(self.arc_cache.key_list_map[1], self.arc_cache.t2, "Key remembered in B1 did not enter T2")
+        self.assertEqual(self.arc_cache.get_value(1), 3, "Incorrect value")
+
+    def test_invariants(self):
+        rng = random.Random(5)
+        values = dict()
+        for _ in range(3000):
+            key = rng.randrange(12)
+            if rng.random() < 0.5:
+                value = self.arc_cache.get_value(key)
+                self.assertIn(value, (None, values.get(key)), "Incorrect value")
+            else:
+                self.arc_cache.put_key_value(key, rng.random())
+                values[key] = self.arc_cache.key_node_map[key].value
+            arc_cache = self.arc_cache
+            self.assertEqual(arc_cache.t1.size + arc_cache.t2.size, arc_cache.size, "Incorrect size")
+            self.assertLessEqual(arc_cache.size, 4, "Capacity exceeded")
+            self.assertLessEqual(arc_cache.t1.size + arc_cache.b1.size, 4, "T1 and B1 exceed the capacity")
+            self.assertLessEqual(arc_cache.size + arc_cache.b1.size + arc_cache.b2.size, 8, "Too many keys remembered")
+
+    def test_adapts_to_scans(self):
+        trace = simulator.scan_keys(1000, 20_000, 200, seed = 1)
+        arc_ratio = simulator.measure_hit_ratio(ARCCache(100), trace)
+        self.assertGreater(arc_ratio, simulator.measure_hit_ratio(LRUCache(100), trace), "ARC did not beat LRU on scans")
+
+class TestSampledCache(unittest.TestCase):
+    def test_operations(self):
+        for policy in ("lru", "lfu"):
+            cache = SampledCache(3, policy, seed = 0)
+            for key in range(3):
+                cache.put_key_value(key, key * 2)
+            cache.put_key_value(1, 5)
+            self.assertEqual(cache.get_value(1), 5, "Incorrect updated value")
+            self.assertEqual(cache.remove_key(0), (0, 0), "Incorrect removed entry")
+            self.assertEqual(cache.key_node_map, {2: 0, 1: 1}, "Last entry was not moved into the freed slot")
+            self.assertEqual(cache.slot_keys, [2, 1, None], "Incorrect slot keys")
+            cache.put_key_value(3, 6)
+            cache.put_key_value(4, 8)
+            self.assertEqual(cache.size, 3, "Capacity exceeded")
+            self.assertEqual(sorted(cache.key_node_map.values()), [0, 1, 2], "Entries are not packed")
+        self.assertRaises(ValueError, SampledCache, 3, "fifo")
+        self.assertRaises(ValueError, SampledCache, 3, "lru", 0)
+
+    def test_exact_with_full_sample(self):
+        sampled_cache = SampledCache(20, "lru", sample_size = 20, seed = 0)
+        lru_cache = LRUCache(20)
+        for key in simulator.zipf_keys(200, 2000, seed = 2):
+            if lru_cache.get_value(key) is None:
+                lru_cache.put_key_value(key, key)
+            if sampled_cache.get_value(key) is None:
+                sampled_cache.put_key_value(key, key)
+        self.assertEqual(set(sampled_cache.key_node_map), set(lru_cache.key_node_map), "Full sample is not exact LRU")
+
+    def test_lfu_keeps_frequent_keys(self):
+        cache = SampledCache(10, "lfu", sample_size = 10, seed = 0)
+        for _ in range(50):
+            cache.put_key_value("hot", 1)
+        for key in range(100):
+            cache.put_key_value(key, key)
+        self.assertEqual(cache.get_value("hot"), 1, "Frequently used key was evicted")
+        self.assertGreater(cache.slot_scores[cache.key_node_map["hot"]], 5, "Counter did not grow")
+
+class TestClockCache(unittest.TestCase):
+    def setUp(self):
+        self.clock_cache = ClockCache(3)
+        for key in range(3):
+            self.clock_cache.put_key_value(key, key * 2)
+
+    def test_second_chance(self):
+        self.assertEqual(self.clock_cache.get_value(0), 0, "Incorrect value")
+        self.clock_cache.put_key_value(3, 6)
+        self.assertEqual(sorted(self.clock_cache.key_node_map), [0, 2, 3], "Referenced entry was not given a second chance")
+        self.assertEqual(self.clock_cache.reference_bits[0], 0, "Hand did not clear the reference bit it passed")
+        self.clock_cache.put_key_value(4, 8)
+        self.assertEqual(sorted(self.clock_cache.key_node_map), [0, 3, 4], "Hand did not evict the next unreferenced entry")
+        self.assertEqual(self.clock_cache.size, 3, "Incorrect size")
+
+    def test_update_and_remove(self):
+        self.clock_cache.put_key_value(1, 5)
+        self.assertEqual(self.clock_cache.get_value(1), 5, "Incorrect updated value")
+        self.assertEqual(self.clock_cache.remove_key(1), (1, 5), "Incorrect removed entry")
+        self.assertEqual(self.clock_cache.get_value(1), None, "Removed key has a value")
+        self.clock_cache.put_key_value(7, 14)
+        self.assertEqual(sorted(self.clock_cache.key_node_map), [0, 2, 7], "Freed slot was not reused")
+
+    def test_concurrent_reads(self):
+        clock_cache = ClockCache(50)
+        errors = []
+        def reader(seed):
+            rng = random.Random(seed)
+            for _ in range(20_000):
+                key = rng.randrange(200)
+                value = clock_cache.get_value(key)
+                if value is not None and value != key * 3:
+                    errors.append((key, value))
+        def writer():
+            rng = random.Random(0)
+            for _ in range(20_000):
+                key = rng.randrange(200)
+                clock_cache.put_key_value(key, key * 3)
+        threads = [threading.Thread(target = reader, args = (seed,)) for seed in range(4)]
+        threads.append(threading.Thread(target = writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [], "A look up returned the value of another key")
+        self.assertEqual(clock_cache.size, 50, "Incorrect size after concurrent access")
+
+class TestSimulator(unittest.TestCase):
+    def test_workloads(self):
+        self.assertEqual(simulator.build_workload("zipf", 10, 500), simulator.build_workload("zipf", 10, 500), "Workload is not deterministic")
+        for name in ("zipf", "uniform", "scan", "loop"):
+            self.assertEqual(len(simulator.build_workload(name, 10, 500)), 500, "Incorrect length for workload " + name)
+        scan = simulator.scan_keys(100, 200, 10, scans = 2)
+        self.assertEqual(scan.count(100) + scan.count(119), 2, "Scan keys are missing or repeated")
+        self.assertRaises(ValueError, simulator.build_workload, "bursty", 10, 500)
+
+    def test_hit_ratios(self):
+        loop = simulator.loop_keys(11, 1100)
+        self.assertEqual(simulator.measure_hit_ratio(LRUCache(10), loop), 0.0, "LRU should miss every access of a longer loop")
+        self.assertEqual(simulator.measure_hit_ratio(LRUCache(11), loop), 0.99, "LRU should only miss the first pass of a fitting loop")
+
+    def test_empty_trace(self):
+        self.assertEqual(simulator.measure_hit_ratio(LRUCache(10), []), 0.0, "Empty trace has a nonzero hit ratio")
+        self.assertEqual(simulator.percentile([], 0.99), None, "Empty values have a percentile")
+        result = simulator.simulate("empty", "lru", 10, [])
+        self.assertEqual((result["accesses"], result["p99_ns"]), (0, None), "Incorrect result for an empty trace")
+        self.assertEqual(simulator.find_regressions([result], [result]), [], "Empty trace regressed")
+
+    def test_simulate_and_regressions(self):
+        result = simulator.simulate("loop", "lru", 10, simulator.loop_keys(11, 300))
+        self.assertEqual(set(result) >= {"hit_ratio", "ops_per_sec", "p50_ns", "p99_ns", "peak_memory_bytes"}, True, "Metrics are missing")
+        self.assertEqual(result["p50_ns"] <= result["p99_ns"], True, "Percentiles are out of order")
+        better = dict(result, hit_ratio = 0.5, ops_per_sec = result["ops_per_sec"] * 2)
+        self.assertEqual(simulator.find_regressions([result], [result]), [], "Identical results regressed")
+        regressions = simulator.find_regressions([result], [better])
+        self.assertEqual(len(regressions), 2, "Regressions were not detected")
+
+    def test_command_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace_path = os.path.join(directory, "trace.txt")
+            output_path = os.path.join(directory, "results.json")
+            with open(trace_path, "w") as trace_file:
+                trace_file.write("# recorded keys\n1\n2\nuser:3\n1\n")
+            self.assertEqual(simulator.read_trace(trace_path), [1, 2, "user:3", 1], "Incorrect trace keys")
+            status = simulator.main(["--trace", trace_path, "--capacity", "3", "--output", output_path])
+            self.assertEqual(status, 0, "Simulator failed")
+            with open(output_path) as output_file:
+                results = json.load(output_file)["results"]
+            self.assertEqual([result["hit_ratio"] for result in results], [0.25, 0.25, 0.25], "Incorrect trace hit ratios")
+            baseline_path = os.path.join(directory, "baseline.json")
+            with open(baseline_path, "w") as baseline_file:
+                json.dump({"results": [dict(result, hit_ratio = 0.5) for result in results]}, baseline_file)
+            status = simulator.main(["--trace", trace_path, "--capacity", "3", "--output", output_path,
+                "--baseline", baseline_path, "--tolerance", "ops_per_sec=1", "--tolerance", "p99_ns=1000"])
+            self.assertEqual(status, 1, "Hit ratio regression was not reported")
+
+class TestInstrumentation(unittest.TestCase):
+    def test_lru_counters(self):
+        lru_cache = LRUCache(2, record_stats = True)
+        lru_cache.put_key_value(1, 3)
+        lru_cache.put_key_value(1, 4)
+        lru_cache.put_key_value(2, 5)
+        lru_cache.put_key_value(3, 7)
+        lru_cache.get_value(3)
+        lru_cache.get_value(1)
+        lru_cache.get_many([2, 3, 4])
+        lru_cache.put_many([(2, 6), (5, 8)])
+        self.assertEqual(lru_cache.stats(), CacheStats(hits = 3, misses = 2, inserts = 4, updates = 2,
+            evictions = 2, frequency_nodes_created = 0, frequency_nodes_removed = 0), "Incorrect LRU counts")
+        lru_cache.reset_stats()
+        self.assertEqual(sum(lru_cache.stats()), 0, "Counts were not reset")
+
+    def test_lfu_counters(self):
+        lfu_cache = LFUCache(2, record_stats = True)
+        lfu_cache.put_key_value(1, 3)
+        lfu_cache.put_key_value(2, 5)
+        lfu_cache.get_value(1)
+        lfu_cache.get_value(1)
+        lfu_cache.put_key_value(3, 7)
+        lfu_cache.get_value(2)
+        stats = lfu_cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.inserts, stats.evictions), (2, 1, 3, 1), "Incorrect LFU counts")
+        self.assertEqual(stats.frequency_nodes_created, 3, "Incorrect count of created frequency nodes")
+        self.assertEqual(stats.frequency_nodes_removed, 1, "Incorrect count of removed frequency nodes")
+
+    def test_switching(self):
+        lru_cache = LRUCache(2)
+        lru_cache.get_value(1)
+        self.assertIsNone(lru_cache.counters, "Counts are recorded by default")
+        lru_cache.enable_stats()
+        lru_cache.get_value(1)
+        self.assertEqual(lru_cache.stats().misses, 1, "Counts were not recorded once enabled")
+        lru_cache.enable_stats(False)
+        self.assertEqual(sum(lru_cache.stats()), 0, "Counts were kept once disabled")
+
+    def test_callbacks(self):
+        for cache_class in (LRUCache, LFUCache):
+            evicted = []
+            missed = []
+            cache = cache_class(2, on_evict = lambda key, value: evicted.append((key, value)), on_miss = missed.append)
+            cache.put_many([(1, 3), (2, 5), (3, 7)])
+            cache.put_key_value(4, 9)
+            cache.get_value(1)
+            cache.get_many([5, 4])
+            self.assertEqual(evicted, [(1, 3), (2, 5)], "Incorrect evictions reported by " + cache_class.__name__)
+            self.assertEqual(missed, [1, 5], "Incorrect misses reported by " + cache_class.__name__)
+
+    def test_sharded_counters(self):
+        cache = ConcurrentLRUCache(4, 2, record_stats = True)
+        for key in range(10):
+            cache.put_key_value(key, key)
+            cache.get_value(key)
+        stats = cache.stats()
+        self.assertEqual((stats.inserts, stats.hits, stats.evictions), (10, 10, 6), "Incorrect sharded counts")
+
+class TestTieredCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "spill.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_disk_store(self):
+        store = DiskStore(self.path, 100)
+        records = [pickle.dumps("x" * 20) for _ in range(3)]
+        for key, offset in enumerate(store.append(records)):
+            store.add(key, offset, len(records[key]))
+        self.assertEqual(store.get(1), "x" * 20, "Incorrect value read from disk")
+        self.assertEqual(list(store.index), [1, 2], "Oldest record was not dropped to fit the budget")
+        self.assertLessEqual(store.live_bytes, 100, "Live records exceed the budget")
+        store.discard(1)
+        store.compact()
+        self.assertEqual(store.file_size, len(records[2]), "Compaction kept dead records")
+        self.assertEqual(store.get(2), "x" * 20, "Incorrect value read after compaction")
+        offsets = store.append(records[:2])
+        store.add(3, offsets[0], len(records[0]))
+        store.add(4, offsets[1], len(records[1]))
+        compacted = store.copy_live_records(list(store.index.items()))
+        store.discard(3) # discarded during the copy
+        store.install_compacted(compacted)
+        self.assertEqual(list(store.index), [4], "Key discarded during the copy was kept")
+        self.assertEqual(store.get(4), "x" * 20, "Incorrect value read after compaction")
+        store.close()
+
+    def test_spill_and_promote(self):
+        for policy in ("lru", "lfu"):
+            cache = TieredCache(3, self.path, 10_000, policy, batch_size = 2)
+            try:
+                for key in range(10):
+                    cache.put_key_value(key, [key])
+                cache.flush()
+                self.assertEqual(cache.memory.size, 3, "Memory tier exceeds its capacity")
+                self.assertEqual(len(cache.disk.index), 7, "Evicted entries were not spilled")
+                self.assertEqual(cache.get_value(0), [0], "Spilled entry was not served from disk")
+                self.assertIn(0, cache.memory.key_node_map, "Spilled entry was not promoted")
+                self.assertNotIn(0, cache.disk.index, "Promoted entry was kept on disk")
+                self.assertEqual(cache.get_value(10), None, "Missing key has a value")
+                cache.put_key_value(1, "new")
+                cache.flush()
+                self.assertEqual(cache.get_value(1), "new", "Stale disk copy was served")
+                self.assertEqual(cache.remove_key(2), True, "Spilled key was not removed")
+                self.assertEqual(cache.is_key_in_cache(2), False, "Removed key is still present")
+            finally:
+                cache.close()
+
+    def test_budget_and_compaction(self):
+        cache = TieredCache(2, self.path, 2_000, batch_size = 8)
+        try:
+            for key in range(2_000):
+                cache.put_key_value(key % 300, "x" * 50)
+                cache.get_value((key * 7) % 300)
+            cache.flush()
+            self.assertLessEqual(cache.disk.live_bytes, 2_000, "Disk tier exceeds its byte budget")
+            self.assertLessEqual(os.path.getsize(self.path), 2 * 2_000 + 8 * 100, "Disk log was not compacted")
+        finally:
+            cache.close()
+
+    def test_compaction_off_lock(self):
+        cache = TieredCache(1, self.path, 10_000)
+        started = threading.Event()
+        release = threading.Event()
+        copy_live_records = cache.disk.copy_live_records
+        def slow_copy(entries):
+            started.set()
+            release.wait(5)
+            return copy_live_records(entries)
+        try:
+            for key in range(5):
+                cache.put_key_value(key, [key])
+            cache.flush()
+            with mock.patch.object(cache.disk, "copy_live_records", slow_copy):
+                compactor = threading.Thread(target = cache.compact)
+                compactor.start()
+                started.wait(5)
+                self.assertEqual(cache.get_value(1), [1], "Look up during compaction failed")
+                release.set()
+                compactor.join()
+            self.assertNotIn(1, cache.disk.index, "Key promoted during compaction was kept on disk")
+            self.assertEqual(cache.get_value(2), [2], "Incorrect value read after compaction")
+        finally:
+            release.set()
+            cache.close()
+
+    def test_writer_failure(self):
+        cache = TieredCache(2, self.path, 10_000)
+        with mock.patch.object(cache.disk, "append", side_effect = OSError("disk full")):
+            for key in range(3):
+                cache.put_key_value(key, [key])
+            self.assertRaises(OSError, cache.flush)
+        self.assertRaises(OSError, cache.put_key_value, 3, [3])
+        self.assertRaises(OSError, cache.get_value, 0)
+        self.assertEqual(cache.get_value(2), [2], "Entry in memory was not served")
+        self.assertEqual(len(cache.pending), 1, "Entries were spilled after the writer failed")
+        self.assertRaises(OSError, cache.close)
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def fill(self, cache):
+        for key in range(8):
+            cache.put_key_value(key, str(key) * 3)
+        for key in (4, 4, 6, 2):
+            cache.get_value(key)
+        return cache
+
+    def test_round_trip(self):
+        for cache_class in (LRUCache, LFUCache):
+            cache = self.fill(cache_class(6))
+            self.assertEqual(cache.save_snapshot(self.path), 6, "Incorrect number of entries saved")
+            restored_cache = cache_class(6)
+            self.assertEqual(restored_cache.load_snapshot(self.path), 6, "Incorrect number of entries restored")
+            self.assertEqual(repr(restored_cache).split("\n\n", 1)[1], repr(cache).split("\n\n", 1)[-1],
+                "Restored " + cache_class.__name__ + " has a different order")
+            for key in range(10):
+                self.assertEqual(restored_cache.get_value(key), cache.get_value(key), "Incorrect restored value")
+
+    def test_lfu_frequencies(self):
+        self.fill(LFUCache(6)).save_snapshot(self.path)
+        lfu_cache = LFUCache(6)
+        lfu_cache.load_snapshot(self.path)
+        frequencies = {key: node.key for key, node in lfu_cache.key_to_frequency_node.items()}
+        self.assertEqual(frequencies, {3: 1, 5: 1, 7: 1, 6: 2, 2: 2, 4: 3}, "Incorrect restored frequencies")
+
+    def test_smaller_capacity(self):
+        self.fill(LRUCache(6)).save_snapshot(self.path)
+        lru_cache = LRUCache(3)
+        self.assertEqual(lru_cache.load_snapshot(self.path), 3, "Incorrect number of entries restored")
+        self.assertEqual(lru_cache.get_many([2, 6, 4, 7]), ["222", "666", "444", None], "Least recent entries were kept")
+        self.fill(LFUCache(6)).save_snapshot(self.path)
+        lfu_cache = LFUCache(2)
+        lfu_cache.load_snapshot(self.path)
+        self.assertEqual(sorted(lfu_cache.key_node_map), [2, 4], "Least frequent entries were kept")
+
+    def test_invalid_load(self):
+        self.fill(LRUCache(6)).save_snapshot(self.path)
+        self.assertRaises(ValueError, self.fill(LRUCache(6)).load_snapshot, self.path)
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(b"not a snapshot")
+        self.assertRaises(ValueError, LFUCache(6).load_snapshot, self.path)
+
+    def test_failed_save_keeps_snapshot(self):
+        self.fill(LRUCache(6)).save_snapshot(self.path)
+        lru_cache = self.fill(LRUCache(6))
+        lru_cache.put_key_value(9, lambda: None)
+        self.assertRaises((pickle.PicklingError, AttributeError), lru_cache.save_snapshot, self.path)
+        self.assertEqual(os.path.exists(self.path + ".tmp"), False, "Temporary file was left behind")
+        self.assertEqual(LRUCache(6).load_snapshot(self.path), 6, "Previous snapshot was not kept")
+
+def fill_shared_cache(cache, first_key, count):
+    for key in range(first_key, first_key + count):
+        cache.put_key_value(key, [key] * 3)
+        cache.get_value(first_key)
+
+class TestSharedLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SharedLRUCache(12, 64, 3)
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache.unlink()
+
+    def test_initialization(self):
+        self.assertEqual(self.cache.stripe_capacities, [4, 4, 4], "Stripe capacities are incorrect")
+        self.assertEqual(self.cache.size, 0, "Initial size is not 0")
+        self.assertRaises(ValueError, SharedLRUCache, 2, 64, 3)
+        self.assertRaises(ValueError, SharedLRUCache, 10, 0)
+
+    def test_matches_LRU_cache(self):
+        cache = SharedLRUCache(5, 64, 1)
+        lru_cache = LRUCache(5)
+        rng = random.Random(3)
+        try:
+            for index in range(500):
+                key = rng.randrange(12)
+                if rng.random() < 0.5:
+                    self.assertEqual(cache.get_value(key), lru_cache.get_value(key), "Incorrect value")
+                elif rng.random() < 0.9:
+                    cache.put_key_value(key, ("value", index))
+                    lru_cache.put_key_value(key, ("value", index))
+                else:
+                    self.assertEqual(cache.remove_key(key), lru_cache.remove_key(key) is not None, "Incorrect removal")
+                self.assertEqual(cache.size, lru_cache.size, "Incorrect size")
+        finally:
+            cache.close()
+            cache.unlink()
+
+    def test_item_size_limit(self):
+        self.assertRaises(ValueError, self.cache.put_key_value, "key", "x" * 64)
+        self.cache.put_key_value("key", "x" * 20)
+        self.assertEqual(self.cache.get_value("key"), "x" * 20, "Incorrect value for large item")
+
+    def test_shared_between_processes(self):
+        for method in ("fork", "spawn"):
+            if method not in multiprocessing.get_all_start_methods():
+                continue
+            context = multiprocessing.get_context(method)
+            cache = SharedLRUCache(12, 64, 3, context = context)
+            try:
+                processes = [context.Process(target = fill_shared_cache, args = (cache, offset * 100, 50))
+                    for offset in range(3)]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                    self.assertEqual(process.exitcode, 0, "Worker process failed")
+                self.assertEqual(cache.size, 12, "Entries put by workers are not shared")
+                keys = [key for offset in range(3) for key in range(offset * 100, offset * 100 + 50)]
+                present = {key: value for key, value in zip(keys, map(cache.get_value, keys)) if value is not None}
+                self.assertEqual(len(present), 12, "Shared entries are inconsistent")
+                self.assertEqual(present, {key: [key] * 3 for key in present}, "Shared entries have incorrect values")
+            finally:
+                cache.close()
+                cache.unlink()
+
+class TestCacheServer(unittest.TestCase):
+    def setUp(self):
+        self.server = CacheServer({"recent": LRUCache(2), "frequent": LFUCache(3)})
+        self.address = self.server.start_thread(("127.0.0.1", 0))
+        self.client = CacheClient(self.address, pool_size = 2, timeout = 10)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop_thread()
+
+    def test_commands(self):
+        self.assertEqual(self.client.ping(), True, "Server did not answer")
+        self.assertEqual(self.client.get("recent", 1), None, "Missing key has a value")
+        self.client.set("recent", 1, b"one")
+        self.client.set("recent", "two", "2")
+        self.client.set("recent", 3, 3)
+        self.assertEqual(self.client.get_many("recent", [1, "two", 3]), [None, b"2", b"3"], "Incorrect values")
+        self.client.set_many("frequent", {1: b"a", 2: b"b"})
+        self.assertEqual(self.client.get("frequent", 2), b"b", "Incorrect value")
+        self.assertEqual(self.client.delete("frequent", 2), True, "Present key was not removed")
+        self.assertEqual(self.client.delete("frequent", 2), False, "Missing key was removed")
+        self.assertEqual(self.server.caches["frequent"].size, 1, "Hosted cache has an incorrect size")
+        self.assertRaises(CacheServerError, self.client.get, "missing", 1)
+        self.assertRaises(CacheServerError, self.client.set, "recent", 1, 2, -1)
+
+    def test_pipeline(self):
+        pipeline = self.client.pipeline()
+        pipeline.set("frequent", 1, b"x").get("frequent", 1).get_many("frequent", [1, 2]).delete("frequent", 1)
+        self.assertEqual(len(pipeline), 4, "Commands were not queued")
+        self.assertEqual(pipeline.execute(), ["OK", b"x", [b"x", None], 1], "Incorrect pipelined replies")
+        self.assertEqual(pipeline.execute(), [], "Pipeline was not emptied")
+        pipeline.get("frequent", 1).get("missing", 1)
+        self.assertRaises(CacheServerError, pipeline.execute)
+        self.assertEqual(self.client.ping(), True, "Connection was not usable after an error reply")
+
+    def test_connection_pool(self):
+        errors = []
+        def worker(offset):
+            try:
+                for key in range(offset, offset + 50):
+                    self.client.set("frequent", key, key)
+                    self.client.get("frequent", key)
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target = worker, args = (offset * 100,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [], "Requests failed")
+        self.assertEqual(self.client.connection_count, 2, "Pool opened too many connections")
+        self.assertEqual(self.server.caches["frequent"].size, 3, "Hosted cache has an incorrect size")
+
+    def test_pool_waiters(self):
+        client = CacheClient(self.address, pool_size = 1, timeout = 10)
+        connection = client._CacheClient__acquire()
+        results = []
+        waiter = threading.Thread(target = lambda: results.append(client.ping()))
+        waiter.start()
+        time.sleep(0.05)
+        client._CacheClient__discard(connection) # a failed connection frees its place for the waiter
+        waiter.join(5)
+        self.assertEqual(results, [True], "Waiting call was not woken when a connection was discarded")
+        connection = client._CacheClient__acquire()
+        client.close()
+        client._CacheClient__release(connection)
+        self.assertEqual(connection[0].fileno(), -1, "Connection returned after close was kept open")
+        self.assertEqual(client.connection_count, 0, "Connections were left open")
+        self.assertRaises(ValueError, client.ping)
+
+    def test_protocol_error(self):
+        with socket.create_connection(self.address, timeout = 10) as connection:
+            connection.sendall(b"*1\r\n$4\r\nPING\r\nGET\r\n")
+            replies = b""
+            while True:
+                data = connection.recv(1024)
+                if not data:
+                    break
+                replies += data
+        self.assertEqual(replies.split(b"\r\n")[0], b"+PONG", "Command before the error was not answered")
+        self.assertTrue(replies.split(b"\r\n")[1].startswith(b"-ERR Protocol error"), "Protocol error was not reported")
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            server = CacheServer({"recent": LRUCache(2)})
+            path = server.start_thread(os.path.join(directory, "cache.sock"))
+            client = CacheClient(path)
+            try:
+                client.set("recent", 1, b"one")
+                self.assertEqual(client.get("recent", 1), b"one", "Incorrect value over unix socket")
+            finally:
+                client.close()
+                server.stop_thread()
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestVectorCache(unittest.TestCase):
+    def test_batch_operations(self):
+        vector_cache = VectorCache(4)
+        vector_cache.put_many(numpy.array([1, 2, 3, 2]), numpy.array([10, 20, 30, 21]))
+        self.assertEqual(vector_cache.size, 3, "Repeated key was placed twice")
+        hit_mask, values = vector_cache.get_many(numpy.array([3, 4, 2, 1 << 62]))
+        self.assertEqual(hit_mask.tolist(), [True, False, True, False], "Incorrect hit mask")
+        self.assertEqual(values.tolist(), [30, 0, 21, 0], "Incorrect values")
+        vector_cache.put_many([5, 6], 7)
+        self.assertEqual(sorted(vector_cache.slot_keys[:vector_cache.size].tolist()), [2, 3, 5, 6],
+            "Least recently used entry was not evicted")
+        self.assertEqual(vector_cache.remove_many([2, 9]).tolist(), [True, False], "Incorrect removals")
+        self.assertEqual(vector_cache.remove_key(5), (5, 7), "Incorrect removed entry")
+        self.assertEqual(vector_cache.get_value(6), 7, "Incorrect value after removals")
+        self.assertEqual(vector_cache.get_value(5), None, "Removed key has a value")
+        self.assertRaises(ValueError, VectorCache, 4, "fifo")
+
+    def test_matches_scalar_caches(self):
+        for policy, cache_class in (("lru", LRUCache), ("lfu", LFUCache)):
+            rng = random.Random(0)
+            vector_cache = VectorCache(20, policy)
+            cache = cache_class(20)
+            for step in range(3000):
+                key = rng.randrange(60)
+                if rng.random() < 0.5:
+                    self.assertEqual(vector_cache.get_value(key), cache.get_value(key), "Values diverge")
+                elif rng.random() < 0.9:
+                    vector_cache.put_key_value(key, step)
+                    cache.put_key_value(key, step)
+                else:
+                    vector_cache.remove_key(key)
+                    cache.remove_key(key)
+            self.assertEqual(sorted(vector_cache.slot_keys[:vector_cache.size].tolist()), sorted(cache.key_node_map),
+                "Evictions diverge from " + cache_class.__name__)
+            keys = [rng.randrange(60) for _ in range(100)]
+            hit_mask, values = vector_cache.get_many(keys)
+            expected = [cache.get_value(key) for key in keys]
+            self.assertEqual([value if hit else None for value, hit in zip(values.tolist(), hit_mask)], expected,
+                "Batch look up differs from look ups in turn")
+
+    def test_batch_eviction_matches_puts_in_turn(self):
+        vector_cache = VectorCache(3)
+        vector_cache.put_many([0, 10, 3], 0)
+        vector_cache.put_many([8, 10, 1, 2], 0)
+        self.assertEqual(sorted(vector_cache.slot_keys[:vector_cache.size].tolist()), [1, 2, 10],
+            "Key refreshed by the batch was evicted")
+        rng = random.Random(0)
+        vector_cache = VectorCache(100)
+        cache = LRUCache(100)
+        for _ in range(300):
+            keys = [rng.randrange(300) for _ in range(rng.choice([1, 2, 40, 150]))]
+            vector_cache.put_many(keys, 0)
+            for key in keys:
+                cache.put_key_value(key, 0)
+            if rng.random() < 0.3:
+                vector_cache.get_many(keys[:10])
+                for key in keys[:10]:
+                    cache.get_value(key)
+            self.assertEqual(sorted(vector_cache.slot_keys[:vector_cache.size].tolist()), sorted(cache.key_node_map),
+                "Batch evictions diverge from puts in turn")
+
+    def test_large_counts(self):
+        vector_cache = VectorCache(3, "lfu")
+        vector_cache.put_many([1, 2, 3], 0)
+        vector_cache.get_many([2, 3])
+        vector_cache.slot_counts[0] = 1 << 23 # key 1
+        vector_cache.tick = 1 << 41
+        vector_cache.put_key_value(4, 0)
+        self.assertEqual(sorted(vector_cache.slot_keys[:vector_cache.size].tolist()), [1, 3, 4],
+            "Entry with a large count was evicted")
+
+    def test_table_rebuild(self):
+        vector_cache = VectorCache(8, value_dtype = object)
+        for start in range(0, 400, 5):
+            vector_cache.put_many(numpy.arange(start, start + 5), [str(key) for key in range(start, start + 5)])
+            self.assertLess(vector_cache.size + vector_cache.deleted_count, len(vector_cache.table_slots),
+                "Table has no empty positions")
+        hit_mask, values = vector_cache.get_many(numpy.arange(390, 400))
+        self.assertEqual(hit_mask.tolist(), [False, False] + [True] * 8, "Incorrect entries after churn")
+        self.assertEqual(values[2:].tolist(), [str(key) for key in range(392, 400)], "Incorrect values after churn")
+
+class TestCacheViews(unittest.TestCase):
+    def test_recency_order(self):
+        cache = LRUCache(4)
+        for key in range(5):
+            cache.put_key_value(key, key * 10)
+        cache.get_value(2)
+        self.assertEqual(list(cache.iter_by_recency()), [(1, 10), (3, 30), (4, 40), (2, 20)],
+            "Entries were not streamed least recently used first")
+        self.assertEqual(list(cache.keys()), [1, 3, 4, 2], "Keys were not streamed in eviction order")
+        self.assertEqual([key for key, _ in cache.iter_by_recency(reverse = True)], [2, 4, 3, 1],
+            "Entries were not streamed most recently used first")
+
+    def test_frequency_order(self):
+        cache = LFUCache(5)
+        for key in range(5):
+            cache.put_key_value(key, key * 10)
+        for key in (3, 3, 1, 4):
+            cache.get_value(key)
+        self.assertEqual(list(cache.iter_by_frequency()), [(0, 0, 1), (2, 20, 1), (1, 10, 2), (4, 40, 2), (3, 30, 3)],
+            "Entries were not streamed in eviction order")
+        self.assertEqual(list(cache.items()), [(0, 0), (2, 20), (1, 10), (4, 40), (3, 30)], "Incorrect items")
+        self.assertEqual([key for key, _, _ in cache.iter_by_frequency(min_freq = 2)], [1, 4, 3],
+            "Entries below the minimum frequency were streamed")
+        self.assertEqual([key for key, _, _ in cache.iter_by_frequency(min_freq = 2, reverse = True)], [3, 4, 1],
+            "Entries were not streamed most frequently used first")
+
+    def test_fail_fast(self):
+        for cache in (LRUCache(4), LFUCache(4)):
+            cache.put_many({1: 1, 2: 2, 3: 3})
+            entries = iter(cache.items())
+            next(entries)
+            cache.peek(2)
+            next(entries) # peeking does not change the cache
+            cache.get_value(1)
+            with self.assertRaises(RuntimeError):
+                next(entries)
+            entries = iter(cache.keys())
+            next(entries)
+            cache.put_key_value(4, 4)
+            with self.assertRaises(RuntimeError):
+                next(entries)
+        for cache in (ArrayLRUCache(2), ARCCache(2), ClockCache(2), SampledCache(2), WTinyLFUCache(100)):
+            self.assertFalse(hasattr(cache, "keys"), "Cache without items offers keys")
+
+    def test_peek(self):
+        now = [0.0]
+        for cache in (LRUCache(3, clock = lambda: now[0], record_stats = True),
+                LFUCache(3, clock = lambda: now[0], record_stats = True)):
+            cache.put_key_value(1, "a", ttl = 5)
+            cache.put_key_value(2, "b")
+            cache.put_key_value(3, "c")
+            self.assertEqual(cache.peek(1), "a", "Incorrect peeked value")
+            self.assertEqual(cache.peek(9), None, "Absent key was peeked")
+            self.assertEqual(cache.stats().hits + cache.stats().misses, 0, "Peeking was counted")
+            cache.put_key_value(4, "d")
+            self.assertEqual(cache.is_key_in_cache(1), False, "Peeking changed the eviction order")
+            cache.put_key_value(5, "e", ttl = 5)
+            now[0] = 10.0
+            self.assertEqual(cache.peek(5), None, "Expired entry was peeked")
+            self.assertNotIn(5, [key for key, _ in cache.items()], "Expired entry was streamed")
+            now[0] = 0.0
+        for cache in (ArrayLRUCache(2), ClockCache(2), SampledCache(2), WTinyLFUCache(100)):
+            cache.put_key_value(1, "a")
+            self.assertEqual((cache.peek(1), cache.peek(2)), ("a", None), "Incorrect peeked value")
+        cache.put_key_value(2, "b") # pushes key 1 out of the window into the main cache
+        self.assertEqual((cache.peek(1), cache.peek(2)), ("a", "b"), "Incorrect peeked value")
+
+class TestLFUAging(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = LFUCache(10, clock = lambda: self.now, decay_period = 10, decay_step = 1)
+        for key, frequency in ((1, 1), (2, 2), (5, 3), (3, 5), (4, 8)):
+            self.cache.put_key_value(key, key)
+            for _ in range(frequency - 1):
+                self.cache.get_value(key)
+
+    def test_incremental_halving(self):
+        self.now = 10.0
+        self.cache.get_value(99) # starts the walk and relabels frequency 1
+        self.cache.get_value(99)
+        self.assertEqual(list(self.cache.iter_by_frequency()), [(1, 1, 1), (2, 2, 1), (5, 5, 3), (3, 3, 5), (4, 4, 8)],
+            "Walk did more than one step per operation")
+        for _ in range(3):
+            self.cache.get_value(99)
+        self.assertEqual(list(self.cache.iter_by_frequency()), [(1, 1, 1), (2, 2, 1), (5, 5, 1), (3, 3, 2), (4, 4, 4)],
+            "Frequencies were not halved and merged")
+        self.assertEqual(self.cache.decay_cursor, None, "Walk did not finish")
+        self.cache.put_key_value(6, 6)
+        self.cache.put_many({7: 7, 8: 8, 9: 9, 10: 10, 11: 11})
+        self.assertEqual(self.cache.is_key_in_cache(1), False, "Least frequent entry was not evicted first")
+        self.assertEqual(self.cache.is_key_in_cache(2), True, "Merged entry was not kept after older entries")
+
+    def test_cursor_node_removed(self):
+        self.now = 25.0
+        self.cache.get_value(99)
+        self.cache.remove_key(2) # empties the node at the cursor
+        self.cache.get_value(4)
+        for _ in range(10):
+            self.cache.get_value(99)
+        self.assertEqual(list(self.cache.iter_by_frequency()), [(1, 1, 1), (5, 5, 1), (3, 3, 1), (4, 4, 2)],
+            "Two due halvings were not applied by one walk")
+        self.assertEqual(self.cache.next_decay_at, 30.0, "Incorrect next halving time")
+
+    def test_frequency_structure(self):
+        rng = random.Random(0)
+        cache = LFUCache(20, decay_interval = 13, decay_step = 1)
+        for _ in range(5000):
+            key = rng.randrange(60)
+            operation = rng.random()
+            if operation < 0.6:
+                cache.get_value(key)
+            elif operation < 0.9:
+                cache.put_key_value(key, key)
+            elif operation < 0.95:
+                cache.remove_key(key)
+            else:
+                cache.get_many([key, key + 1])
+            frequencies = [frequency for _, _, frequency in cache.iter_by_frequency()]
+            self.assertEqual(frequencies, sorted(frequencies), "Frequency nodes are out of order")
+            self.assertEqual(len(frequencies), cache.size, "Entries were lost")
+        self.assertLess(max(frequencies), 20, "Frequencies were not decayed")
+        with self.assertRaises(ValueError):
+            LFUCache(10, decay_interval = 0)
+        sharded = ConcurrentLFUCache(8, shard_count = 2, decay_interval = 5)
+        self.assertEqual([shard.decay_interval for shard in sharded.shards], [5, 5], "Options were not passed to shards")
+
+class TestLoadingCache(unittest.TestCase):
+    def setUp(self):
+        self.backend = {key: key * 10 for key in range(100)}
+        self.loads = []
+        self.writes = []
+
+    def load(self, keys):
+        self.loads.append(list(keys))
+        return {key: self.backend[key] for key in keys if key in self.backend}
+
+    def write(self, items):
+        self.writes.append(dict(items))
+        self.backend.update(items)
+
+    def test_read_through(self):
+        for cache_class in (LoadingLRUCache, LoadingLFUCache):
+            self.loads = []
+            cache = cache_class(4, loader = self.load)
+            self.assertEqual(cache.get_many([1, 2, 1, 500]), [10, 20, 10, None], "Incorrect loaded values")
+            self.assertEqual(self.loads, [[1, 2, 500]], "Misses were not loaded in one call")
+            self.assertEqual(cache.get_value(2), 20, "Loaded value was not cached")
+            self.assertEqual(cache.get_value(3), 30, "Single miss was not loaded")
+            self.assertEqual(cache.is_key_in_cache(500), False, "Key missing from the backend was cached")
+            self.assertEqual(len(self.loads), 2, "Hits were loaded")
+
+    def test_write_behind(self):
+        cache = LoadingLRUCache(3, loader = self.load, writer = self.write, flush_size = 10)
+        cache.put_key_value(1, "a")
+        cache.put_key_value(2, "b")
+        cache.put_key_value(1, "c")
+        self.assertEqual(self.writes, [], "Entries were written before a flush")
+        cache.put_many({7: "x", 8: "y"})
+        self.assertEqual(self.writes, [{1: "c", 2: "b"}], "Dirty entries were not written in one batch on eviction")
+        cache.remove_key(8)
+        self.assertEqual(cache.get_value(8), "y", "Removed dirty entry was loaded from the backend")
+        self.assertEqual(self.loads, [], "Dirty entry was loaded")
+        cache.close()
+        self.assertEqual(self.writes[1:], [{7: "x", 8: "y"}], "Dirty entries were not written on close")
+        cache = LoadingLRUCache(100, writer = self.write, flush_size = 3)
+        for key in range(7):
+            cache.put_key_value(key, key)
+        self.assertEqual(self.writes[2:], [{0: 0, 1: 1, 2: 2}, {3: 3, 4: 4, 5: 5}],
+            "Dirty entries were not written when flush_size was reached")
+
+    def test_failed_write(self):
+        failures = [RuntimeError("backend down")]
+        def write(items):
+            if failures:
+                raise failures.pop()
+            self.write(items)
+        cache = LoadingLFUCache(2, writer = write)
+        cache.put_key_value(1, "a")
+        self.assertRaises(RuntimeError, cache.flush)
+        cache.put_key_value(2, "b")
+        self.assertEqual(cache.dirty, {1: "a", 2: "b"}, "Failed batch was not kept dirty")
+        self.assertEqual(cache.flush(), 2, "Dirty entries were not written")
+        self.assertEqual(self.writes, [{1: "a", 2: "b"}], "Incorrect written batch")
+
+    def test_writer_thread(self):
+        written = threading.Event()
+        def write(items):
+            self.write(items)
+            written.set()
+        cache = LoadingLRUCache(10, writer = write, flush_interval = 0.01)
+        cache.put_many({1: "a", 2: "b"})
+        self.assertTrue(written.wait(10), "Writer thread did not write")
+        cache.close()
+        self.assertEqual(self.writes, [{1: "a", 2: "b"}], "Incorrect written batch")
+        self.assertFalse(cache.flush_thread.is_alive(), "Writer thread was not stopped")
+
 if __name__ == '__main__':
     unittest.main()